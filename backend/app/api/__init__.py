@@ -3,5 +3,7 @@ from .auth import router as auth_router
 from .stocks import router as stocks_router
 from .reports import router as reports_router
 from .websocket import router as websocket_router
+from .jobs import router as jobs_router
+from .debug import router as debug_router
 
-__all__ = ['auth_router', 'stocks_router', 'reports_router', 'websocket_router']
\ No newline at end of file
+__all__ = ['auth_router', 'stocks_router', 'reports_router', 'websocket_router', 'jobs_router', 'debug_router']
\ No newline at end of file
@@ -1,12 +1,15 @@
 # backend/app/api/auth.py
+import asyncio
 from datetime import datetime, timedelta
 from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import JWTError, jwt
 import bcrypt
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from ..database import get_db
+from ..database import get_db, get_async_db
 from ..config import settings
 
 # DIRECT MODEL IMPORTS
@@ -70,35 +73,41 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-def authenticate_user(db: Session, username: str, password: str):
-    user = db.query(User).filter(User.username == username).first()
+async def authenticate_user(db: AsyncSession, username: str, password: str):
+    user = (await db.execute(select(User).where(User.username == username))).scalar_one_or_none()
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    # bcrypt is deliberately slow; check it off the event loop
+    if not await asyncio.to_thread(verify_password, password, user.hashed_password):
         return False
     return user
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme), 
-    db: Session = Depends(get_db)
-) -> User:
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+async def user_from_token(db: AsyncSession, token: str) -> Optional[User]:
+    """The user a bearer token was issued to, or None if it is invalid or expired"""
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         username: str = payload.get("sub")
         if username is None:
-            raise credentials_exception
+            return None
         token_data = TokenData(username=username, role=payload.get("role"))
     except JWTError:
-        raise credentials_exception
+        return None
     
-    user = db.query(User).filter(User.username == token_data.username).first()
+    return (await db.execute(
+        select(User).where(User.username == token_data.username)
+    )).scalar_one_or_none()
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme), 
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    user = await user_from_token(db, token)
     if user is None:
-        raise credentials_exception
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     return user
 
 async def get_current_active_user(
@@ -148,9 +157,9 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
 async def login(
     request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(), 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -175,10 +184,10 @@ async def login(
             ip_address=client_host
         )
         db.add(audit)
-        db.commit()
+        await db.commit()
     except Exception as e:
         print(f"Audit log error: {e}")
-        db.rollback()
+        await db.rollback()
     
     return {"access_token": access_token, "token_type": "bearer"}
 
@@ -0,0 +1,20 @@
+# backend/app/api/debug.py
+from fastapi import APIRouter, Depends, Query
+
+from ..config import settings
+from .auth import require_role
+from ..utils.db_stats import db_stats
+
+router = APIRouter(prefix="/debug", tags=["Debug"])
+
+@router.get("/db-stats")
+def get_db_stats(
+    reset: bool = Query(False, description="Clear the counters after reading them"),
+    current_user = Depends(require_role("admin"))
+):
+    """Query counts / DB time per route, slowest statements and N+1 suspects since startup (or the last reset)"""
+    
+    stats = {'enabled': settings.DB_INSTRUMENTATION, **db_stats.stats()}
+    if reset:
+        db_stats.reset()
+    return stats
@@ -0,0 +1,107 @@
+# backend/app/api/jobs.py
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse, FileResponse
+from sqlalchemy.orm import Session
+from typing import Optional
+import json
+import os
+
+from ..database import get_db
+from ..config import settings
+from ..models.job import Job
+from .auth import get_current_active_user
+from ..utils.job_queue import job_queue
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+def serialize_job(job: Job) -> dict:
+    return {
+        'id': job.id,
+        'kind': job.kind,
+        'status': job.status,
+        'symbol': job.stock_symbol,
+        'error': job.error,
+        'progress': json.loads(job.progress) if job.progress else None,
+        'username': job.username,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+        'status_url': f"{settings.API_V1_STR}/jobs/{job.id}",
+        'result_url': f"{settings.API_V1_STR}/jobs/{job.id}/result"
+    }
+
+def job_accepted(job: Job) -> JSONResponse:
+    """202 response returned by endpoints that enqueue work"""
+    return JSONResponse(status_code=202, content={'job_id': job.id, **serialize_job(job)})
+
+def get_job_for_user(db: Session, job_id: int, current_user) -> Job:
+    job = db.query(Job).filter(Job.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.user_id != current_user.id and current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Not allowed to access this job")
+    return job
+
+@router.get("")
+def list_jobs(
+    status: Optional[str] = Query(None, description="Filter by job status"),
+    limit: int = Query(50, le=500, description="Number of jobs to return"),
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_active_user)
+):
+    """List recent jobs (admins see everyone's)"""
+
+    query = db.query(Job)
+    if current_user.role != "admin":
+        query = query.filter(Job.user_id == current_user.id)
+    if status:
+        query = query.filter(Job.status == status)
+
+    jobs = query.order_by(Job.id.desc()).limit(limit).all()
+    return [serialize_job(job) for job in jobs]
+
+@router.get("/{job_id}")
+def get_job_status(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_active_user)
+):
+    """Get the status of a background job"""
+    return serialize_job(get_job_for_user(db, job_id, current_user))
+
+@router.get("/{job_id}/result")
+def get_job_result(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_active_user)
+):
+    """Get the result of a completed job (PDF for reports, JSON otherwise)"""
+
+    job = get_job_for_user(db, job_id, current_user)
+
+    if job.status == "failed":
+        raise HTTPException(status_code=409, detail=f"Job failed: {job.error}")
+    if job.status != "completed":
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+
+    result = json.loads(job.result) if job.result else {}
+
+    if job.kind == "REPORT":
+        if not os.path.exists(result.get('path', '')):
+            raise HTTPException(status_code=410, detail="Report file is no longer available")
+        return FileResponse(result['path'], media_type="application/pdf", filename=result['filename'])
+
+    return result
+
+@router.post("/{job_id}/cancel")
+def cancel_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user = Depends(get_current_active_user)
+):
+    """Cancel a queued or running job"""
+
+    job = get_job_for_user(db, job_id, current_user)
+    if not job_queue.cancel(db, job):
+        raise HTTPException(status_code=409, detail=f"Job is already {job.status}")
+    return serialize_job(job)
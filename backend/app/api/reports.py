@@ -1,69 +1,48 @@
 # backend/app/api/reports.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-import pandas as pd
+import io
+import asyncio
 from datetime import datetime
+from typing import Optional
 
-from ..database import get_db
+from ..database import get_db, get_async_db, SessionLocal
 from ..models.stock import StockData, Anomaly
 from ..models.audit import AuditLog
 from .auth import get_current_active_user, require_role
+from .jobs import job_accepted
 from ..utils.pdf_generator import PDFReportGenerator
 from ..ml import MarketSurveillanceEngine
+from ..utils.job_queue import job_queue
+from ..utils.ohlcv_repository import OHLCVRepository
+from ..utils.pagination import page, decode_cursor, keyset_before
 
 router = APIRouter(prefix="/reports", tags=["Reports"])
 pdf_generator = PDFReportGenerator()
 surveillance_engine = MarketSurveillanceEngine()
 
-@router.get("/generate/{symbol}")
-async def generate_report(
-    symbol: str,
-    db: Session = Depends(get_db),
-    current_user = Depends(require_role("analyst"))
-):
-    """Generate PDF report for a stock"""
+# Anomalies listed in a PDF report
+REPORT_ANOMALIES = 20
+
+def build_report(db: Session, symbol: str, user_id: int, username: str) -> io.BytesIO:
+    """Analyze a symbol, render its PDF report and audit the export"""
     
-    # Get stock data
-    stock_data = db.query(StockData).filter(
-        StockData.symbol == symbol
-    ).order_by(StockData.date).all()
+    # Risk summary aggregated in the database (window functions + GROUP BY
+    # risk level); the history itself never leaves it
+    summary = OHLCVRepository(db).fetch_risk_summary(symbol, surveillance_engine)
     
-    if not stock_data:
-        raise HTTPException(status_code=404, detail="No data found")
+    if not summary['total_days']:
+        raise LookupError("No data found")
+    summary['ml_anomalies'] = 0
     
-    # Get anomalies
+    # Latest anomalies for the report table
     anomalies = db.query(Anomaly).join(
         StockData
     ).filter(
         StockData.symbol == symbol
-    ).order_by(Anomaly.date.desc()).all()
-    
-    # Convert to DataFrame
-    df = pd.DataFrame([{
-        'date': s.date,
-        'open': s.open,
-        'high': s.high,
-        'low': s.low,
-        'close': s.close,
-        'volume': s.volume
-    } for s in stock_data])
-    
-    # Run analysis
-    df_result = surveillance_engine.analyze(df)
-    
-    # Prepare analysis summary
-    summary = {
-        'total_days': len(df_result),
-        'high_risk_days': len(df_result[df_result['risk_level'] == 'High']),
-        'medium_risk_days': len(df_result[df_result['risk_level'] == 'Medium']),
-        'low_risk_days': len(df_result[df_result['risk_level'] == 'Low']),
-        'avg_risk_score': float(df_result['risk_score'].mean()),
-        'max_risk_score': float(df_result['risk_score'].max()),
-        'price_anomalies': int(df_result['price_anomaly_z'].sum()),
-        'volume_anomalies': int(df_result['volume_anomaly_z'].sum()),
-        'ml_anomalies': 0
-    }
+    ).order_by(StockData.date.desc(), Anomaly.id.desc()).limit(REPORT_ANOMALIES).all()
     
     # Prepare anomalies list
     anomalies_list = [{
@@ -73,49 +52,89 @@ async def generate_report(
         'risk_level': a.risk_level,
         'zscore_price': a.zscore_price,
         'zscore_volume': a.zscore_volume
-    } for a in anomalies[:20]]
+    } for a in anomalies]
     
     # Generate PDF
+    pdf_buffer = pdf_generator.generate_report(
+        stock_symbol=symbol,
+        analysis_summary=summary,
+        anomalies=anomalies_list
+    )
+    
+    # Audit log
+    audit = AuditLog(
+        user_id=user_id,
+        username=username,
+        action="EXPORT_REPORT",
+        stock_symbol=symbol,
+        details=f"Generated PDF report",
+        ip_address="127.0.0.1"
+    )
+    db.add(audit)
+    db.commit()
+    
+    return pdf_buffer
+
+def build_report_in_session(symbol: str, user_id: int, username: str) -> io.BytesIO:
+    """build_report on a session of its own (for worker threads)"""
+    db = SessionLocal()
     try:
-        pdf_buffer = pdf_generator.generate_report(
-            stock_symbol=symbol,
-            df=df_result,
-            analysis_summary=summary,
-            anomalies=anomalies_list
-        )
-        
-        # Audit log
-        audit = AuditLog(
-            user_id=current_user.id,
-            username=current_user.username,
-            action="EXPORT_REPORT",
-            stock_symbol=symbol,
-            details=f"Generated PDF report",
-            ip_address="127.0.0.1"
-        )
-        db.add(audit)
-        db.commit()
-        
-        return Response(
-            content=pdf_buffer.getvalue(),
-            media_type="application/pdf",
-            headers={
-                "Content-Disposition": f"attachment; filename=market_surveillance_{symbol}_{datetime.now().strftime('%Y%m%d')}.pdf"
-            }
+        return build_report(db, symbol, user_id, username)
+    finally:
+        db.close()
+
+def report_filename(symbol: str) -> str:
+    return f"market_surveillance_{symbol}_{datetime.now().strftime('%Y%m%d')}.pdf"
+
+@router.get("/generate/{symbol}")
+async def generate_report(
+    symbol: str,
+    background: bool = Query(False, description="Run as a background job and return its id"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user = Depends(require_role("analyst"))
+):
+    """Generate PDF report for a stock"""
+    
+    if background:
+        job = await job_queue.submit_async(db, "REPORT", current_user, symbol=symbol)
+        return job_accepted(job)
+    
+    try:
+        # Analysis and PDF rendering are CPU-bound; keep them off the event loop
+        pdf_buffer = await asyncio.to_thread(
+            build_report_in_session, symbol, current_user.id, current_user.username
         )
-        
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to generate PDF: {str(e)}")
+    
+    return Response(
+        content=pdf_buffer.getvalue(),
+        media_type="application/pdf",
+        headers={
+            "Content-Disposition": f"attachment; filename={report_filename(symbol)}"
+        }
+    )
 
 @router.get("/audit-logs")
 def get_audit_logs(
+    limit: int = Query(100, ge=1, le=1000, description="Number of entries per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
     db: Session = Depends(get_db),
     current_user = Depends(require_role("admin"))
 ):
-    """Get audit logs (admin only)"""
+    """Get audit logs (admin only), newest first, a page at a time"""
+    
+    # Keyset on the primary key: ids are assigned in insert order, and unlike
+    # the server-stamped timestamp (whole seconds on SQLite) they round-trip exactly
+    query = db.query(AuditLog)
+    if cursor:
+        try:
+            query = query.filter(keyset_before((AuditLog.id,), decode_cursor(cursor, 1)))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
     
-    logs = db.query(AuditLog).order_by(
-        AuditLog.timestamp.desc()
-    ).limit(100).all()
+    logs = query.order_by(AuditLog.id.desc()).limit(limit + 1).all()
     
-    return logs
\ No newline at end of file
+    return page(logs, limit, key=lambda log: (log.id,))
\ No newline at end of file
@@ -1,107 +1,160 @@
 # backend/app/api/stocks.py
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Request, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List, Optional
+from sqlalchemy import func, insert, or_
+from typing import List, Optional, Tuple
 import pandas as pd
+import numpy as np
 import io
-from datetime import datetime, date
+import os
+import json
+import shutil
+import asyncio
+import tempfile
+from datetime import datetime, date, timedelta
 import logging
 
-from ..database import get_db
+from ..database import get_db, get_async_db, SessionLocal
 from ..config import settings
 
 # DIRECT MODEL IMPORTS
-from ..models.stock import StockData, Anomaly
+from ..models.stock import StockData, IntradayBar, Anomaly
 from ..models.audit import AuditLog
+from ..models.analysis import AnalysisState
 
 # DIRECT SCHEMA IMPORTS
-from ..schemas.stock import StockData as StockDataSchema, Anomaly as AnomalySchema, AnalysisSummary
+from ..schemas.stock import StockData as StockDataSchema, Anomaly as AnomalySchema, AnalysisSummary, BatchAnalysisRequest, CrossSectionRequest, CalibrationRequest, PatternScanRequest
 
 # IMPORT AUTH DEPENDENCIES
 from .auth import get_current_active_user, require_role
+from .jobs import job_accepted
 
 # IMPORT ML ENGINE
 from ..ml import MarketSurveillanceEngine
+from ..ml.pipeline import AnalysisPipeline, DetectionStage, feature_store
+from ..ml.model_registry import model_registry
+from ..ml.cross_section import CrossSectionalEngine
+from ..ml.replay import ReplayEngine
+from ..ml.calibration import CalibrationSweep
+from ..ml.patterns import PatternScanner
+from ..ml.labels import PATTERN_TYPES
+from ..ml.similarity import episode_index_store
 from ..utils.csv_parser import CSVParser
+from ..utils.bulk_ingest import BulkIngestor
+from ..utils.job_queue import job_queue
+from ..utils.ohlcv_repository import OHLCVRepository, OHLCV_FIELDS, get_symbol_version, get_universe_version
+from ..utils.timeseries_cache import timeseries_cache
+from ..utils.batch_analysis import resolve_symbols, iter_batch_analysis
+from ..utils.resampling import RESOLUTIONS, INTRADAY_RESOLUTION, DAILY_RESOLUTION, ROLLUP_RESOLUTIONS, rollup_bars
+from ..utils.pagination import page, decode_cursor, keyset_before
 
 router = APIRouter(prefix="/stocks", tags=["Stocks"])
 surveillance_engine = MarketSurveillanceEngine()
+ingestor = BulkIngestor()
+intraday_ingestor = BulkIngestor(model=IntradayBar, key='timestamp')
 logger = logging.getLogger(__name__)
 
+# Largest threshold / weight grid a calibration request may sweep
+MAX_CALIBRATION_SETTINGS = 10000
+
+# Symbols loaded into one dates x symbols matrix by a pattern scan
+PATTERN_SCAN_BLOCK = 500
+
+RESOLUTION_PATTERN = f"^({'|'.join(RESOLUTIONS)})$"
+# /stocks/data also serves the calendar rollups, and 'auto' picks one to fit the page
+AUTO_RESOLUTION = "auto"
+DATA_RESOLUTION_PATTERN = f"^({'|'.join([*RESOLUTIONS, *ROLLUP_RESOLUTIONS, AUTO_RESOLUTION])})$"
+
+def upload_audit(result: dict, filename: str, user_id: int, username: str,
+                 ip_address: str) -> AuditLog:
+    """Audit entry for a completed upload"""
+    stored_count = result['inserted'] + result['updated']
+    return AuditLog(
+        user_id=user_id,
+        username=username,
+        action="UPLOAD",
+        stock_symbol=result['symbol'],
+        details=(
+            f"Uploaded {stored_count} records from {filename} "
+            f"({result['inserted']} inserted, {result['updated']} updated, {result['skipped']} skipped)"
+        ),
+        ip_address=ip_address
+    )
+
+def record_upload(db: Session, result: dict, filename: str,
+                  user_id: int, username: str, ip_address: str):
+    """Write the audit entry for a completed upload"""
+    db.add(upload_audit(result, filename, user_id, username, ip_address))
+    db.commit()
+
+def _ingest_upload(target: BulkIngestor, file, symbol: Optional[str], chunk_size: int) -> dict:
+    """Stream an uploaded CSV into the database on a session of its own (for worker threads)"""
+    db = SessionLocal()
+    try:
+        return target.ingest_csv(db, file, symbol, chunk_size=chunk_size)
+    finally:
+        db.close()
+
+def _save_upload(file: UploadFile) -> str:
+    """Spool an uploaded file to job storage so a worker process can read it"""
+    os.makedirs(settings.JOB_STORAGE_DIR, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=settings.JOB_STORAGE_DIR, suffix='.csv', delete=False) as tmp:
+        shutil.copyfileobj(file.file, tmp)
+    return tmp.name
+
 @router.post("/upload")
 async def upload_stock_data(
     request: Request,
     file: UploadFile = File(...),
     symbol: Optional[str] = Query(None, description="Stock symbol"),
-    db: Session = Depends(get_db),
+    chunk_size: Optional[int] = Query(None, gt=0, description="Rows per streamed chunk"),
+    background: bool = Query(False, description="Run as a background job and return its id"),
+    resolution: str = Query(DAILY_RESOLUTION, pattern=f"^({DAILY_RESOLUTION}|{INTRADAY_RESOLUTION})$",
+                            description="'1d' for daily bars, '1m' for intraday minute bars"),
+    db: AsyncSession = Depends(get_async_db),
     current_user = Depends(require_role("analyst"))
 ):
-    """Upload CSV file with stock data"""
+    """Upload CSV file with stock data (streamed in chunks)"""
     
     if not file.filename.endswith('.csv'):
         raise HTTPException(status_code=400, detail="Only CSV files allowed")
     
+    ip_address = request.client.host if request.client else "unknown"
+    chunk_size = chunk_size or settings.UPLOAD_CHUNK_SIZE
+    
+    if background:
+        path = await asyncio.to_thread(_save_upload, file)
+        job = await job_queue.submit_async(
+            db, "UPLOAD", current_user,
+            symbol=symbol.upper() if symbol else None,
+            path=path, filename=file.filename, chunk_size=chunk_size, ip_address=ip_address,
+            intraday=resolution == INTRADAY_RESOLUTION
+        )
+        return job_accepted(job)
+    
     try:
-        # Read CSV
-        content = await file.read()
-        df = pd.read_csv(io.StringIO(content.decode('utf-8-sig')))
-        
-        logger.info(f"Received file: {file.filename}, shape: {df.shape}")
+        # Stream the CSV in chunks straight into the database; parsing and the
+        # set-based upsert are CPU-bound, so they run on a worker thread
+        target = intraday_ingestor if resolution == INTRADAY_RESOLUTION else ingestor
+        result = await asyncio.to_thread(_ingest_upload, target, file.file, symbol, chunk_size)
+        stored_count = result['inserted'] + result['updated']
         
-        # Parse and validate
-        parser = CSVParser()
-        df = parser.validate_and_parse(df, symbol)
+        logger.info(f"Received file: {file.filename}, {result['total_rows']} rows in {len(result['chunks'])} chunks")
         
-        logger.info(f"Parsed data: {len(df)} records for {df['symbol'].iloc[0]}")
-        
-        # Store in database
-        stored_count = 0
-        for _, row in df.iterrows():
-            # Check if record already exists
-            existing = db.query(StockData).filter(
-                StockData.symbol == row['symbol'],
-                StockData.date == row['date']
-            ).first()
-            
-            if not existing:
-                stock_data = StockData(
-                    symbol=row['symbol'],
-                    date=row['date'],
-                    open=float(row['open']),
-                    high=float(row['high']),
-                    low=float(row['low']),
-                    close=float(row['close']),
-                    volume=int(row['volume'])
-                )
-                db.add(stock_data)
-                stored_count += 1
-        
-        if stored_count > 0:
-            db.commit()
-            logger.info(f"Stored {stored_count} new records")
-        
-        # Audit log
-        audit = AuditLog(
-            user_id=current_user.id,
-            username=current_user.username,
-            action="UPLOAD",
-            stock_symbol=df['symbol'].iloc[0],
-            details=f"Uploaded {stored_count} records from {file.filename}",
-            ip_address=request.client.host if request.client else "unknown"
-        )
-        db.add(audit)
-        db.commit()
+        db.add(upload_audit(result, file.filename, current_user.id, current_user.username, ip_address))
+        await db.commit()
         
         return {
             "message": f"Successfully uploaded {stored_count} records",
-            "symbol": df['symbol'].iloc[0],
-            "records": stored_count
+            "records": stored_count,
+            **result
         }
         
     except Exception as e:
         logger.error(f"Upload error: {str(e)}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/data/{symbol}")
@@ -109,139 +162,720 @@ def get_stock_data(
     symbol: str,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
-    limit: Optional[int] = Query(100, description="Number of records to return"),
+    limit: int = Query(100, ge=1, le=10000, description="Number of records per page"),
+    resolution: str = Query(DAILY_RESOLUTION, pattern=DATA_RESOLUTION_PATTERN,
+                            description="Bar size: 1m, 5m, 15m, 1h, 1d, 1w, 1mo or 1q; 'auto' picks the finest "
+                                        "of 1d / 1w / 1mo / 1q that covers the range in `limit` bars"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous (more recent) page"),
     db: Session = Depends(get_db),
     current_user = Depends(get_current_active_user)
 ):
-    """Get stock data for analysis"""
+    """
+    Get stock data for analysis, newest page first.
+    
+    Each page holds the `limit` bars preceding the cursor in ascending
+    order for charts; pass its next_cursor to step further back in time.
+    Weekly, monthly and quarterly bars come precomputed from ohlcv_rollups,
+    so a multi-year chart is a handful of rows whatever the history length.
+    """
+    
+    repo = OHLCVRepository(db)
+    try:
+        before = decode_cursor(cursor, 1)[0] if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    query = db.query(StockData).filter(StockData.symbol == symbol)
+    if resolution == AUTO_RESOLUTION or resolution == DAILY_RESOLUTION or resolution in ROLLUP_RESOLUTIONS:
+        try:
+            start = datetime.strptime(start_date, '%Y-%m-%d').date() if start_date else None
+            end = datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else None
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Dates must be YYYY-MM-DD")
+        if isinstance(before, datetime):
+            before = before.date()
+        if resolution == AUTO_RESOLUTION:
+            resolution = repo.pick_resolution(symbol, start, end, limit)
+        
+        # Keyset reads on the (symbol, date) / (symbol, resolution, date) indexes: page N costs what page 1 does
+        if resolution == DAILY_RESOLUTION:
+            rows = repo.fetch_page(symbol, limit + 1, before, start, end)
+        else:
+            rows = repo.fetch_rollup_page(symbol, resolution, limit + 1, before, start, end)
+        if rows or repo.has_daily(symbol):
+            result = page(rows, limit, key=lambda row: (row['date'],))
+            result['items'] = [{**row, 'symbol': symbol} for row in reversed(result['items'])]
+            return {**result, 'resolution': resolution}
     
-    if start_date:
-        query = query.filter(StockData.date >= datetime.strptime(start_date, '%Y-%m-%d').date())
-    if end_date:
-        query = query.filter(StockData.date <= datetime.strptime(end_date, '%Y-%m-%d').date())
+    # Intraday resolutions (or daily bars aggregated from intraday ones)
+    try:
+        start = datetime.fromisoformat(start_date) if start_date else None
+        end = datetime.fromisoformat(end_date) if end_date else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Dates must be ISO formatted")
+    if end is not None and len(end_date) == 10:
+        end = datetime.combine(end.date(), datetime.max.time())
+    if before is not None:
+        # Bucket starts are aligned, so every bar of an earlier bucket precedes `before`
+        if not isinstance(before, datetime):
+            before = datetime.combine(before, datetime.min.time())
+        end = min(end, before - timedelta(microseconds=1)) if end else before - timedelta(microseconds=1)
     
-    data = query.order_by(StockData.date.desc()).limit(limit).all()
+    if resolution in ROLLUP_RESOLUTIONS:
+        # Symbols with intraday bars only have no stored rollups; roll their daily aggregates up here
+        bars = rollup_bars(repo.fetch_bars(symbol, DAILY_RESOLUTION, start, end), resolution)
+    else:
+        bars = repo.fetch_bars(symbol, resolution, start, end)
+    # Empty page instead of 404
+    result = page(bars.tail(limit + 1).assign(symbol=symbol).to_dict('records')[::-1], limit,
+                  key=lambda row: (row['date'],))
+    result['items'].reverse()
+    return {**result, 'resolution': resolution}
+
+def _load_analysis_state(db: Session, symbol: str) -> Optional[AnalysisState]:
+    """Stored rolling state for a symbol, or None if missing or invalidated"""
+    state = db.query(AnalysisState).filter(AnalysisState.symbol == symbol).first()
+    if state is None:
+        return None
     
-    if not data:
-        # Return empty list instead of 404
-        return []
+    # BulkIngestor drops states its writes invalidate; this catches bars
+    # removed by other paths
+    analyzed = db.query(func.count(StockData.id)).filter(
+        StockData.symbol == symbol,
+        StockData.date <= state.last_date
+    ).scalar()
+    return state if analyzed == state.bars_analyzed else None
+
+def _delete_anomalies(db: Session, symbol: str):
+    """Remove a symbol's per-bar anomalies (pattern hits belong to the pattern scan)"""
+    db.query(Anomaly).filter(
+        Anomaly.stock_id.in_(
+            db.query(StockData.id).filter(StockData.symbol == symbol)
+        ),
+        or_(Anomaly.anomaly_type.is_(None), Anomaly.anomaly_type.notin_(PATTERN_TYPES))
+    ).delete(synchronize_session=False)
+
+def _store_anomalies(db: Session, anomalies_df: pd.DataFrame):
+    """Bulk-insert Anomaly rows for scored bars (frame must carry the stock_data id)"""
+    if anomalies_df.empty:
+        return
+    
+    def column(name: str) -> list:
+        if name not in anomalies_df:
+            return [0.0] * len(anomalies_df)
+        return anomalies_df[name].to_numpy(dtype=float).tolist()
     
-    # Return in ascending order for charts
-    return sorted(data, key=lambda x: x.date)
+    db.execute(insert(Anomaly), [
+        {
+            'stock_id': stock_id,
+            'date': day,
+            'anomaly_type': anomaly_type,
+            'risk_score': risk_score,
+            'risk_level': level,
+            'ml_score': ml_score,
+            'zscore_price': zscore_price,
+            'zscore_volume': zscore_volume
+        }
+        for stock_id, day, anomaly_type, risk_score, level, ml_score, zscore_price, zscore_volume in zip(
+            anomalies_df['id'].to_numpy(dtype=np.int64).tolist(),
+            anomalies_df['date'].tolist(),
+            anomalies_df['anomaly_type'].astype(str).tolist(),
+            column('risk_score'),
+            anomalies_df['risk_level'].astype(str).tolist(),
+            column('ml_score_if'),
+            column('price_zscore'),
+            column('volume_zscore')
+        )
+    ])
+
+def _summarize(symbol: str, df_result: pd.DataFrame, anomalies_found: int) -> dict:
+    empty = df_result.empty
+    return {
+        'symbol': symbol,
+        'total_records': len(df_result),
+        'anomalies_found': anomalies_found,
+        'high_risk': int(len(df_result[df_result['risk_level'] == 'High'])) if not empty else 0,
+        'medium_risk': int(len(df_result[df_result['risk_level'] == 'Medium'])) if not empty else 0,
+        'low_risk': int(len(df_result[df_result['risk_level'] == 'Low'])) if not empty else 0,
+        'max_risk_score': float(df_result['risk_score'].max()) if not empty else 0.0,
+        'avg_risk_score': float(df_result['risk_score'].mean()) if not empty else 0.0
+    }
+
+def _analyze_intraday(db: Session, symbol: str, resolution: str) -> Tuple[pd.DataFrame, int]:
+    """Score resampled intraday bars; anomalies are not stored (they have no stock_data row)"""
+    df = OHLCVRepository(db).fetch_bars(symbol, resolution)
+    if df.empty:
+        raise LookupError("No intraday data found for this symbol")
+    df_result = surveillance_engine.analyze(df)
+    return df_result, int(df_result['is_anomaly'].sum())
+
+def run_analysis(db: Session, symbol: str, user_id: int, username: str,
+                 incremental: bool = False, resolution: str = DAILY_RESOLUTION) -> dict:
+    """
+    Analyze a symbol, store its anomalies and audit the run
+    
+    A full run rescores the whole history and replaces all anomalies. An
+    incremental run resumes from the persisted rolling state, scores only bars
+    appended since the last run and adds only their anomalies; it falls back
+    to a full run when no valid state exists. Intraday resolutions score
+    bars resampled from intraday_bars and only report the results.
+    """
+    
+    if resolution != DAILY_RESOLUTION:
+        df_result, anomalies_found = _analyze_intraday(db, symbol, resolution)
+        summary = _summarize(symbol, df_result, anomalies_found)
+        db.add(AuditLog(
+            user_id=user_id,
+            username=username,
+            action="ANALYSIS",
+            stock_symbol=symbol,
+            risk_score=summary['max_risk_score'],
+            details=f"Analyzed {symbol} ({resolution} bars) - Found {anomalies_found} anomalies",
+            ip_address="127.0.0.1"
+        ))
+        db.commit()
+        summary['mode'] = "full"
+        summary['resolution'] = resolution
+        return summary
+    
+    repo = OHLCVRepository(db)
+    state = _load_analysis_state(db, symbol) if incremental else None
+    
+    if state is not None:
+        # Only bars after the last analyzed date
+        df = repo.fetch_frame(
+            symbol, ('id',) + OHLCV_FIELDS,
+            start=state.last_date + timedelta(days=1)
+        )
+        if df.empty:
+            df_result = pd.DataFrame(columns=['date', 'risk_level', 'risk_score', 'is_anomaly'])
+            new_state = None
+        else:
+            df_result, new_state = surveillance_engine.analyze_incremental(df, json.loads(state.state))
+    else:
+        # Get stock data (cached columnar fetch, no ORM objects)
+        df = repo.fetch_history(symbol)[['id', *OHLCV_FIELDS]]
+        
+        if df.empty:
+            raise LookupError("No data found for this symbol")
+        
+        # Run AI analysis
+        df_result = surveillance_engine.analyze(df)
+        new_state = surveillance_engine.build_state(df)
+        
+        # Delete old anomalies for this symbol
+        _delete_anomalies(db, symbol)
+    
+    # Store new anomalies
+    anomalies_df = df_result[df_result['is_anomaly'] == True]
+    _store_anomalies(db, anomalies_df)
+    
+    # Persist rolling state so the next incremental run resumes from here
+    if new_state is not None:
+        db.merge(AnalysisState(
+            symbol=symbol,
+            last_date=df_result['date'].iloc[-1],
+            bars_analyzed=new_state['count'],
+            state=json.dumps(new_state)
+        ))
+    
+    db.commit()
+    
+    mode = "incremental" if state is not None else "full"
+    summary = _summarize(symbol, df_result, len(anomalies_df))
+    
+    # Audit log
+    audit = AuditLog(
+        user_id=user_id,
+        username=username,
+        action="ANALYSIS",
+        stock_symbol=symbol,
+        risk_score=summary['max_risk_score'],
+        details=f"Analyzed {symbol} ({mode}) - Found {len(anomalies_df)} anomalies",
+        ip_address="127.0.0.1"
+    )
+    db.add(audit)
+    db.commit()
+    
+    # Return summary
+    summary['mode'] = mode
+    summary['resolution'] = resolution
+    return summary
+
+def run_pattern_scan(db: Session, symbols, user_id: Optional[int], username: str,
+                     start_date: Optional[date] = None, end_date: Optional[date] = None,
+                     persist: bool = True, limit: int = 100) -> dict:
+    """
+    Scan the universe (or `symbols`) for multi-bar manipulation patterns
+    
+    Symbols are loaded PATTERN_SCAN_BLOCK at a time as dates x symbols
+    matrices, with enough history before start_date to fill the scanner's
+    windows. When persisting, each block's earlier pattern hits in the range
+    are replaced by the new ones, bulk-inserted as Anomaly rows on the
+    trigger bar.
+    """
+    
+    scanner = PatternScanner()
+    repo = OHLCVRepository(db)
+    symbols = resolve_symbols(db, symbols)
+    # Calendar days covering the scanner's lookback in trading bars
+    load_start = start_date - timedelta(days=2 * scanner.lookback) if start_date else None
+    
+    hits, scanned_dates = [], 0
+    for offset in range(0, len(symbols), PATTERN_SCAN_BLOCK):
+        block = symbols[offset:offset + PATTERN_SCAN_BLOCK]
+        dates, symbol_index, m = repo.fetch_matrix(
+            ('id', 'open', 'high', 'low', 'close', 'volume'), block, load_start, end_date
+        )
+        if len(dates) == 0:
+            continue
+        scanned_dates = max(scanned_dates, len(dates))
+        
+        found = scanner.hits(dates, symbol_index, m['id'], scanner.scan(
+            m['open'], m['high'], m['low'], m['close'], m['volume']
+        ))
+        if start_date:
+            found = found[found['date'] >= np.datetime64(start_date)]
+        hits.append(found)
+        
+        if persist:
+            query = db.query(Anomaly).filter(
+                Anomaly.anomaly_type.in_(PATTERN_TYPES),
+                Anomaly.stock_id.in_(db.query(StockData.id).filter(StockData.symbol.in_(block)))
+            )
+            if start_date:
+                query = query.filter(Anomaly.date >= start_date)
+            if end_date:
+                query = query.filter(Anomaly.date <= end_date)
+            query.delete(synchronize_session=False)
+            
+            if len(found):
+                records = found.astype({'anomaly_type': str, 'risk_level': str}).replace({np.nan: None})
+                db.execute(insert(Anomaly), [
+                    {
+                        'stock_id': int(row['id']),
+                        'date': pd.Timestamp(row['date']).date(),
+                        'anomaly_type': row['anomaly_type'],
+                        'risk_score': float(row['risk_score']),
+                        'risk_level': row['risk_level'],
+                        'zscore_price': row['price_zscore']
+                    }
+                    for row in records.to_dict('records')
+                ])
+            db.commit()
+    
+    found = pd.concat(hits, ignore_index=True) if hits else pd.DataFrame(columns=PatternScanner.HIT_COLUMNS)
+    found = found.sort_values(['risk_score', 'date'], ascending=[False, False], kind='stable', ignore_index=True)
+    counts = found['anomaly_type'].value_counts()
+    
+    db.add(AuditLog(
+        user_id=user_id,
+        username=username,
+        action="PATTERN_SCAN",
+        risk_score=float(found['risk_score'].max()) if len(found) else 0.0,
+        details=f"Pattern scan of {len(symbols)} symbols - Found {len(found)} hits"
+                + ("" if persist else " (not stored)"),
+        ip_address="127.0.0.1"
+    ))
+    db.commit()
+    
+    top = found.head(limit).astype({'date': str, 'risk_level': str, 'anomaly_type': str})
+    return {
+        'symbols': len(symbols),
+        'dates': scanned_dates,
+        'hits_found': len(found),
+        'stored': persist,
+        'patterns': {pattern: int(counts.get(pattern, 0)) for pattern in PATTERN_TYPES},
+        'high_risk': int((found['risk_level'] == 'High').sum()),
+        'hits': top.replace({np.nan: None}).to_dict('records')
+    }
 
 @router.post("/analyze/{symbol}")
 def analyze_stock(
     symbol: str,
+    incremental: bool = Query(False, description="Only score bars added since the last run"),
+    background: bool = Query(False, description="Run as a background job and return its id"),
+    resolution: str = Query(DAILY_RESOLUTION, pattern=RESOLUTION_PATTERN, description="Bar size: 1m, 5m, 15m, 1h or 1d"),
     db: Session = Depends(get_db),
     current_user = Depends(require_role("analyst"))
 ):
     """Run AI analysis on stock data"""
     
-    # Get stock data
-    stock_data = db.query(StockData).filter(
-        StockData.symbol == symbol
-    ).order_by(StockData.date).all()
+    if background:
+        job = job_queue.submit(
+            db, "ANALYSIS", current_user, symbol=symbol, incremental=incremental, resolution=resolution
+        )
+        return job_accepted(job)
     
-    if not stock_data:
-        raise HTTPException(status_code=404, detail="No data found for this symbol")
+    try:
+        return run_analysis(db, symbol, current_user.id, current_user.username, incremental, resolution)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error(f"Analysis error: {str(e)}")
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+
+@router.post("/analyze-batch")
+def analyze_batch(
+    request: BatchAnalysisRequest,
+    db: Session = Depends(get_db),
+    current_user = Depends(require_role("analyst"))
+):
+    """Analyze many symbols (or "all") on a process pool, streaming NDJSON results"""
+    
+    symbols = resolve_symbols(db, request.symbols)
+    if not symbols:
+        raise HTTPException(status_code=404, detail="No symbols to analyze")
+    
+    results = iter_batch_analysis(
+        symbols, current_user.id, current_user.username,
+        incremental=request.incremental, workers=request.workers
+    )
+    return StreamingResponse(
+        (json.dumps(result, default=str) + "\n" for result in results),
+        media_type="application/x-ndjson"
+    )
+
+@router.post("/cross-section")
+def analyze_cross_section(
+    request: CrossSectionRequest,
+    db: Session = Depends(get_db),
+    current_user = Depends(require_role("analyst"))
+):
+    """Flag idiosyncratic moves across the whole universe, net of market and peer-group moves"""
+    
+    symbols = None if request.symbols == "all" else request.symbols
     
     try:
-        # Convert to DataFrame
-        df = pd.DataFrame([{
-            'date': s.date,
-            'open': s.open,
-            'high': s.high,
-            'low': s.low,
-            'close': s.close,
-            'volume': s.volume
-        } for s in stock_data])
+        start = datetime.now()
+        dates, symbol_index, matrices = OHLCVRepository(db).fetch_matrix(
+            ('close', 'volume'), symbols, request.start_date, request.end_date
+        )
+        if len(dates) < 2:
+            raise HTTPException(status_code=404, detail="Not enough data for a cross-sectional analysis")
+        loaded = datetime.now()
         
-        # Run AI analysis
-        df_result = surveillance_engine.analyze(df)
+        engine = CrossSectionalEngine(request.price_threshold, request.volume_threshold)
+        result = engine.analyze(matrices['close'], matrices['volume'], symbol_index, request.peer_groups)
+        anomalies = engine.anomalies(dates, symbol_index, result)
+        finished = datetime.now()
         
-        # Delete old anomalies for this symbol
-        db.query(Anomaly).filter(
-            Anomaly.stock_id.in_(
-                db.query(StockData.id).filter(StockData.symbol == symbol)
-            )
-        ).delete(synchronize_session=False)
+        top = anomalies.head(request.limit).astype({'date': str, 'risk_level': str, 'anomaly_type': str})
+        return {
+            'dates': len(dates),
+            'symbols': len(symbol_index),
+            'anomalies_found': len(anomalies),
+            'high_risk': int((anomalies['risk_level'] == 'High').sum()),
+            'load_ms': round((loaded - start).total_seconds() * 1000, 1),
+            'analyze_ms': round((finished - loaded).total_seconds() * 1000, 1),
+            'anomalies': top.replace({np.nan: None}).to_dict('records')
+        }
         
-        # Store new anomalies
-        anomalies_df = df_result[df_result['is_anomaly'] == True]
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Cross-sectional analysis error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Cross-sectional analysis failed: {str(e)}")
+
+@router.post("/calibrate")
+def calibrate_thresholds(
+    request: CalibrationRequest,
+    db: Session = Depends(get_db),
+    current_user = Depends(require_role("analyst"))
+):
+    """Evaluate a grid of alert thresholds / risk weights in one pass over the stored history"""
+    
+    sweep = CalibrationSweep(request.model)
+    try:
+        grid = sweep.grid(
+            request.price_thresholds, request.volume_thresholds, request.volume_spike_thresholds,
+            request.weights, request.alert_scores
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not grid or len(grid) > MAX_CALIBRATION_SETTINGS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"The grid must have between 1 and {MAX_CALIBRATION_SETTINGS} settings (got {len(grid)})"
+        )
+    
+    try:
+        start = datetime.now()
+        repo = OHLCVRepository(db)
+        symbols = resolve_symbols(db, request.symbols)
+        sweep.prepare((symbol, repo.fetch_history(symbol)[list(OHLCV_FIELDS)]) for symbol in symbols)
+        prepared = datetime.now()
         
-        for _, row in anomalies_df.iterrows():
-            stock = db.query(StockData).filter(
-                StockData.symbol == symbol,
-                StockData.date == row['date']
-            ).first()
-            
-            if stock:
-                anomaly = Anomaly(
-                    stock_id=stock.id,
-                    date=row['date'],
-                    anomaly_type=row['anomaly_type'],
-                    risk_score=float(row['risk_score']),
-                    risk_level=row['risk_level'],
-                    ml_score=float(row.get('ml_score_if', 0)),
-                    zscore_price=float(row.get('price_zscore', 0)),
-                    zscore_volume=float(row.get('volume_zscore', 0))
-                )
-                db.add(anomaly)
+        results, summary = sweep.evaluate(
+            grid, [(event.symbol, event.date) for event in request.events], request.tolerance
+        )
+        finished = datetime.now()
         
-        db.commit()
+        if 'f1' in results:
+            results = results.sort_values('f1', ascending=False, kind='stable')
+        return {
+            **summary,
+            'prepare_ms': round((prepared - start).total_seconds() * 1000, 1),
+            'evaluate_ms': round((finished - prepared).total_seconds() * 1000, 1),
+            'results': results.head(request.limit).replace({np.nan: None}).to_dict('records')
+        }
         
-        # Audit log
-        audit = AuditLog(
-            user_id=current_user.id,
-            username=current_user.username,
-            action="ANALYSIS",
-            stock_symbol=symbol,
-            risk_score=float(df_result['risk_score'].max()),
-            details=f"Analyzed {symbol} - Found {len(anomalies_df)} anomalies",
-            ip_address="127.0.0.1"
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Calibration error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Calibration failed: {str(e)}")
+
+@router.post("/patterns/scan")
+def scan_patterns(
+    request: PatternScanRequest,
+    db: Session = Depends(get_db),
+    current_user = Depends(require_role("analyst"))
+):
+    """Scan for pump-and-dump, ramping, marking-the-close and compression-breakout patterns"""
+    
+    if request.background:
+        job = job_queue.submit(
+            db, "PATTERN_SCAN", current_user,
+            symbols=request.symbols,
+            start_date=request.start_date.isoformat() if request.start_date else None,
+            end_date=request.end_date.isoformat() if request.end_date else None,
+            persist=request.persist, limit=request.limit
         )
-        db.add(audit)
-        db.commit()
+        return job_accepted(job)
+    
+    try:
+        start = datetime.now()
+        summary = run_pattern_scan(
+            db, request.symbols, current_user.id, current_user.username,
+            request.start_date, request.end_date, request.persist, request.limit
+        )
+        summary['scan_ms'] = round((datetime.now() - start).total_seconds() * 1000, 1)
+        return summary
         
-        # Return summary
-        summary = {
+    except Exception as e:
+        logger.error(f"Pattern scan error: {str(e)}")
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Pattern scan failed: {str(e)}")
+
+def _pipeline_frame(repo: OHLCVRepository, symbol: str, resolution: str) -> pd.DataFrame:
+    if resolution == DAILY_RESOLUTION:
+        return repo.fetch_history(symbol)[['id', *OHLCV_FIELDS]]
+    return repo.fetch_bars(symbol, resolution)
+
+def _peer_features(db: Session, pipeline: AnalysisPipeline, symbols: List[str], resolution: str) -> pd.DataFrame:
+    """Stacked feature frames of a peer group's symbols, the training set of the group's shared model"""
+    repo = OHLCVRepository(db)
+    frames = []
+    for peer in symbols:
+        df = _pipeline_frame(repo, peer, resolution)
+        if df.empty:
+            continue
+        series_key = peer if resolution == DAILY_RESOLUTION else f"{peer}@{resolution}"
+        features, _ = pipeline.features(df, series_key, get_symbol_version(db, peer))
+        frames.append(features)
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+@router.post("/pipeline/{symbol}")
+def run_pipeline(
+    symbol: str,
+    contamination: float = Query(settings.ANOMALY_CONTAMINATION, gt=0, le=0.5, description="Expected anomaly share for the ML detectors"),
+    price_threshold: float = Query(3.0, gt=0, description="Price z-score threshold"),
+    volume_threshold: float = Query(2.0, gt=0, description="Volume z-score threshold"),
+    persist: bool = Query(False, description="Replace the stored anomalies with this run's"),
+    model_key: Optional[str] = Query(None, description="Registry model to score with (defaults to the symbol; may name a peer group)"),
+    retrain: bool = Query(False, description="Retrain the registry model before scoring"),
+    resolution: str = Query(DAILY_RESOLUTION, pattern=RESOLUTION_PATTERN, description="Bar size: 1m, 5m, 15m, 1h or 1d"),
+    db: Session = Depends(get_db),
+    current_user = Depends(require_role("analyst"))
+):
+    """Run the staged feature -> detection -> risk scoring pipeline"""
+    
+    daily = resolution == DAILY_RESOLUTION
+    if persist and not daily:
+        raise HTTPException(status_code=400, detail="Only daily anomalies can be persisted")
+    
+    version = get_symbol_version(db, symbol)
+    repo = OHLCVRepository(db)
+    df = _pipeline_frame(repo, symbol, resolution)
+    # Intraday features and models are stored apart from the daily ones
+    series_key = symbol if daily else f"{symbol}@{resolution}"
+    registry_key = series_key
+    if model_key:
+        registry_key = model_key if daily else f"{model_key}@{resolution}"
+    
+    if df.empty:
+        raise HTTPException(status_code=404, detail="No data found for this symbol")
+    
+    try:
+        # A peer group's model is shared, so it is (re)trained on the whole group
+        peers = settings.PEER_GROUPS.get(model_key) if model_key else None
+        pooled_history = (lambda: _peer_features(db, pipeline, peers, resolution)) if peers else None
+        pipeline = AnalysisPipeline(
+            detection_stage=DetectionStage(
+                contamination, price_threshold, volume_threshold,
+                registry=model_registry, model_key=registry_key, retrain=retrain,
+                pooled_history=pooled_history
+            ),
+            store=feature_store
+        )
+        df_result, report = pipeline.run(df, series_key, version)
+        anomalies_df = df_result[df_result['is_anomaly'] == True]
+        
+        if persist:
+            _delete_anomalies(db, symbol)
+            _store_anomalies(db, anomalies_df)
+            db.commit()
+        
+        summary = pipeline.scoring_stage.scorer.get_risk_summary(df_result)
+        
+        return {
             'symbol': symbol,
-            'total_records': len(df_result),
+            'resolution': resolution,
+            'data_version': version,
             'anomalies_found': len(anomalies_df),
-            'high_risk': int(len(df_result[df_result['risk_level'] == 'High'])),
-            'medium_risk': int(len(df_result[df_result['risk_level'] == 'Medium'])),
-            'low_risk': int(len(df_result[df_result['risk_level'] == 'Low'])),
-            'max_risk_score': float(df_result['risk_score'].max()),
-            'avg_risk_score': float(df_result['risk_score'].mean())
+            'persisted': persist,
+            'summary': {key: (value.item() if hasattr(value, 'item') else value) for key, value in summary.items()},
+            **report
         }
         
-        return summary
-        
     except Exception as e:
-        logger.error(f"Analysis error: {str(e)}")
+        logger.error(f"Pipeline error: {str(e)}")
         db.rollback()
-        raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Pipeline failed: {str(e)}")
+
+@router.get("/replay/{symbol}")
+def replay_history(
+    symbol: str,
+    start_date: Optional[date] = Query(None, description="First date reported (the replay always starts at the first bar)"),
+    end_date: Optional[date] = Query(None, description="Last date reported"),
+    warmup: int = Query(20, ge=0, description="Bars before alerts are raised"),
+    max_lag: int = Query(5, ge=0, description="Bars after a hindsight anomaly an alert still counts as detecting it"),
+    series: bool = Query(True, description="Include the per-bar point-in-time series"),
+    db: Session = Depends(get_db),
+    current_user = Depends(require_role("analyst"))
+):
+    """Replay a symbol's history point-in-time: what would have been flagged each day with the data available then"""
+    
+    df = OHLCVRepository(db).fetch_history(symbol)[list(OHLCV_FIELDS)]
+    if df.empty:
+        raise HTTPException(status_code=404, detail="No data found for this symbol")
+    
+    try:
+        replayed = ReplayEngine(surveillance_engine, warmup=warmup).replay(df)
+        if start_date is not None:
+            replayed = replayed[replayed['date'] >= start_date]
+        if end_date is not None:
+            replayed = replayed[replayed['date'] <= end_date]
+        
+        result = {
+            'symbol': symbol,
+            'metrics': ReplayEngine.alert_metrics(replayed, max_lag)
+        }
+        if series:
+            points = replayed[[
+                'date', 'close', 'volume', 'price_zscore', 'volume_zscore', 'risk_score',
+                'risk_level', 'anomaly_type', 'alert', 'hindsight_anomaly'
+            ]].astype({'date': str, 'risk_level': str, 'anomaly_type': str, 'price_zscore': float,
+                       'volume_zscore': float, 'risk_score': float})
+            result['series'] = points.replace({np.nan: None}).to_dict('records')
+        return result
+        
+    except Exception as e:
+        logger.error(f"Replay error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Replay failed: {str(e)}")
+
+def load_episode_index(db: Session):
+    """The similarity index for the current data, rebuilt from the whole universe if stale"""
+    def loader():
+        dates, symbol_index, matrices = OHLCVRepository(db).fetch_matrix(('close', 'volume'))
+        if len(dates) == 0:
+            raise LookupError("No stock data to search")
+        return dates, symbol_index, matrices['close'], matrices['volume']
+    return episode_index_store.get(get_universe_version(db), loader)
+
+@router.get("/similar/{symbol}")
+def find_similar_episodes(
+    symbol: str,
+    start: date = Query(..., description="First date of the episode"),
+    end: date = Query(..., description="Last date of the episode"),
+    k: int = Query(10, ge=1, le=100, description="Number of episodes to return"),
+    past_only: bool = Query(False, description="Only episodes that ended before this one started"),
+    db: Session = Depends(get_db),
+    current_user = Depends(require_role("analyst"))
+):
+    """Find where else in the market a return / volume shape like this episode occurred"""
+    
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    
+    try:
+        started = datetime.now()
+        index = load_episode_index(db)
+        loaded = datetime.now()
+        query, matches = index.query(symbol.upper(), start, end, k, past_only)
+        finished = datetime.now()
+        
+        matches = matches.astype({'start_date': str, 'end_date': str})
+        return {
+            'query': query,
+            'index': {'dates': index.shape[0], 'symbols': index.shape[1]},
+            'index_ms': round((loaded - started).total_seconds() * 1000, 1),
+            'search_ms': round((finished - loaded).total_seconds() * 1000, 1),
+            'matches': matches.replace({np.nan: None}).to_dict('records')
+        }
+        
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Similarity search error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Similarity search failed: {str(e)}")
+
+@router.get("/models/{model_key}")
+def get_model_versions(
+    model_key: str,
+    current_user = Depends(require_role("analyst"))
+):
+    """List the registered detector versions for a symbol or peer group"""
+    
+    versions = model_registry.versions(model_key)
+    if not versions:
+        raise HTTPException(status_code=404, detail="No model registered for this key")
+    
+    return {'key': model_key, 'latest': versions[-1]['version'], 'versions': versions}
 
 @router.get("/anomalies/{symbol}")
 def get_anomalies(
     symbol: str,
-    limit: Optional[int] = Query(50, description="Number of anomalies to return"),
+    limit: int = Query(50, ge=1, le=1000, description="Number of anomalies per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
     db: Session = Depends(get_db),
     current_user = Depends(get_current_active_user)
 ):
-    """Get detected anomalies for a stock"""
+    """Get detected anomalies for a stock, newest first, a page at a time"""
     
-    anomalies = db.query(Anomaly).join(
+    # Walks the (symbol, date) index backwards and each bar's anomalies by
+    # (stock_id, id); the cursor resumes after the last (date, id) served
+    query = db.query(Anomaly).join(
         StockData
     ).filter(
         StockData.symbol == symbol
-    ).order_by(
-        Anomaly.date.desc()
-    ).limit(limit).all()
+    )
+    if cursor:
+        try:
+            query = query.filter(keyset_before((StockData.date, Anomaly.id), decode_cursor(cursor, 2)))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    anomalies = query.order_by(
+        StockData.date.desc(), Anomaly.id.desc()
+    ).limit(limit + 1).all()
     
-    return anomalies
+    return page(anomalies, limit, key=lambda anomaly: (anomaly.date, anomaly.id))
 
 @router.get("/symbols")
 def get_symbols(
@@ -265,11 +899,11 @@ def get_stock_stats(
     db: Session = Depends(get_db),
     current_user = Depends(get_current_active_user)
 ):
-    """Get statistical summary for a stock"""
+    """Get statistical summary for a stock (aggregated in the database)"""
     
-    data = db.query(StockData).filter(StockData.symbol == symbol).all()
+    stats = OHLCVRepository(db).fetch_stats(symbol)
     
-    if not data:
+    if not stats['count']:
         return {
             'symbol': symbol,
             'avg_price': 0,
@@ -278,19 +912,20 @@ def get_stock_stats(
             'volume_change': 0
         }
     
-    df = pd.DataFrame([{
-        'close': d.close,
-        'volume': d.volume,
-        'date': d.date
-    } for d in data])
-    
     return {
         'symbol': symbol,
-        'avg_price': float(df['close'].mean()),
-        'avg_volume': float(df['volume'].mean()),
-        'price_change': float(df['close'].pct_change().mean() * 100),
-        'volume_change': float(df['volume'].pct_change().mean() * 100),
-        'max_price': float(df['close'].max()),
-        'min_price': float(df['close'].min()),
-        'total_volume': int(df['volume'].sum())
-    }
\ No newline at end of file
+        'avg_price': float(stats['avg_price']),
+        'avg_volume': float(stats['avg_volume']),
+        'price_change': float(stats['price_change']) if stats['price_change'] is not None else None,
+        'volume_change': float(stats['volume_change']) if stats['volume_change'] is not None else None,
+        'max_price': float(stats['max_price']),
+        'min_price': float(stats['min_price']),
+        'total_volume': int(stats['total_volume'])
+    }
+
+@router.get("/cache/stats")
+def get_cache_stats(
+    current_user = Depends(get_current_active_user)
+):
+    """Hit/miss/eviction counters of the per-symbol time-series cache"""
+    return timeseries_cache.stats()
@@ -1,18 +1,61 @@
 # backend/app/api/websocket.py
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query, status
+from fastapi.concurrency import run_in_threadpool
 import json
+import math
+import time
 import asyncio
 from datetime import datetime
-from typing import List
+from typing import List, Optional, Tuple
 
-from ..database import get_db
-from ..models.stock import StockData, Anomaly
+from ..database import SessionLocal, AsyncSessionLocal
+from ..config import settings
 from ..ml import MarketSurveillanceEngine
+from ..ml.streaming import StreamingDetector, StreamDetectorCache
+from ..utils.ohlcv_repository import OHLCVRepository, get_symbol_version
+from .auth import user_from_token
 
 router = APIRouter(prefix="/ws", tags=["WebSocket"])
 surveillance_engine = MarketSurveillanceEngine()
 
+# Shared per-symbol scoring state, primed from the stored history and
+# re-primed when the symbol's data version changes
+stream_detectors = StreamDetectorCache(settings.STREAM_DETECTOR_CACHE_SIZE)
+
+# How often an open connection checks for newly uploaded history
+VERSION_CHECK_SECONDS = 30
+
+def get_symbol_stream_version(symbol: str) -> int:
+    db = SessionLocal()
+    try:
+        return get_symbol_version(db, symbol)
+    finally:
+        db.close()
+
+def get_stream_detector(symbol: str) -> Tuple[int, Optional[StreamingDetector]]:
+    """
+    (data version, private copy of the symbol's shared detector); no
+    detector for symbols that have never been written
+    """
+    db = SessionLocal()
+    try:
+        version = get_symbol_version(db, symbol)
+        if not version:
+            return 0, None
+        shared = stream_detectors.get(symbol, version, lambda: StreamingDetector.from_history(
+            OHLCVRepository(db).fetch_frame(symbol, ('close', 'volume')), surveillance_engine
+        ))
+    finally:
+        db.close()
+    return version, shared.copy()
+
+def _json_safe(scores: dict) -> dict:
+    """NaN / inf are not valid JSON; send them as null"""
+    return {
+        key: None if isinstance(value, float) and not math.isfinite(value) else value
+        for key, value in scores.items()
+    }
+
 class ConnectionManager:
     def __init__(self):
         self.active_connections: List[WebSocket] = []
@@ -37,16 +80,68 @@ class ConnectionManager:
 manager = ConnectionManager()
 
 @router.websocket("/realtime/{symbol}")
-async def websocket_endpoint(websocket: WebSocket, symbol: str):
+async def websocket_endpoint(websocket: WebSocket, symbol: str, token: Optional[str] = Query(None)):
+    """
+    Heartbeats every 30s; each bar sent as JSON ({"date", "close", "volume", ...})
+    is scored online and answered with a SCORE message.
+    
+    Needs an access token (?token=). Bars a client sends only advance that
+    connection's copy of the symbol's detector; uploads re-prime it.
+    """
+    async with AsyncSessionLocal() as db:
+        user = await user_from_token(db, token) if token else None
+    if user is None or not user.is_active:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    
     await manager.connect(websocket)
+    detector = None
+    version = 0
+    checked_at = 0.0
     try:
+        heartbeat = True
         while True:
-            # Send heartbeat
-            await websocket.send_text(json.dumps({
-                "type": "HEARTBEAT",
-                "timestamp": datetime.now().isoformat()
-            }))
-            await asyncio.sleep(30)
+            if heartbeat:
+                await websocket.send_text(json.dumps({
+                    "type": "HEARTBEAT",
+                    "timestamp": datetime.now().isoformat()
+                }))
+            
+            try:
+                message = await asyncio.wait_for(websocket.receive_text(), timeout=30)
+            except asyncio.TimeoutError:
+                heartbeat = True
+                continue
+            heartbeat = False
+            
+            try:
+                bar = json.loads(message)
+                close, volume = float(bar['close']), float(bar['volume'])
+                # NaN / inf (valid in Python's JSON) or negatives would corrupt the running stats for good
+                if not (math.isfinite(close) and math.isfinite(volume)) or close < 0 or volume < 0:
+                    raise ValueError("non-finite or negative bar")
+            except (ValueError, KeyError, TypeError):
+                await websocket.send_text(json.dumps({
+                    "type": "ERROR",
+                    "detail": "Expected a JSON bar with finite, non-negative close and volume"
+                }))
+                continue
+            
+            if detector is None or time.monotonic() - checked_at > VERSION_CHECK_SECONDS:
+                checked_at = time.monotonic()
+                if detector is None or await run_in_threadpool(get_symbol_stream_version, symbol) != version:
+                    version, detector = await run_in_threadpool(get_stream_detector, symbol)
+            if detector is None:
+                await websocket.send_text(json.dumps({
+                    "type": "ERROR",
+                    "detail": f"No data for {symbol}"
+                }))
+                continue
+            
+            scores = detector.update(bar)
+            await websocket.send_text(json.dumps(
+                {"type": "SCORE", "symbol": symbol, **_json_safe(scores)}, default=str
+            ))
             
     except WebSocketDisconnect:
-        manager.disconnect(websocket)
\ No newline at end of file
+        manager.disconnect(websocket)
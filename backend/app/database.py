@@ -1,19 +1,42 @@
 # backend/app/database.py
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from .config import settings
 
+# Async drivers for the sync URLs' backends
+ASYNC_DRIVERS = {
+    'postgresql': 'postgresql+asyncpg',
+    'sqlite': 'sqlite+aiosqlite'
+}
+
+def async_database_url(url: str) -> str:
+    """The same database through its async driver (asyncpg / aiosqlite)"""
+    scheme, _, rest = url.partition('://')
+    backend = scheme.split('+', 1)[0]
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for '{backend}' databases")
+    return f"{ASYNC_DRIVERS[backend]}://{rest}"
+
 # Create engine
 engine = create_engine(
     settings.DATABASE_URL,
     pool_pre_ping=True,
-    echo=True  # Set to False in production
+    echo=settings.DB_ECHO
 )
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine / sessions for async endpoints, so DB round trips never block the event loop
+async_engine = create_async_engine(
+    settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL),
+    pool_pre_ping=True
+)
+# Objects stay readable after commit (no lazy refresh outside the session's greenlet)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 # Create Base class
 Base = declarative_base()
 
@@ -24,8 +47,46 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def _ensure_stock_data_key(conn):
+    """
+    Give a stock_data table created before the (symbol, date) key its unique
+    index, which the ingest upsert's ON CONFLICT needs. Duplicate bars keep
+    their newest row; the others' anomalies and their symbols' saved
+    analysis states go with them.
+    """
+    inspector = inspect(conn)
+    keys = {c['name'] for c in inspector.get_unique_constraints('stock_data')}
+    keys |= {i['name'] for i in inspector.get_indexes('stock_data') if i.get('unique')}
+    if 'uq_stock_data_symbol_date' in keys:
+        return
+    stale = 'SELECT id FROM stock_data WHERE id NOT IN (SELECT MAX(id) FROM stock_data GROUP BY symbol, date)'
+    conn.execute(text(
+        'DELETE FROM analysis_states WHERE symbol IN '
+        '(SELECT symbol FROM stock_data GROUP BY symbol, date HAVING COUNT(*) > 1)'
+    ))
+    conn.execute(text(f'DELETE FROM anomalies WHERE stock_id IN ({stale})'))
+    conn.execute(text(f'DELETE FROM stock_data WHERE id IN ({stale})'))
+    conn.execute(text('CREATE UNIQUE INDEX IF NOT EXISTS uq_stock_data_symbol_date ON stock_data (symbol, date)'))
+
 def init_db():
     """Initialize database tables"""
-    from .models import user, stock, audit
+    from .models import user, stock, audit, job, analysis
     Base.metadata.create_all(bind=engine)
+    # create_all only touches tables it creates; add nullable columns and indexes declared since
+    existing = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            present = {column['name'] for column in existing.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in present and column.nullable:
+                    column_type = column.type.compile(dialect=engine.dialect)
+                    conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+        _ensure_stock_data_key(conn)
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
     print("✅ Database tables created successfully!")
\ No newline at end of file
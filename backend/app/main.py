@@ -2,10 +2,12 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from .config import settings
-from .database import engine, Base, init_db, SessionLocal
-from .api import auth_router, stocks_router, reports_router, websocket_router
+from .database import engine, async_engine, Base, init_db, SessionLocal
+from .api import auth_router, stocks_router, reports_router, websocket_router, jobs_router, debug_router
 from .ml import MarketSurveillanceEngine
 from .utils.create_default_users import create_default_users
+from .utils.job_queue import job_queue
+from .utils.db_stats import db_stats, DBStatsMiddleware
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -38,13 +40,22 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-DB-Query-Count", "X-DB-Time-Ms", "X-DB-N-Plus-One"],
 )
 
+# Per-request query instrumentation (response headers + /debug/db-stats)
+if settings.DB_INSTRUMENTATION:
+    db_stats.instrument(engine)
+    db_stats.instrument(async_engine.sync_engine)
+    app.add_middleware(DBStatsMiddleware, collector=db_stats)
+
 # Include routers
 app.include_router(auth_router, prefix=settings.API_V1_STR)
 app.include_router(stocks_router, prefix=settings.API_V1_STR)
 app.include_router(reports_router, prefix=settings.API_V1_STR)
 app.include_router(websocket_router, prefix=settings.API_V1_STR)
+app.include_router(jobs_router, prefix=settings.API_V1_STR)
+app.include_router(debug_router, prefix=settings.API_V1_STR)
 
 @app.get("/")
 def root():
@@ -66,9 +77,15 @@ def health_check():
 
 @app.on_event("startup")
 async def startup_event():
+    job_queue.start()
     logger.info("="*50)
     logger.info("🚀 Market Surveillance AI started")
     logger.info(f"📊 Version: {settings.VERSION}")
     logger.info("🧠 AI/ML Engine: Initialized")
     logger.info("👤 Default users: admin/admin123, analyst/analyst123, viewer/viewer123")
-    logger.info("="*50)
\ No newline at end of file
+    logger.info("="*50)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    job_queue.shutdown()
+    await async_engine.dispose()
\ No newline at end of file
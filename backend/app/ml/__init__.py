@@ -1,57 +1,161 @@
 # backend/app/ml/__init__.py
 import pandas as pd
 import numpy as np
+from ..config import settings
+from .labels import risk_level, priority_anomaly_type
+from .frames import extend, float_dtype
 
 class MarketSurveillanceEngine:
     """Minimal working ML engine for anomaly detection"""
     
-    def __init__(self):
+    VOLUME_WINDOW = 5
+    # Risk points per price / volume flag, and per unit of volume ratio (capped)
+    FLAG_POINTS = 40
+    RATIO_POINTS = 10
+    RATIO_CAP = 2
+    
+    def __init__(self, compact: bool = settings.COMPACT_FRAMES,
+                 price_threshold: float = settings.ZSCORE_THRESHOLD,
+                 volume_threshold: float = settings.ZSCORE_THRESHOLD):
+        # compact: float32 scores / int32 volume in the result (maths stays float64)
+        self.compact = compact
+        self.price_threshold = price_threshold
+        self.volume_threshold = volume_threshold
         print("🧠 ML Engine Initialized")
     
     def analyze(self, df):
         """Simple but effective anomaly detection"""
-        df = df.copy()
+        close = df['close'].astype(float)
+        volume = df['volume'].astype(float)
         
         # Calculate returns
-        df['returns'] = df['close'].pct_change()
+        returns = close.pct_change()
         
         # Calculate moving averages
-        df['volume_ma'] = df['volume'].rolling(5).mean()
-        df['volume_ratio'] = df['volume'] / df['volume_ma']
+        volume_ma = volume.rolling(self.VOLUME_WINDOW).mean()
+        volume_ratio = volume / volume_ma
         
         # Z-scores
-        df['price_zscore'] = (df['close'] - df['close'].mean()) / df['close'].std()
-        df['volume_zscore'] = (df['volume'] - df['volume'].mean()) / df['volume'].std()
+        price_zscore = (close - close.mean()) / close.std()
+        volume_zscore = (volume - volume.mean()) / volume.std()
         
+        # New columns go into a separate frame; the input is not copied
+        df = extend(df, {
+            'returns': returns,
+            'volume_ma': volume_ma,
+            'volume_ratio': volume_ratio,
+            'price_zscore': price_zscore,
+            'volume_zscore': volume_zscore
+        }, self.compact)
+        return self._score(df, price_zscore, volume_zscore, volume_ratio)
+    
+    def _score(self, df, price_zscore, volume_zscore, volume_ratio):
+        """Flags, risk score and labels from (float64) z-scores and volume ratio"""
         # Detect anomalies
-        df['price_anomaly_z'] = np.abs(df['price_zscore']) > 2.5
-        df['volume_anomaly_z'] = np.abs(df['volume_zscore']) > 2.5
+        df['price_anomaly_z'] = np.abs(price_zscore) > self.price_threshold
+        df['volume_anomaly_z'] = np.abs(volume_zscore) > self.volume_threshold
         
         # Risk score (0-100)
         df['risk_score'] = (
-            (df['price_anomaly_z'].astype(int) * 40) +
-            (df['volume_anomaly_z'].astype(int) * 40) +
-            (df['volume_ratio'].clip(0, 2) * 10)
-        ).clip(0, 100)
+            (df['price_anomaly_z'].astype(int) * self.FLAG_POINTS) +
+            (df['volume_anomaly_z'].astype(int) * self.FLAG_POINTS) +
+            (volume_ratio.clip(0, self.RATIO_CAP) * self.RATIO_POINTS)
+        ).clip(0, 100).astype(float_dtype(self.compact))
         
         # Risk level
-        conditions = [
-            df['risk_score'] < 30,
-            df['risk_score'].between(30, 70),
-            df['risk_score'] > 70
-        ]
-        choices = ['Low', 'Medium', 'High']
-        df['risk_level'] = np.select(conditions, choices, default='Low')
+        df['risk_level'] = risk_level(df['risk_score'])
         
         # Anomaly type
         df['is_anomaly'] = df['price_anomaly_z'] | df['volume_anomaly_z']
-        df['anomaly_type'] = df.apply(
-            lambda row: 'Price' if row['price_anomaly_z'] else 
-                       ('Volume' if row['volume_anomaly_z'] else 'Normal'),
-            axis=1
-        )
+        df['anomaly_type'] = priority_anomaly_type(df)
         
         # ML score (mock)
-        df['ml_score_if'] = -np.abs(df['price_zscore']) / 10
+        df['ml_score_if'] = (-np.abs(price_zscore) / 10).astype(float_dtype(self.compact))
+        
+        return df
+    
+    def build_state(self, df):
+        """Rolling state after analysing the date-ordered frame `df`"""
+        close = df['close'].to_numpy(dtype=float)
+        volume = df['volume'].to_numpy(dtype=float)
+        return {
+            'count': len(df),
+            'close_mean': float(close.mean()),
+            'close_m2': float(((close - close.mean()) ** 2).sum()),
+            'volume_mean': float(volume.mean()),
+            'volume_m2': float(((volume - volume.mean()) ** 2).sum()),
+            'tail_close': close[-1:].tolist(),
+            'tail_volume': volume[-(self.VOLUME_WINDOW - 1):].tolist()
+        }
+    
+    @staticmethod
+    def _running_zscore(x, count, mean, m2):
+        """
+        Z-score of each new value against running stats that include it.
+        
+        Merges the prior (count, mean, M2) with every prefix of `x` using the
+        parallel-variance formula, so it is vectorized over the new bars only.
+        Returns the z-scores and the updated (count, mean, M2).
+        """
+        m = np.arange(1, len(x) + 1)
+        n = count + m
+        d = x - mean
+        cum_d = np.cumsum(d)
+        batch_m2 = np.cumsum(d * d) - cum_d ** 2 / m
+        total_m2 = m2 + batch_m2 + (cum_d / m) ** 2 * count * m / n
+        running_mean = mean + cum_d / n
+        with np.errstate(divide='ignore', invalid='ignore'):
+            std = np.where(n > 1, np.sqrt(total_m2 / np.maximum(n - 1, 1)), np.nan)
+            z = (x - running_mean) / std
+        return z, int(n[-1]), float(running_mean[-1]), float(total_m2[-1])
+    
+    def analyze_incremental(self, df, state):
+        """
+        Score only the bars in `df` (appended after `state` was built).
+        
+        Z-scores use running mean/variance over all bars seen so far, and the
+        volume moving average is seeded from the trailing bars kept in state.
+        Returns the scored frame and the state to persist for the next run.
+        """
+        close = df['close'].to_numpy(dtype=float)
+        volume = df['volume'].to_numpy(dtype=float)
+        tail_close = np.asarray(state['tail_close'], dtype=float)
+        tail_volume = np.asarray(state['tail_volume'], dtype=float)
+        
+        # Returns and volume MA continue from the stored trailing bars
+        all_close = pd.Series(np.concatenate([tail_close, close]))
+        returns = all_close.pct_change().to_numpy()[len(tail_close):]
+        all_volume = pd.Series(np.concatenate([tail_volume, volume]))
+        volume_ma = all_volume.rolling(self.VOLUME_WINDOW).mean().to_numpy()[len(tail_volume):]
+        volume_ratio = pd.Series(volume / volume_ma, index=df.index)
+        
+        # Z-scores against running statistics
+        price_zscore, count, close_mean, close_m2 = self._running_zscore(
+            close, state['count'], state['close_mean'], state['close_m2']
+        )
+        volume_zscore, _, volume_mean, volume_m2 = self._running_zscore(
+            volume, state['count'], state['volume_mean'], state['volume_m2']
+        )
+        
+        scored = extend(df, {
+            'returns': returns,
+            'volume_ma': volume_ma,
+            'volume_ratio': volume_ratio,
+            'price_zscore': price_zscore,
+            'volume_zscore': volume_zscore
+        }, self.compact)
+        
+        new_state = {
+            'count': count,
+            'close_mean': close_mean,
+            'close_m2': close_m2,
+            'volume_mean': volume_mean,
+            'volume_m2': volume_m2,
+            'tail_close': all_close.to_numpy()[-1:].tolist(),
+            'tail_volume': all_volume.to_numpy()[-(self.VOLUME_WINDOW - 1):].tolist()
+        }
         
-        return df
\ No newline at end of file
+        return self._score(
+            scored, pd.Series(price_zscore, index=df.index),
+            pd.Series(volume_zscore, index=df.index), volume_ratio
+        ), new_state
\ No newline at end of file
@@ -0,0 +1,231 @@
+# backend/app/ml/calibration.py
+import itertools
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..config import settings
+from . import MarketSurveillanceEngine
+from .features import FeatureEngine
+from .detector import AnomalyDetector
+from .risk_scorer import RiskScorer
+
+WEIGHT_KEYS = ('price_anomaly', 'volume_anomaly', 'ml_anomaly', 'volatility')
+
+
+class CalibrationSweep:
+    """
+    Threshold / weight calibration over a grid of settings in one pass.
+
+    prepare() computes everything that does not depend on the settings once
+    per symbol (z-scores, IQR / MA flags, Isolation Forest flags, the capped
+    per-factor scores). evaluate() then broadcasts every setting against
+    every bar as (settings x rows) arrays, a block of settings at a time,
+    and reports per setting: alert count and rate, precision / recall
+    against labelled events and the overlap (Jaccard) with the baseline
+    alerts of the current configuration.
+
+    model='engine' calibrates MarketSurveillanceEngine (alert = price or
+    volume z-score flag); model='pipeline' calibrates the detector + RiskScorer
+    path (alert = risk score at or above alert_score).
+    """
+
+    MODELS = ('engine', 'pipeline')
+    # Settings x rows cells evaluated per block
+    BLOCK_CELLS = 4_000_000
+
+    def __init__(self, model: str = 'pipeline'):
+        if model not in self.MODELS:
+            raise ValueError(f"Unknown model '{model}'; expected one of {', '.join(self.MODELS)}")
+        self.model = model
+        self.inputs: Dict[str, np.ndarray] = {}
+        self.index: Optional[pd.MultiIndex] = None
+        self.ends = np.zeros(0, dtype=np.int64)
+
+    def baseline(self) -> Dict:
+        """The setting currently in use"""
+        if self.model == 'engine':
+            return {
+                'price_threshold': settings.ZSCORE_THRESHOLD,
+                'volume_threshold': settings.ZSCORE_THRESHOLD
+            }
+        return {
+            'price_threshold': 3.0,
+            'volume_threshold': 2.0,
+            'volume_spike_threshold': settings.VOLUME_SPIKE_THRESHOLD,
+            'weights': dict(RiskScorer().weights),
+            'alert_score': 30.0
+        }
+
+    def grid(self, price_thresholds: Sequence[float], volume_thresholds: Sequence[float],
+             volume_spike_thresholds: Optional[Sequence[float]] = None,
+             weights: Optional[Sequence[Dict[str, float]]] = None,
+             alert_scores: Optional[Sequence[float]] = None) -> List[Dict]:
+        """Cartesian product of the given values; unset dimensions keep the baseline"""
+        base = self.baseline()
+        if self.model == 'engine':
+            return [
+                {'price_threshold': p, 'volume_threshold': v}
+                for p, v in itertools.product(price_thresholds, volume_thresholds)
+            ]
+        for w in weights or []:
+            unknown = set(w) - set(WEIGHT_KEYS)
+            if unknown:
+                raise ValueError(f"Unknown risk weights {sorted(unknown)}; expected {', '.join(WEIGHT_KEYS)}")
+        weight_grid = [{**base['weights'], **w} for w in (weights or [base['weights']])]
+        return [
+            {'price_threshold': p, 'volume_threshold': v, 'volume_spike_threshold': s,
+             'weights': w, 'alert_score': a}
+            for p, v, s, w, a in itertools.product(
+                price_thresholds, volume_thresholds,
+                volume_spike_thresholds or [base['volume_spike_threshold']],
+                weight_grid, alert_scores or [base['alert_score']]
+            )
+        ]
+
+    def _symbol_inputs(self, df: pd.DataFrame) -> Dict[str, np.ndarray]:
+        if self.model == 'engine':
+            scored = MarketSurveillanceEngine(compact=False).analyze(df)
+            return {
+                'price_z': np.abs(scored['price_zscore'].to_numpy(dtype=np.float64)),
+                'volume_z': np.abs(scored['volume_zscore'].to_numpy(dtype=np.float64))
+            }
+
+        features = FeatureEngine.calculate_all(df)
+        # Threshold-independent flags and ML scores; the z / spike flags are swept
+        detected = AnomalyDetector(n_jobs=settings.ML_N_JOBS).detect_all(features)
+        price_z = np.abs(detected['price_zscore'].to_numpy(dtype=np.float64))
+        volume_z = np.abs(detected['volume_zscore'].to_numpy(dtype=np.float64))
+        ml = detected['ml_anomaly_if'].to_numpy(dtype=bool)
+        return {
+            'price_z': price_z,
+            'volume_z': volume_z,
+            'price_other': (detected['price_anomaly_iqr'] | detected['price_anomaly_ma']).to_numpy(dtype=bool),
+            'volume_other': detected['volume_anomaly_iqr'].to_numpy(dtype=bool),
+            'volume_ma_ratio': detected['volume_ma_ratio'].to_numpy(dtype=np.float64),
+            # RiskScorer's per-factor scores, before weighting
+            'price_score': np.minimum(np.nan_to_num(price_z) * 20, 100),
+            'volume_score': np.minimum(np.nan_to_num(volume_z) * 15, 100),
+            'ml_score': np.where(ml, np.minimum(-detected['ml_score_if'].fillna(0).to_numpy(dtype=np.float64) * 10, 100), 0),
+            'volatility_score': np.minimum(detected['volatility_ratio'].fillna(1).to_numpy(dtype=np.float64) * 50, 100)
+        }
+
+    def prepare(self, frames: Iterable[Tuple[str, pd.DataFrame]]):
+        """Compute the setting-independent inputs for date-ordered (symbol, OHLCV frame) pairs"""
+        parts, symbols, dates = [], [], []
+        for symbol, df in frames:
+            if df.empty:
+                continue
+            parts.append(self._symbol_inputs(df))
+            symbols.append(np.full(len(df), symbol, dtype=object))
+            dates.append(pd.to_datetime(df['date']).to_numpy())
+        if not parts:
+            raise LookupError("No data to calibrate on")
+
+        self.inputs = {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+        self.index = pd.MultiIndex.from_arrays([np.concatenate(symbols), np.concatenate(dates)])
+        # Last row of each symbol, for event windows that must not spill into the next one
+        self.ends = np.cumsum([len(s) for s in symbols]) - 1
+
+    @property
+    def rows(self) -> int:
+        return len(self.index) if self.index is not None else 0
+
+    def _alerts(self, block: List[Dict]) -> np.ndarray:
+        """(settings x rows) alert mask for a block of settings"""
+        def col(key: str) -> np.ndarray:
+            return np.array([s[key] for s in block], dtype=np.float64)[:, None]
+
+        x = self.inputs
+        price = x['price_z'] > col('price_threshold')
+        volume = x['volume_z'] > col('volume_threshold')
+        if self.model == 'engine':
+            return price | volume
+
+        price |= x['price_other']
+        volume |= x['volume_other']
+        with np.errstate(invalid='ignore'):
+            volume |= x['volume_ma_ratio'] > col('volume_spike_threshold')
+
+        weights = np.array([[s['weights'][k] for k in WEIGHT_KEYS] for s in block], dtype=np.float64)
+        risk = np.where(price, x['price_score'], 0.0) * weights[:, :1]
+        risk += np.where(volume, x['volume_score'], 0.0) * weights[:, 1:2]
+        risk += x['ml_score'] * weights[:, 2:3]
+        risk += x['volatility_score'] * weights[:, 3:4]
+        np.clip(risk, 0, 100, out=risk)
+        return risk >= col('alert_score')
+
+    def _event_rows(self, events: Iterable[Tuple[str, object]]) -> np.ndarray:
+        """Row positions of labelled (symbol, date) events found in the prepared data"""
+        events = list(events)
+        if not events:
+            return np.zeros(0, dtype=np.int64)
+        wanted = pd.MultiIndex.from_arrays([
+            [symbol for symbol, _ in events],
+            pd.to_datetime([day for _, day in events])
+        ])
+        positions = self.index.get_indexer(wanted)
+        return np.unique(positions[positions >= 0])
+
+    def evaluate(self, grid: List[Dict], events: Iterable[Tuple[str, object]] = (),
+                 tolerance: int = 0) -> Tuple[pd.DataFrame, Dict]:
+        """
+        Metrics for every setting in grid, plus a summary.
+
+        An alert is a true positive if it falls on a labelled event or up to
+        tolerance bars after it (same symbol); an event is recalled if any
+        alert falls in that window.
+        """
+        if self.index is None:
+            raise ValueError("prepare() must be called before evaluate()")
+        if tolerance < 0:
+            raise ValueError("tolerance must be zero or more bars")
+        event_rows = self._event_rows(events)
+        labelled = len(event_rows) > 0
+
+        # Window [event, event + tolerance], clipped to the event's symbol
+        window_end = np.minimum(event_rows + tolerance, self.ends[np.searchsorted(self.ends, event_rows)])
+        near_event = np.zeros(self.rows, dtype=bool)
+        for offset in range(tolerance + 1):
+            rows = event_rows + offset
+            near_event[rows[rows <= window_end]] = True
+
+        baseline = self._alerts([self.baseline()])[0]
+        block_size = max(1, self.BLOCK_CELLS // max(self.rows, 1))
+        metrics = []
+        for start in range(0, len(grid), block_size):
+            alerts = self._alerts(grid[start:start + block_size])
+            count = alerts.sum(axis=1)
+            overlap = (alerts & baseline).sum(axis=1)
+            union = (alerts | baseline).sum(axis=1)
+            block = {
+                'alerts': count,
+                'alert_rate': count / self.rows,
+                'baseline_overlap': np.divide(overlap, union, out=np.ones(len(count)), where=union > 0)
+            }
+            if labelled:
+                hits = (alerts & near_event).sum(axis=1)
+                # Alerts inside each event window, from running counts per setting
+                running = np.concatenate([np.zeros((len(alerts), 1), dtype=np.int64), np.cumsum(alerts, axis=1)], axis=1)
+                recalled = (running[:, window_end + 1] - running[:, event_rows]) > 0
+                block['true_alerts'] = hits
+                block['precision'] = np.divide(hits, count, out=np.full(len(count), np.nan), where=count > 0)
+                block['recall'] = recalled.mean(axis=1)
+            metrics.append(pd.DataFrame(block))
+
+        # Weight vectors become weights_<factor> columns
+        result = pd.concat([pd.json_normalize(grid, sep='_'), pd.concat(metrics, ignore_index=True)], axis=1)
+        if labelled:
+            p, r = result['precision'], result['recall']
+            result['f1'] = (2 * p * r / (p + r)).where(p + r > 0, 0.0)
+
+        summary = {
+            'model': self.model,
+            'rows': self.rows,
+            'symbols': int(self.index.get_level_values(0).nunique()),
+            'settings': len(grid),
+            'events_matched': int(len(event_rows)),
+            'baseline': {**self.baseline(), 'alerts': int(baseline.sum())}
+        }
+        return result, summary
@@ -0,0 +1,131 @@
+# backend/app/ml/cross_section.py
+import warnings
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from ..config import settings
+from .labels import risk_level, priority_anomaly_type
+
+
+class CrossSectionalEngine:
+    """
+    Market-wide anomaly detection on a dates x symbols matrix.
+
+    Each symbol's return is measured against its peer group (leave-one-out
+    mean of the other members) or, for symbols without a group, the
+    equal-weighted market return; volume against its own trailing average,
+    net of the market-wide volume move that day. Both are then z-scored
+    across symbols per date, so a move the whole market makes scores ~0 and
+    only idiosyncratic outliers are flagged. Flags and risk scores follow
+    MarketSurveillanceEngine (40 per z-flag + volume ratio x 10, 0-100).
+    """
+
+    VOLUME_WINDOW = 20
+
+    def __init__(self, price_threshold: float = settings.ZSCORE_THRESHOLD,
+                 volume_threshold: float = settings.ZSCORE_THRESHOLD):
+        self.price_threshold = price_threshold
+        self.volume_threshold = volume_threshold
+
+    @staticmethod
+    def _membership(symbols: np.ndarray, peer_groups: Dict[str, List[str]]):
+        """Symbols x groups one-hot matrix and each symbol's group index (-1 if none)"""
+        names = sorted(peer_groups)
+        group_of = np.full(len(symbols), -1)
+        position = {symbol: i for i, symbol in enumerate(symbols)}
+        for g, name in enumerate(names):
+            for symbol in peer_groups[name]:
+                if symbol in position:
+                    group_of[position[symbol]] = g
+        onehot = np.zeros((len(symbols), len(names)))
+        grouped = group_of >= 0
+        onehot[np.flatnonzero(grouped), group_of[grouped]] = 1.0
+        return onehot, group_of
+
+    @staticmethod
+    def _cross_zscore(matrix: np.ndarray) -> np.ndarray:
+        """Z-score of every cell against its date's cross-section"""
+        mean = np.nanmean(matrix, axis=1, keepdims=True)
+        std = np.nanstd(matrix, axis=1, ddof=1, keepdims=True)
+        return (matrix - mean) / std
+
+    def analyze(self, close: np.ndarray, volume: np.ndarray, symbols: np.ndarray,
+                peer_groups: Optional[Dict[str, List[str]]] = None) -> Dict[str, np.ndarray]:
+        """All cross-sectional features, flags and risk scores as dates x symbols matrices"""
+        peer_groups = settings.PEER_GROUPS if peer_groups is None else peer_groups
+
+        # All-NaN dates / symbols (no bars yet) are expected; they just stay NaN
+        with np.errstate(divide='ignore', invalid='ignore'), warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            returns = np.full_like(close, np.nan)
+            returns[1:] = close[1:] / close[:-1] - 1
+            returns[~np.isfinite(returns)] = np.nan
+
+            valid = ~np.isnan(returns)
+            filled = np.where(valid, returns, 0.0)
+            counts = valid.sum(axis=1, keepdims=True)
+            market = filled.sum(axis=1, keepdims=True) / counts
+
+            # Leave-one-out peer means via (dates x symbols) @ (symbols x groups)
+            benchmark = np.broadcast_to(market, returns.shape).copy()
+            onehot, group_of = self._membership(symbols, peer_groups)
+            if onehot.shape[1]:
+                grouped = np.flatnonzero(group_of >= 0)
+                group_sum = (filled @ onehot)[:, group_of[grouped]]
+                group_count = (valid.astype(np.float64) @ onehot)[:, group_of[grouped]]
+                others = group_count - valid[:, grouped]
+                peer = (group_sum - filled[:, grouped]) / others
+                benchmark[:, grouped] = np.where(others > 0, peer, benchmark[:, grouped])
+
+            excess = returns - benchmark
+            price_z = self._cross_zscore(excess)
+
+            volume_ma = pd.DataFrame(volume).rolling(self.VOLUME_WINDOW, min_periods=5).mean().to_numpy()
+            log_ratio = np.log(volume / volume_ma)
+            log_ratio[~np.isfinite(log_ratio)] = np.nan
+            relative_volume = log_ratio - np.nanmedian(log_ratio, axis=1, keepdims=True)
+            volume_z = self._cross_zscore(relative_volume)
+            volume_ratio = np.exp(relative_volume)
+
+        price_anomaly = np.abs(price_z) > self.price_threshold
+        volume_anomaly = np.abs(volume_z) > self.volume_threshold
+        risk_score = np.clip(
+            price_anomaly * 40 + volume_anomaly * 40 + np.clip(np.nan_to_num(volume_ratio), 0, 2) * 10,
+            0, 100
+        )
+
+        return {
+            'returns': returns,
+            'market_return': market[:, 0],
+            'benchmark_return': benchmark,
+            'excess_return': excess,
+            'price_zscore': price_z,
+            'volume_ratio': volume_ratio,
+            'volume_zscore': volume_z,
+            'price_anomaly_z': price_anomaly,
+            'volume_anomaly_z': volume_anomaly,
+            'risk_score': risk_score
+        }
+
+    @staticmethod
+    def anomalies(dates: np.ndarray, symbols: np.ndarray, result: Dict[str, np.ndarray],
+                  limit: Optional[int] = None) -> pd.DataFrame:
+        """Flagged (date, symbol) cells as rows, highest risk first"""
+        flagged = result['price_anomaly_z'] | result['volume_anomaly_z']
+        rows, cols = np.nonzero(flagged)
+        frame = pd.DataFrame({
+            'date': dates[rows],
+            'symbol': symbols[cols],
+            **{
+                name: result[name][rows, cols]
+                for name in ('returns', 'benchmark_return', 'excess_return', 'price_zscore',
+                             'volume_ratio', 'volume_zscore', 'price_anomaly_z',
+                             'volume_anomaly_z', 'risk_score')
+            }
+        })
+        frame['risk_level'] = risk_level(frame['risk_score'])
+        frame['anomaly_type'] = priority_anomaly_type(frame)
+        frame = frame.sort_values(['risk_score', 'date'], ascending=[False, False], kind='stable')
+        return frame.head(limit) if limit else frame
@@ -4,25 +4,33 @@ from sklearn.ensemble import IsolationForest
 from sklearn.neighbors import LocalOutlierFactor
 from sklearn.cluster import DBSCAN
 from sklearn.preprocessing import StandardScaler
-from typing import Dict, Tuple
+from typing import Dict, Optional, Tuple
 import joblib
 import os
 
+from ..config import settings
+
 class AnomalyDetector:
     """AI-powered anomaly detection engine"""
     
-    def __init__(self, contamination=0.1):
+    def __init__(self, contamination=0.1, n_jobs: int = -1,
+                 lof_max_samples: Optional[int] = None):
         self.contamination = contamination
+        self.lof_max_samples = lof_max_samples
         self.isolation_forest = IsolationForest(
             contamination=contamination,
             random_state=42,
             n_estimators=100,
             max_samples='auto'
         )
+        # novelty=True keeps the fitted neighbour index usable for new rows
         self.lof = LocalOutlierFactor(
             contamination=contamination,
-            n_neighbors=20
+            n_neighbors=20,
+            novelty=True,
+            n_jobs=n_jobs
         )
+        self.lof_train_scores = None
         self.dbscan = DBSCAN(eps=0.5, min_samples=5)
         self.scaler = StandardScaler()
         self.is_fitted = False
@@ -35,14 +43,9 @@ class AnomalyDetector:
             'price_to_sma20', 'macd'
         ]
         
-        # Select and fill NaN values
-        features = df[feature_columns].copy()
-        features = features.fillna(0)
-        
-        # Replace infinite values
-        features = features.replace([np.inf, -np.inf], 0)
-        
-        return features.values
+        # One float64 copy (also for compact float32 frames); NaN / inf -> 0
+        features = df[feature_columns].to_numpy(dtype=np.float64, copy=True)
+        return np.nan_to_num(features, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
     
     def detect_isolation_forest(self, df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
         """Detect anomalies using Isolation Forest"""
@@ -59,7 +62,8 @@ class AnomalyDetector:
     
     def detect_statistical(self, df: pd.DataFrame, 
                           price_threshold: float = 3.0,
-                          volume_threshold: float = 2.0) -> pd.DataFrame:
+                          volume_threshold: float = 2.0,
+                          volume_spike_threshold: float = settings.VOLUME_SPIKE_THRESHOLD) -> pd.DataFrame:
         """Statistical anomaly detection using Z-score and IQR"""
         
         # Z-score based anomalies
@@ -84,30 +88,87 @@ class AnomalyDetector:
         df['price_anomaly_ma'] = (df['price_ma_ratio'] > 1.1) | (df['price_ma_ratio'] < 0.9)
         
         df['volume_ma_ratio'] = df['volume'] / df['volume_ma_20']
-        df['volume_anomaly_ma'] = df['volume_ma_ratio'] > 2.0
+        df['volume_anomaly_ma'] = df['volume_ma_ratio'] > volume_spike_threshold
         
         return df
     
-    def detect_all(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Run all detection algorithms"""
+    def fit(self, df: pd.DataFrame) -> np.ndarray:
+        """Fit the scaler, Isolation Forest and LOF index; returns the scaled features"""
+        features = self.prepare_features(df)
+        features_scaled = self.scaler.fit_transform(features)
+        self.isolation_forest.fit(features_scaled)
+        self.fit_lof(features_scaled)
+        self.is_fitted = True
+        return features_scaled
+    
+    def fit_lof(self, features_scaled: np.ndarray) -> np.ndarray:
+        """
+        Build the LOF neighbour index and score the rows it was built from.
+        
+        Above lof_max_samples rows the index is built on a random subsample
+        (approximate mode) and every row is scored against it. Returns the
+        rows' scores (negative outlier factors), which are also kept so later
+        calls only need to score rows added since.
+        """
+        if self.lof_max_samples and len(features_scaled) > self.lof_max_samples:
+            rng = np.random.default_rng(42)
+            sample = np.sort(rng.choice(len(features_scaled), self.lof_max_samples, replace=False))
+            self.lof.fit(features_scaled[sample])
+            self.lof_train_scores = self.lof.score_samples(features_scaled)
+        else:
+            self.lof.fit(features_scaled)
+            self.lof_train_scores = self.lof.negative_outlier_factor_
+        return self.lof_train_scores
+    
+    def score_lof(self, features_scaled: np.ndarray, fitted_rows: int = 0) -> np.ndarray:
+        """
+        LOF scores from the existing index.
+        
+        The first fitted_rows rows are taken to be the rows the index was built
+        from, so their stored scores are reused and only the rest is queried.
+        """
+        known = min(fitted_rows, len(self.lof_train_scores), len(features_scaled))
+        if known == len(features_scaled):
+            return self.lof_train_scores[:known]
+        return np.concatenate([
+            self.lof_train_scores[:known],
+            self.lof.score_samples(features_scaled[known:])
+        ])
+    
+    def detect_all(self, df: pd.DataFrame,
+                   price_threshold: float = 3.0,
+                   volume_threshold: float = 2.0,
+                   refit: bool = True, fitted_rows: int = 0) -> pd.DataFrame:
+        """Run all detection algorithms
+        
+        With refit=False an already fitted scaler/Isolation Forest/LOF index
+        (e.g. from the model registry) only scores the rows instead of being
+        refitted; see score_lof for fitted_rows.
+        """
         # Statistical detection
-        df = self.detect_statistical(df)
+        df = self.detect_statistical(df, price_threshold, volume_threshold)
         
         # ML detection
         features = self.prepare_features(df)
-        features_scaled = self.scaler.fit_transform(features)
+        reuse = self.is_fitted and not refit
+        features_scaled = self.scaler.transform(features) if reuse else self.scaler.fit_transform(features)
         
         # Isolation Forest
         if len(features_scaled) > 10:  # Need enough samples
-            iso_predictions = self.isolation_forest.fit_predict(features_scaled)
-            df['ml_anomaly_if'] = iso_predictions == -1
-            df['ml_score_if'] = self.isolation_forest.score_samples(features_scaled)
+            if not reuse:
+                self.isolation_forest.fit(features_scaled)
+            # Same as predict() == -1, without scoring every row twice
+            iso_scores = self.isolation_forest.score_samples(features_scaled)
+            df['ml_anomaly_if'] = iso_scores < self.isolation_forest.offset_
+            df['ml_score_if'] = iso_scores
             
             # LOF (unsupervised)
-            lof = LocalOutlierFactor(contamination=self.contamination)
-            lof_predictions = lof.fit_predict(features_scaled)
-            df['ml_anomaly_lof'] = lof_predictions == -1
-            df['ml_score_lof'] = -lof.negative_outlier_factor_
+            if reuse and self.lof_train_scores is not None:
+                lof_scores = self.score_lof(features_scaled, fitted_rows)
+            else:
+                lof_scores = self.fit_lof(features_scaled)
+            df['ml_anomaly_lof'] = lof_scores < self.lof.offset_
+            df['ml_score_lof'] = -lof_scores
         else:
             df['ml_anomaly_if'] = False
             df['ml_score_if'] = 0
@@ -129,10 +190,14 @@ class AnomalyDetector:
         if self.is_fitted:
             joblib.dump(self.isolation_forest, f"{path}/isolation_forest.pkl")
             joblib.dump(self.scaler, f"{path}/scaler.pkl")
+            if self.lof_train_scores is not None:
+                joblib.dump((self.lof, self.lof_train_scores), f"{path}/lof.pkl")
     
     def load_model(self, path: str):
         """Load trained model"""
         if os.path.exists(f"{path}/isolation_forest.pkl"):
             self.isolation_forest = joblib.load(f"{path}/isolation_forest.pkl")
             self.scaler = joblib.load(f"{path}/scaler.pkl")
+            if os.path.exists(f"{path}/lof.pkl"):
+                self.lof, self.lof_train_scores = joblib.load(f"{path}/lof.pkl")
             self.is_fitted = True
\ No newline at end of file
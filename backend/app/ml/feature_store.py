@@ -0,0 +1,51 @@
+# backend/app/ml/feature_store.py
+import os
+import glob
+import logging
+import threading
+from typing import Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+class FeatureStore:
+    """
+    On-disk store of computed feature frames.
+
+    Frames are keyed by (symbol, data version, feature-set hash). Writing a
+    newer data version of a symbol prunes the older ones, since those can
+    never be requested again.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._lock = threading.Lock()
+
+    def _path(self, symbol: str, version: int, feature_hash: str) -> str:
+        return os.path.join(self.root, symbol, f"v{version}_{feature_hash}.pkl")
+
+    def get(self, symbol: str, version: int, feature_hash: str) -> Optional[pd.DataFrame]:
+        path = self._path(symbol, version, feature_hash)
+        if not os.path.exists(path):
+            return None
+        try:
+            return pd.read_pickle(path)
+        except Exception as e:
+            logger.warning(f"Discarding unreadable feature frame {path}: {e}")
+            os.remove(path)
+            return None
+
+    def put(self, symbol: str, version: int, feature_hash: str, frame: pd.DataFrame):
+        path = self._path(symbol, version, feature_hash)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        frame.to_pickle(tmp_path)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            for stale in glob.glob(os.path.join(self.root, symbol, "v*_*.pkl")):
+                stale_version = os.path.basename(stale)[1:].split('_', 1)[0]
+                if stale_version.isdigit() and int(stale_version) < version:
+                    os.remove(stale)
@@ -2,9 +2,25 @@ import pandas as pd
 import numpy as np
 from typing import Tuple, List
 
+from .rolling import RollingWindows, FLAT_STD_RTOL, FLAT_STD_ATOL, ewma, zscore
+from .frames import extend, float_dtype
+
 class FeatureEngine:
     """Extract features from stock data for ML models"""
     
+    # Columns added by the calculate_* steps, in the order they add them
+    FEATURE_COLUMNS = (
+        'returns', 'log_returns', 'returns_ma_5', 'returns_ma_20',
+        'volume_ma_5', 'volume_ma_20', 'volume_ratio', 'volume_change',
+        'daily_range', 'volatility_5', 'volatility_20', 'volatility_ratio',
+        'sma_20', 'sma_50', 'ema_12', 'ema_26', 'price_to_sma20', 'price_to_sma50',
+        'macd', 'macd_signal',
+        'price_zscore', 'volume_zscore', 'returns_zscore'
+    )
+    
+    def __init__(self, compact: bool = False):
+        self.compact = compact
+    
     @staticmethod
     def calculate_returns(df: pd.DataFrame) -> pd.DataFrame:
         """Calculate daily returns and log returns"""
@@ -51,26 +67,111 @@ class FeatureEngine:
         
         return df
     
+    @staticmethod
+    def rolling_zscore(series: pd.Series, window: int = 20) -> pd.Series:
+        """Trailing z-score; 0 where the window is flat (see rolling.FLAT_STD_RTOL)"""
+        mean = series.rolling(window).mean()
+        std = series.rolling(window).std()
+        flat = std <= FLAT_STD_RTOL * mean.abs() + FLAT_STD_ATOL
+        return ((series - mean) / std).mask(flat, 0.0)
+    
     @staticmethod
     def calculate_z_scores(df: pd.DataFrame) -> pd.DataFrame:
         """Calculate Z-scores for anomaly detection"""
         # Z-score for price
-        df['price_zscore'] = (df['close'] - df['close'].rolling(20).mean()) / df['close'].rolling(20).std()
+        df['price_zscore'] = FeatureEngine.rolling_zscore(df['close'])
         
         # Z-score for volume
-        df['volume_zscore'] = (df['volume'] - df['volume'].rolling(20).mean()) / df['volume'].rolling(20).std()
+        df['volume_zscore'] = FeatureEngine.rolling_zscore(df['volume'])
         
         # Z-score for returns
-        df['returns_zscore'] = (df['returns'] - df['returns'].rolling(20).mean()) / df['returns'].rolling(20).std()
+        df['returns_zscore'] = FeatureEngine.rolling_zscore(df['returns'])
         
         return df
     
+    @classmethod
+    def calculate_all(cls, df: pd.DataFrame, compact: bool = False) -> pd.DataFrame:
+        """
+        All calculate_* features in one fused pass.
+        
+        Each input series is scanned once for prefix sums and every rolling
+        mean/std is derived from those, instead of one .rolling() per feature
+        (the 20-bar stats are shared with the z-scores). Results are written
+        into a single preallocated float block; returns a new frame sharing
+        df's columns. With compact=True the block is float32 (and volume
+        int32); every feature is still computed from float64 inputs.
+        """
+        n = len(df)
+        close = df['close'].to_numpy(dtype=np.float64)
+        volume = df['volume'].to_numpy(dtype=np.float64)
+        high = df['high'].to_numpy(dtype=np.float64)
+        low = df['low'].to_numpy(dtype=np.float64)
+        
+        block = np.empty((n, len(cls.FEATURE_COLUMNS)), dtype=float_dtype(compact), order='F')
+        col = {name: block[:, i] for i, name in enumerate(cls.FEATURE_COLUMNS)}
+        
+        # Features that others are derived from are kept in float64; in full
+        # mode these are the block's own columns, in compact mode scratch copies
+        exact = {}
+        
+        def work(name: str) -> np.ndarray:
+            exact[name] = np.empty(n) if compact else col[name]
+            return exact[name]
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # Returns
+            returns = work('returns')
+            returns[:1] = np.nan
+            np.divide(close[1:], close[:-1], out=returns[1:])
+            np.log(returns, out=col['log_returns'])
+            returns -= 1
+            
+            change = col['volume_change']
+            change[:1] = np.nan
+            np.subtract(volume[1:] / volume[:-1], 1, out=change[1:])
+            
+            np.divide(high - low, close, out=col['daily_range'])
+            std = np.empty(n)
+            
+            # Rolling means / stds, one series' prefix sums alive at a time;
+            # z-scores are against the 20-bar windows
+            returns_win = RollingWindows(returns)
+            returns_win.mean(5, col['returns_ma_5'])
+            returns_ma_20 = returns_win.mean(20, work('returns_ma_20'))
+            returns_win.std(5, col['volatility_5'])
+            volatility_20 = returns_win.std(20, work('volatility_20'))
+            np.divide(col['volatility_5'], volatility_20, out=col['volatility_ratio'])
+            zscore(returns, returns_ma_20, volatility_20, col['returns_zscore'])
+            del returns_win
+            
+            volume_win = RollingWindows(volume)
+            volume_win.mean(5, col['volume_ma_5'])
+            volume_ma_20 = volume_win.mean(20, work('volume_ma_20'))
+            np.divide(volume, volume_ma_20, out=col['volume_ratio'])
+            zscore(volume, volume_ma_20, volume_win.std(20, std), col['volume_zscore'])
+            del volume_win
+            
+            close_win = RollingWindows(close)
+            sma_20 = close_win.mean(20, work('sma_20'))
+            close_win.mean(50, col['sma_50'])
+            np.divide(close, sma_20, out=col['price_to_sma20'])
+            np.divide(close, col['sma_50'], out=col['price_to_sma50'])
+            zscore(close, sma_20, close_win.std(20, std), col['price_zscore'])
+            del close_win
+            
+            # EMAs / MACD
+            ema_12 = ewma(close, 12, work('ema_12'))
+            ema_26 = ewma(close, 26, work('ema_26'))
+            macd = np.subtract(ema_12, ema_26, out=work('macd'))
+            ewma(macd, 9, col['macd_signal'])
+        
+        if compact:
+            for name, values in exact.items():
+                col[name][:] = values
+        
+        features = pd.DataFrame(block, index=df.index, columns=list(cls.FEATURE_COLUMNS), copy=False)
+        return extend(df, features, compact)
+    
     def extract_all_features(self, df: pd.DataFrame) -> pd.DataFrame:
         """Extract all features"""
-        df = df.copy()
-        df = self.calculate_returns(df)
-        df = self.calculate_volume_features(df)
-        df = self.calculate_volatility(df)
-        df = self.calculate_price_features(df)
-        df = self.calculate_z_scores(df)
-        return df
\ No newline at end of file
+        return self.calculate_all(df, self.compact)
\ No newline at end of file
@@ -0,0 +1,56 @@
+# backend/app/ml/frames.py
+"""Compact-dtype helpers for the analysis frames built by the ML engines."""
+from typing import Dict, Union
+
+import numpy as np
+import pandas as pd
+
+# pandas >= 3 shares data on concat lazily (copy-on-write) and deprecates copy=
+_SHARE = {} if int(pd.__version__.split('.')[0]) >= 3 else {'copy': False}
+
+INT32_MAX = np.iinfo(np.int32).max
+
+
+def float_dtype(compact: bool) -> type:
+    """Storage dtype for computed float columns (maths is still done in float64)"""
+    return np.float32 if compact else np.float64
+
+
+def compact_volume(volume: pd.Series) -> pd.Series:
+    """Volume as int32 when every value fits, otherwise unchanged"""
+    values = volume.to_numpy()
+    if values.dtype.kind not in 'iu' or len(values) == 0 or values.max() > INT32_MAX or values.min() < 0:
+        return volume
+    return pd.Series(values.astype(np.int32), index=volume.index, name=volume.name)
+
+
+def extend(df: pd.DataFrame, columns: Union[Dict[str, object], pd.DataFrame],
+           compact: bool = False) -> pd.DataFrame:
+    """
+    df's columns plus `columns`, as a new frame that does not copy df.
+
+    Float columns given as a dict are stored as float_dtype(compact); a
+    ready-made frame is used as is. With compact, an integer volume column
+    is narrowed to int32 as well. Same-named input columns are replaced.
+    The caller's frame is never modified.
+    """
+    if isinstance(columns, pd.DataFrame):
+        added = columns
+    else:
+        dtype = float_dtype(compact)
+        added = pd.DataFrame(
+            {name: _stored(values, dtype) for name, values in columns.items()},
+            index=df.index
+        )
+    replaced = [c for c in added.columns if c in df.columns]
+    base = df.drop(columns=replaced) if replaced else df.copy(deep=False)
+    if compact and 'volume' in base.columns:
+        base['volume'] = compact_volume(base['volume'])
+    return pd.concat([base, added], axis=1, **_SHARE)
+
+
+def _stored(values, dtype):
+    """Float arrays / Series cast to the storage dtype; anything else as is"""
+    if getattr(values, 'dtype', None) is not None and values.dtype.kind == 'f' and values.dtype != dtype:
+        return values.astype(dtype)
+    return values
@@ -0,0 +1,60 @@
+# backend/app/ml/labels.py
+"""Vectorized risk-level and anomaly-type labelling shared by the ML engines."""
+import pandas as pd
+import numpy as np
+
+RISK_LEVELS = ['Low', 'Medium', 'High']
+
+# Engine labels: first matching flag wins (price before volume)
+PRIORITY_TYPES = ['Normal', 'Price', 'Volume']
+
+# Multi-bar manipulation patterns found by PatternScanner
+PATTERN_TYPES = ['Pump and Dump', 'Ramping', 'Marking the Close', 'Compression Breakout']
+
+# RiskScorer labels: every raised flag is listed, in this order
+COMBINED_FLAGS = ['Price', 'Volume', 'ML Pattern']
+
+
+def _combined_categories():
+    categories = []
+    for code in range(2 ** len(COMBINED_FLAGS)):
+        names = [name for bit, name in enumerate(COMBINED_FLAGS) if code & (1 << bit)]
+        categories.append(', '.join(names) if names else 'Normal')
+    return categories
+
+
+COMBINED_TYPES = _combined_categories()
+
+
+def _flag(df: pd.DataFrame, column: str) -> np.ndarray:
+    """Boolean flag column as a NumPy mask (all False when absent)"""
+    if column not in df.columns:
+        return np.zeros(len(df), dtype=bool)
+    return df[column].fillna(False).to_numpy(dtype=bool)
+
+
+def risk_level(risk_score: pd.Series) -> pd.Categorical:
+    """Low (<30), Medium (30-70), High (>70); NaN scores are Low"""
+    score = risk_score.to_numpy(dtype=float)
+    codes = np.zeros(len(score), dtype=np.int8)
+    codes[(score >= 30) & (score <= 70)] = 1
+    codes[score > 70] = 2
+    return pd.Categorical.from_codes(codes, categories=RISK_LEVELS)
+
+
+def priority_anomaly_type(df: pd.DataFrame, price_col: str = 'price_anomaly_z',
+                          volume_col: str = 'volume_anomaly_z') -> pd.Categorical:
+    """'Price' if the price flag is set, else 'Volume' if the volume flag is set, else 'Normal'"""
+    price = _flag(df, price_col)
+    volume = _flag(df, volume_col)
+    codes = np.where(price, 1, np.where(volume, 2, 0)).astype(np.int8)
+    return pd.Categorical.from_codes(codes, categories=PRIORITY_TYPES)
+
+
+def combined_anomaly_type(df: pd.DataFrame) -> pd.Categorical:
+    """Comma-joined list of raised Price / Volume / ML Pattern flags, or 'Normal'"""
+    price = _flag(df, 'price_anomaly_z') | _flag(df, 'price_anomaly_iqr')
+    volume = _flag(df, 'volume_anomaly_z') | _flag(df, 'volume_anomaly_iqr')
+    ml = _flag(df, 'ml_anomaly_if')
+    codes = (price.astype(np.int8) | (volume.astype(np.int8) << 1) | (ml.astype(np.int8) << 2))
+    return pd.Categorical.from_codes(codes, categories=COMBINED_TYPES)
@@ -0,0 +1,149 @@
+# backend/app/ml/model_registry.py
+import os
+import re
+import json
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..config import settings
+from .detector import AnomalyDetector
+
+logger = logging.getLogger(__name__)
+
+
+class ModelRegistry:
+    """
+    Versioned store of fitted AnomalyDetector scaler + Isolation Forest pairs.
+
+    Models are keyed by symbol or peer group (e.g. "group:banks") and saved
+    under <root>/<key>/v<N>/ with a metadata.json. The most recently used
+    detectors stay loaded in memory so scoring skips both disk and fitting.
+    """
+
+    def __init__(self, root: str, hot_size: int = 64,
+                 max_age_days: int = 7, drift_threshold: float = 0.5,
+                 drift_window: int = 60):
+        self.root = root
+        self.hot_size = hot_size
+        self.max_age = timedelta(days=max_age_days)
+        self.drift_threshold = drift_threshold
+        self.drift_window = drift_window
+        self._hot: "OrderedDict[str, Tuple[AnomalyDetector, dict]]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _dirname(key: str) -> str:
+        return re.sub(r'[^A-Za-z0-9_.-]', '_', key)
+
+    def _key_dir(self, key: str) -> str:
+        return os.path.join(self.root, self._dirname(key))
+
+    def versions(self, key: str) -> List[dict]:
+        """Metadata of every stored version of a key, oldest first"""
+        key_dir = self._key_dir(key)
+        if not os.path.isdir(key_dir):
+            return []
+        found = []
+        for name in os.listdir(key_dir):
+            meta_path = os.path.join(key_dir, name, "metadata.json")
+            if name.startswith('v') and name[1:].isdigit() and os.path.exists(meta_path):
+                with open(meta_path) as fh:
+                    found.append(json.load(fh))
+        return sorted(found, key=lambda meta: meta['version'])
+
+    def latest(self, key: str) -> Optional[Tuple[AnomalyDetector, dict]]:
+        """Newest fitted detector and its metadata, from memory or disk"""
+        with self._lock:
+            if key in self._hot:
+                self._hot.move_to_end(key)
+                return self._hot[key]
+
+        stored = self.versions(key)
+        if not stored:
+            return None
+        metadata = stored[-1]
+        detector = AnomalyDetector(contamination=metadata['contamination'])
+        detector.load_model(os.path.join(self._key_dir(key), f"v{metadata['version']}"))
+        if not detector.is_fitted:
+            return None
+
+        self._remember(key, detector, metadata)
+        return detector, metadata
+
+    def register(self, key: str, detector: AnomalyDetector, n_samples: int,
+                 data_version: Optional[int] = None, symbol: Optional[str] = None,
+                 last_date: Optional[str] = None, checksum: Optional[str] = None) -> dict:
+        """
+        Persist a freshly fitted detector as the next version of key.
+
+        symbol / last_date / checksum (of the training feature rows) identify
+        the history it was trained on, so later runs over the same
+        (appended-to, otherwise unchanged) history can reuse its LOF scores.
+        """
+        with self._lock:
+            stored = self.versions(key)
+            version = stored[-1]['version'] + 1 if stored else 1
+            version_dir = os.path.join(self._key_dir(key), f"v{version}")
+            os.makedirs(version_dir, exist_ok=True)
+            detector.save_model(version_dir)
+
+            metadata = {
+                'key': key,
+                'version': version,
+                'trained_at': datetime.utcnow().isoformat(),
+                'n_samples': n_samples,
+                'data_version': data_version,
+                'symbol': symbol,
+                'last_date': last_date,
+                'checksum': checksum,
+                'contamination': detector.contamination
+            }
+            # metadata.json last: versions() ignores directories without it
+            with open(os.path.join(version_dir, "metadata.json"), 'w') as fh:
+                json.dump(metadata, fh)
+
+            self._remember(key, detector, metadata)
+        logger.info(f"Registered model {key} v{version} ({n_samples} samples)")
+        return metadata
+
+    def retrain_reason(self, detector: AnomalyDetector, metadata: dict,
+                       df: pd.DataFrame, contamination: float) -> Optional[str]:
+        """Why the stored model should be retrained before scoring df, or None"""
+        if metadata['contamination'] != contamination:
+            return 'contamination changed'
+
+        if detector.lof_train_scores is None:
+            return 'no LOF index'
+
+        trained_at = datetime.fromisoformat(metadata['trained_at'])
+        if datetime.utcnow() - trained_at > self.max_age:
+            return 'scheduled'
+
+        # Drift: recent bars should look standardized under the fitted scaler
+        recent = detector.prepare_features(df.tail(self.drift_window))
+        shift = float(np.abs(detector.scaler.transform(recent).mean(axis=0)).mean())
+        if shift > self.drift_threshold:
+            return f'drift ({shift:.2f})'
+
+        return None
+
+    def _remember(self, key: str, detector: AnomalyDetector, metadata: dict):
+        with self._lock:
+            self._hot[key] = (detector, metadata)
+            self._hot.move_to_end(key)
+            while len(self._hot) > self.hot_size:
+                self._hot.popitem(last=False)
+
+
+model_registry = ModelRegistry(
+    settings.MODEL_REGISTRY_DIR,
+    hot_size=settings.MODEL_REGISTRY_HOT_SIZE,
+    max_age_days=settings.MODEL_MAX_AGE_DAYS,
+    drift_threshold=settings.MODEL_DRIFT_THRESHOLD
+)
@@ -0,0 +1,225 @@
+# backend/app/ml/patterns.py
+from typing import Callable, Dict
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .labels import risk_level, PATTERN_TYPES
+
+PUMP_AND_DUMP, RAMPING, MARKING_THE_CLOSE, COMPRESSION_BREAKOUT = PATTERN_TYPES
+
+
+def _trailing(x: np.ndarray, window: int, reduce: Callable) -> np.ndarray:
+    """reduce() over x[t - window + 1 .. t] for every t (NaN until the window is full)"""
+    out = np.full(x.shape, np.nan)
+    if len(x) >= window:
+        out[window - 1:] = reduce(sliding_window_view(x, window, axis=0), axis=-1)
+    return out
+
+
+def _shift(x: np.ndarray, periods: int) -> np.ndarray:
+    """x[t - periods] at t (periods < 0 looks ahead), NaN where out of range"""
+    out = np.full(x.shape, np.nan)
+    if periods > 0:
+        out[periods:] = x[:-periods]
+    elif periods < 0:
+        out[:periods] = x[-periods:]
+    else:
+        out[:] = x
+    return out
+
+
+class PatternScanner:
+    """
+    Multi-bar manipulation patterns over dates x symbols OHLCV matrices.
+
+    Every statistic is a reduction over strided sliding-window views of the
+    whole matrix, so one scan covers every symbol and every bar without a
+    Python loop. A pattern fires on its trigger bar:
+
+    - Pump and Dump: a ramp of pump_bars bars (return >= pump_return) on a
+      volume surge (mean volume >= volume_surge x the preceding baseline),
+      followed within dump_bars by a collapse retracing >= dump_retrace of
+      the ramp. Triggers on the last bar of the ramp.
+    - Ramping: the same ramp shape with milder thresholds (ramp_return,
+      ramp_surge) and mostly up-closes, without a pump-and-dump nearby.
+    - Marking the Close: at least mark_count bars in mark_bars that close in
+      the top of their range and then open lower the next bar.
+    - Compression Breakout: the average range of the last squeeze_bars is
+      <= squeeze_ratio of the longer-run range, then a bar moves
+      >= breakout_z return standard deviations on volume_surge x volume.
+
+    Consecutive trigger bars of the same pattern are one hit, reported on
+    its strongest bar. Risk scores start at each pattern's base risk and
+    add up to 20 points for the strength past the thresholds.
+    """
+
+    BASE_RISK = {
+        PUMP_AND_DUMP: 80.0,
+        RAMPING: 55.0,
+        MARKING_THE_CLOSE: 60.0,
+        COMPRESSION_BREAKOUT: 45.0
+    }
+    BASELINE_BARS = 20
+    HIT_COLUMNS = ['date', 'symbol', 'id', 'anomaly_type', 'risk_score', 'risk_level',
+                   'price_move', 'volume_surge', 'price_zscore']
+
+    def __init__(self, pump_bars: int = 10, pump_return: float = 0.25, volume_surge: float = 3.0,
+                 dump_bars: int = 5, dump_retrace: float = 0.5,
+                 ramp_return: float = 0.15, ramp_surge: float = 2.0, ramp_up_ratio: float = 0.7,
+                 mark_bars: int = 10, mark_count: int = 3, mark_location: float = 0.9,
+                 mark_reversal: float = 0.01,
+                 squeeze_bars: int = 10, squeeze_window: int = 60, squeeze_ratio: float = 0.5,
+                 breakout_z: float = 3.0):
+        self.pump_bars = pump_bars
+        self.pump_return = pump_return
+        self.volume_surge = volume_surge
+        self.dump_bars = dump_bars
+        self.dump_retrace = dump_retrace
+        self.ramp_return = ramp_return
+        self.ramp_surge = ramp_surge
+        self.ramp_up_ratio = ramp_up_ratio
+        self.mark_bars = mark_bars
+        self.mark_count = mark_count
+        self.mark_location = mark_location
+        self.mark_reversal = mark_reversal
+        self.squeeze_bars = squeeze_bars
+        self.squeeze_window = squeeze_window
+        self.squeeze_ratio = squeeze_ratio
+        self.breakout_z = breakout_z
+
+    @property
+    def lookback(self) -> int:
+        """Bars of history a trigger bar's windows reach back over"""
+        return max(self.pump_bars + self.BASELINE_BARS, self.squeeze_window + 1,
+                   self.BASELINE_BARS + 1, self.mark_bars)
+
+    @staticmethod
+    def _strength(*ratios: np.ndarray) -> np.ndarray:
+        """0-20 risk points from how far each metric exceeds its threshold (ratio >= 1)"""
+        excess = sum(np.minimum(np.nan_to_num(r, nan=1.0, posinf=2.0), 2.0) - 1.0 for r in ratios) / len(ratios)
+        return 20.0 * np.clip(excess, 0.0, 1.0)
+
+    def _ramps(self, close: np.ndarray, volume: np.ndarray) -> Dict[str, np.ndarray]:
+        p, base = self.pump_bars, self.BASELINE_BARS
+        start = _shift(close, p)
+        ramp = close / start - 1
+        surge = _trailing(volume, p, np.mean) / _shift(_trailing(volume, base, np.mean), p)
+        up_ratio = _trailing((np.diff(close, axis=0, prepend=np.nan) > 0).astype(float), p, np.mean)
+
+        # Collapse after the ramp: lowest close of the next dump_bars against the ramp's peak
+        peak = _trailing(close, p, np.max)
+        trough = _shift(_trailing(close, self.dump_bars, np.min), -self.dump_bars)
+        retrace = (peak - trough) / (peak - start)
+
+        pump = (ramp >= self.pump_return) & (surge >= self.volume_surge) & (retrace >= self.dump_retrace)
+        # A ramp that ends in a dump is reported once, as the pump
+        near_pump = _shift(_trailing(pump.astype(float), 2 * p + 1, np.max), -p) > 0
+        ramping = (
+            (ramp >= self.ramp_return) & (surge >= self.ramp_surge)
+            & (up_ratio >= self.ramp_up_ratio) & ~pump & ~near_pump
+        )
+        return {
+            PUMP_AND_DUMP: np.where(pump, self.BASE_RISK[PUMP_AND_DUMP] + self._strength(
+                ramp / self.pump_return, surge / self.volume_surge, retrace / self.dump_retrace), np.nan),
+            RAMPING: np.where(ramping, self.BASE_RISK[RAMPING] + self._strength(
+                ramp / self.ramp_return, surge / self.ramp_surge), np.nan),
+            'price_move': ramp,
+            'volume_surge': surge
+        }
+
+    def _marking(self, open_: np.ndarray, high: np.ndarray, low: np.ndarray,
+                 close: np.ndarray) -> np.ndarray:
+        spread = high - low
+        location = np.divide(close - low, spread, out=np.full(close.shape, np.nan), where=spread > 0)
+        reversal = 1 - _shift(open_, -1) / close
+        marked = (location >= self.mark_location) & (reversal >= self.mark_reversal)
+        count = _trailing(marked.astype(float), self.mark_bars, np.sum)
+        return np.where(count >= self.mark_count, self.BASE_RISK[MARKING_THE_CLOSE] + self._strength(
+            count / self.mark_count), np.nan)
+
+    def _breakouts(self, high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                   volume: np.ndarray) -> Dict[str, np.ndarray]:
+        base = self.BASELINE_BARS
+        range_pct = (high - low) / close
+        # Ranges and return stats up to the bar before the breakout
+        squeeze = _shift(_trailing(range_pct, self.squeeze_bars, np.mean)
+                         / _trailing(range_pct, self.squeeze_window, np.mean), 1)
+        returns = close / _shift(close, 1) - 1
+        sigma = _shift(_trailing(returns, base, lambda w, axis: np.std(w, axis=axis, ddof=1)), 1)
+        move_z = np.abs(returns) / sigma
+        surge = volume / _shift(_trailing(volume, base, np.mean), 1)
+
+        breakout = (squeeze <= self.squeeze_ratio) & (move_z >= self.breakout_z) & (surge >= self.volume_surge)
+        return {
+            COMPRESSION_BREAKOUT: np.where(breakout, self.BASE_RISK[COMPRESSION_BREAKOUT] + self._strength(
+                self.squeeze_ratio / squeeze, move_z / self.breakout_z, surge / self.volume_surge), np.nan),
+            'price_move': returns,
+            'volume_surge': surge,
+            'price_zscore': move_z
+        }
+
+    def scan(self, open_: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray,
+             volume: np.ndarray) -> Dict[str, Dict[str, np.ndarray]]:
+        """Per pattern: risk score matrix (NaN where it does not fire) and its supporting metrics"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ramps = self._ramps(close, volume)
+            breakouts = self._breakouts(high, low, close, volume)
+            marking = self._marking(open_, high, low, close)
+
+        # Patterns only fire on bars that exist
+        absent = np.isnan(close)
+        ramp_metrics = {'price_move': ramps['price_move'], 'volume_surge': ramps['volume_surge']}
+        return {
+            PUMP_AND_DUMP: {'risk_score': np.where(absent, np.nan, ramps[PUMP_AND_DUMP]), **ramp_metrics},
+            RAMPING: {'risk_score': np.where(absent, np.nan, ramps[RAMPING]), **ramp_metrics},
+            MARKING_THE_CLOSE: {'risk_score': np.where(absent, np.nan, marking)},
+            COMPRESSION_BREAKOUT: {
+                'risk_score': np.where(absent, np.nan, breakouts[COMPRESSION_BREAKOUT]),
+                'price_move': breakouts['price_move'],
+                'volume_surge': breakouts['volume_surge'],
+                'price_zscore': breakouts['price_zscore']
+            }
+        }
+
+    @staticmethod
+    def hits(dates: np.ndarray, symbols: np.ndarray, ids: np.ndarray,
+             result: Dict[str, Dict[str, np.ndarray]]) -> pd.DataFrame:
+        """
+        One row per hit, highest risk first.
+
+        Runs of consecutive trigger bars (same symbol and pattern) collapse
+        to their highest-risk bar; ids are the trigger bars' stock_data ids.
+        """
+        frames = []
+        for pattern, metrics in result.items():
+            rows, cols = np.nonzero(~np.isnan(metrics['risk_score']))
+            frames.append(pd.DataFrame({
+                'row': rows,
+                'col': cols,
+                'anomaly_type': pattern,
+                **{name: values[rows, cols] for name, values in metrics.items()}
+            }))
+        frame = pd.concat(frames, ignore_index=True)
+        for column in ('price_move', 'volume_surge', 'price_zscore'):
+            if column not in frame:
+                frame[column] = np.nan
+
+        if len(frame):
+            frame = frame.sort_values(['col', 'anomaly_type', 'row'], kind='stable', ignore_index=True)
+            new_run = (
+                (frame['row'].diff() != 1)
+                | (frame['col'] != frame['col'].shift())
+                | (frame['anomaly_type'] != frame['anomaly_type'].shift())
+            )
+            frame = frame.loc[frame.groupby(new_run.cumsum())['risk_score'].idxmax()]
+
+        rows = frame['row'].to_numpy(dtype=np.int64)
+        cols = frame['col'].to_numpy(dtype=np.int64)
+        frame = frame.assign(date=dates[rows], symbol=symbols[cols], id=ids[rows, cols].astype(np.int64))
+        frame['risk_level'] = risk_level(frame['risk_score'])
+        frame['anomaly_type'] = pd.Categorical(frame['anomaly_type'], categories=PATTERN_TYPES)
+        return frame[PatternScanner.HIT_COLUMNS].sort_values(
+            ['risk_score', 'date'], ascending=[False, False], kind='stable', ignore_index=True
+        )
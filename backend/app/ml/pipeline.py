@@ -0,0 +1,245 @@
+# backend/app/ml/pipeline.py
+import hashlib
+import json
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ..config import settings
+from .features import FeatureEngine
+from .detector import AnomalyDetector
+from .risk_scorer import RiskScorer
+from .feature_store import FeatureStore
+from .model_registry import ModelRegistry
+
+# Bump when the feature formulas in FeatureEngine change
+FEATURE_SET_VERSION = 3
+
+
+class FeatureStage:
+    """Feature extraction stage backed by FeatureEngine"""
+
+    name = 'features'
+    STEPS = [
+        'calculate_returns',
+        'calculate_volume_features',
+        'calculate_volatility',
+        'calculate_price_features',
+        'calculate_z_scores'
+    ]
+
+    def __init__(self, steps: Optional[List[str]] = None, compact: bool = settings.COMPACT_FRAMES):
+        self.engine = FeatureEngine(compact)
+        self.steps = steps or list(self.STEPS)
+
+    def params(self) -> dict:
+        params = {'version': FEATURE_SET_VERSION, 'steps': self.steps}
+        if self.engine.compact:
+            # Stored float32 frames must not be served to full-precision runs
+            params['compact'] = True
+        return params
+
+    def feature_hash(self) -> str:
+        payload = json.dumps(self.params(), sort_keys=True).encode()
+        return hashlib.sha1(payload).hexdigest()[:12]
+
+    def run(self, df: pd.DataFrame) -> pd.DataFrame:
+        if self.steps == self.STEPS:
+            return self.engine.extract_all_features(df)
+        df = df.copy()
+        for step in self.steps:
+            df = getattr(self.engine, step)(df)
+        return df
+
+
+class DetectionStage:
+    """
+    Statistical + ML detection stage backed by AnomalyDetector.
+
+    With a model registry and key, the stored scaler / Isolation Forest for
+    that key only scores the rows; it is retrained (and registered as a new
+    version) when missing, forced, out of date or drifted. A shared model
+    (e.g. a peer group's) is retrained on pooled_history(), the feature frame
+    of every series it serves, never on the requesting symbol's rows alone.
+    """
+
+    name = 'detection'
+
+    def __init__(self, contamination: float = settings.ANOMALY_CONTAMINATION,
+                 price_threshold: float = 3.0, volume_threshold: float = 2.0,
+                 registry: Optional[ModelRegistry] = None, model_key: Optional[str] = None,
+                 retrain: bool = False,
+                 pooled_history: Optional[Callable[[], pd.DataFrame]] = None):
+        self.contamination = contamination
+        self.price_threshold = price_threshold
+        self.volume_threshold = volume_threshold
+        self.registry = registry
+        self.model_key = model_key
+        self.retrain = retrain
+        self.pooled_history = pooled_history
+        self.model_info: Optional[dict] = None
+
+    def params(self) -> dict:
+        return {
+            'contamination': self.contamination,
+            'price_threshold': self.price_threshold,
+            'volume_threshold': self.volume_threshold
+        }
+
+    def _new_detector(self) -> AnomalyDetector:
+        return AnomalyDetector(
+            contamination=self.contamination,
+            n_jobs=settings.ML_N_JOBS,
+            lof_max_samples=settings.LOF_MAX_SAMPLES or None
+        )
+
+    @staticmethod
+    def _checksum(detector: AnomalyDetector, df: pd.DataFrame) -> str:
+        """Digest of the model inputs of df's rows"""
+        return hashlib.sha1(np.ascontiguousarray(detector.prepare_features(df)).tobytes()).hexdigest()
+
+    @classmethod
+    def _fitted_rows(cls, detector: AnomalyDetector, df: pd.DataFrame,
+                     metadata: dict, symbol: Optional[str]) -> int:
+        """How many leading rows of df the stored model was trained on (0 if not its unchanged history)"""
+        n_samples = metadata['n_samples']
+        if symbol is None or metadata.get('symbol') != symbol or len(df) < n_samples:
+            return 0
+        if str(df['date'].iloc[n_samples - 1]) != metadata.get('last_date'):
+            return 0
+        # Bars corrected in place keep the dates but not the stored LOF scores
+        if metadata.get('checksum') != cls._checksum(detector, df.iloc[:n_samples]):
+            return 0
+        return n_samples
+
+    def _detector(self, df: pd.DataFrame, symbol: Optional[str],
+                  data_version: Optional[int]) -> Tuple[AnomalyDetector, bool, int]:
+        """Registry detector for model_key, retrained if needed; whether it is fitted; its fitted rows in df"""
+        stored = None if self.retrain else self.registry.latest(self.model_key)
+        if stored is None:
+            reason = 'requested' if self.retrain else 'no model'
+        else:
+            detector, metadata = stored
+            reason = self.registry.retrain_reason(detector, metadata, df, self.contamination)
+            if reason is None:
+                self.model_info = {**metadata, 'retrained': False}
+                return detector, True, self._fitted_rows(detector, df, metadata, symbol)
+
+        detector = self._new_detector()
+        pooled = self.pooled_history is not None
+        train = self.pooled_history() if pooled else df
+        if len(train) <= 10:  # Too few rows to train; detect_all skips the ML models
+            self.model_info = None
+            return detector, False, 0
+
+        detector.fit(train)
+        if pooled:
+            # Not any one symbol's history or data version, so no LOF scores carry over to df
+            metadata = self.registry.register(self.model_key, detector, len(train))
+        else:
+            metadata = self.registry.register(
+                self.model_key, detector, len(train), data_version,
+                symbol=symbol, last_date=str(train['date'].iloc[-1]),
+                checksum=self._checksum(detector, train)
+            )
+        self.model_info = {**metadata, 'retrained': True, 'reason': reason}
+        return detector, True, 0 if pooled else len(train)
+
+    def run(self, df: pd.DataFrame, symbol: Optional[str] = None,
+            data_version: Optional[int] = None) -> pd.DataFrame:
+        if self.registry is None or self.model_key is None:
+            detector, fitted, fitted_rows = self._new_detector(), False, 0
+        else:
+            detector, fitted, fitted_rows = self._detector(df, symbol, data_version)
+        return detector.detect_all(
+            df, price_threshold=self.price_threshold, volume_threshold=self.volume_threshold,
+            refit=not fitted, fitted_rows=fitted_rows
+        )
+
+
+class ScoringStage:
+    """Risk scoring stage backed by RiskScorer"""
+
+    name = 'scoring'
+
+    def __init__(self, weights: Optional[Dict[str, float]] = None):
+        self.scorer = RiskScorer()
+        if weights:
+            self.scorer.weights.update(weights)
+
+    def params(self) -> dict:
+        return {'weights': dict(self.scorer.weights)}
+
+    def run(self, df: pd.DataFrame) -> pd.DataFrame:
+        return self.scorer.calculate_risk_score(df)
+
+
+class AnalysisPipeline:
+    """
+    Features -> detection -> scoring, with per-stage timings.
+
+    When a symbol and its data version are given, the feature frame is read
+    from / written to the feature store, so re-scoring the same data with
+    different detector or scorer settings skips feature extraction.
+    """
+
+    def __init__(self, feature_stage: Optional[FeatureStage] = None,
+                 detection_stage: Optional[DetectionStage] = None,
+                 scoring_stage: Optional[ScoringStage] = None,
+                 store: Optional[FeatureStore] = None):
+        self.feature_stage = feature_stage or FeatureStage()
+        self.detection_stage = detection_stage or DetectionStage()
+        self.scoring_stage = scoring_stage or ScoringStage()
+        self.store = store
+
+    def features(self, df: pd.DataFrame, symbol: Optional[str] = None,
+                 data_version: Optional[int] = None) -> Tuple[pd.DataFrame, bool]:
+        """Feature frame for df, and whether it came from the store"""
+        cacheable = self.store is not None and symbol is not None and data_version is not None
+        feature_hash = self.feature_stage.feature_hash()
+
+        if cacheable:
+            cached = self.store.get(symbol, data_version, feature_hash)
+            if cached is not None:
+                return cached, True
+
+        features = self.feature_stage.run(df)
+        if cacheable:
+            self.store.put(symbol, data_version, feature_hash, features)
+        return features, False
+
+    def run(self, df: pd.DataFrame, symbol: Optional[str] = None,
+            data_version: Optional[int] = None) -> Tuple[pd.DataFrame, dict]:
+        timings = {}
+
+        start = time.perf_counter()
+        features, cache_hit = self.features(df, symbol, data_version)
+        timings[self.feature_stage.name] = (time.perf_counter() - start) * 1000
+
+        # Detection only adds columns, so a shallow copy keeps the stored frame pristine
+        start = time.perf_counter()
+        detected = self.detection_stage.run(features.copy(deep=False), symbol, data_version)
+        timings[self.detection_stage.name] = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        scored = self.scoring_stage.run(detected)
+        timings[self.scoring_stage.name] = (time.perf_counter() - start) * 1000
+
+        report = {
+            'feature_hash': self.feature_stage.feature_hash(),
+            'feature_cache': 'hit' if cache_hit else 'miss',
+            'timings_ms': {stage: round(ms, 3) for stage, ms in timings.items()},
+            'params': {
+                self.feature_stage.name: self.feature_stage.params(),
+                self.detection_stage.name: self.detection_stage.params(),
+                self.scoring_stage.name: self.scoring_stage.params()
+            }
+        }
+        if self.detection_stage.model_info is not None:
+            report['model'] = self.detection_stage.model_info
+        return scored, report
+
+
+feature_store = FeatureStore(settings.FEATURE_STORE_DIR)
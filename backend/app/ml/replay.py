@@ -0,0 +1,103 @@
+# backend/app/ml/replay.py
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from . import MarketSurveillanceEngine
+
+TRADING_DAYS = 252
+
+
+class ReplayEngine:
+    """
+    Point-in-time replay of the surveillance engine over a symbol's history.
+
+    MarketSurveillanceEngine.analyze scores every bar against full-history
+    means, i.e. with look-ahead. The replay instead walks the history in
+    time order, chunk by chunk, through analyze_incremental, carrying its
+    rolling state forward: each bar is scored only against the bars up to
+    and including it, exactly as a daily incremental run would have scored
+    it. The result is independent of chunk_size, which only bounds the
+    working set; the whole replay is O(bars).
+    """
+
+    def __init__(self, engine: Optional[MarketSurveillanceEngine] = None,
+                 chunk_size: int = 10 * TRADING_DAYS, warmup: int = 20):
+        self.engine = engine or MarketSurveillanceEngine()
+        self.chunk_size = chunk_size
+        # Bars needed before the running z-scores are trusted to raise alerts
+        self.warmup = warmup
+
+    @staticmethod
+    def empty_state() -> Dict:
+        """Rolling state before the first bar"""
+        return {
+            'count': 0,
+            'close_mean': 0.0,
+            'close_m2': 0.0,
+            'volume_mean': 0.0,
+            'volume_m2': 0.0,
+            'tail_close': [],
+            'tail_volume': []
+        }
+
+    def replay(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Point-in-time scores for a date-ordered OHLCV frame.
+
+        Adds the engine's columns plus 'alert' (is_anomaly once past the
+        warm-up) and 'hindsight_anomaly' (what a full-history analyze flags
+        on the same bar), so the two can be compared.
+        """
+        state = self.empty_state()
+        chunks = []
+        for start in range(0, len(df), self.chunk_size):
+            scored, state = self.engine.analyze_incremental(df.iloc[start:start + self.chunk_size], state)
+            chunks.append(scored)
+        replayed = pd.concat(chunks) if chunks else self.engine.analyze(df)
+
+        replayed['alert'] = replayed['is_anomaly'].to_numpy() & (np.arange(len(replayed)) >= self.warmup)
+        replayed['hindsight_anomaly'] = self.engine.analyze(df)['is_anomaly'].to_numpy()
+        return replayed
+
+    @staticmethod
+    def alert_metrics(replayed: pd.DataFrame, max_lag: int = 5) -> Dict:
+        """
+        Alert timing of a replay against the hindsight flags.
+
+        A hindsight anomaly counts as detected if a point-in-time alert fires
+        on it or within max_lag bars after it; lag is measured in bars.
+        """
+        alerts = np.flatnonzero(replayed['alert'].to_numpy())
+        hindsight = np.flatnonzero(replayed['hindsight_anomaly'].to_numpy())
+        confirmed = np.intersect1d(alerts, hindsight, assume_unique=True)
+
+        # Bars from each hindsight anomaly to the next alert at or after it
+        nxt = np.searchsorted(alerts, hindsight)
+        lag = np.full(len(hindsight), np.inf)
+        has_next = nxt < len(alerts)
+        lag[has_next] = alerts[nxt[has_next]] - hindsight[has_next]
+        detected = lag[lag <= max_lag]
+
+        # Episodes: runs of alerts on consecutive bars
+        episodes = int(np.count_nonzero(np.diff(alerts) > 1)) + 1 if len(alerts) else 0
+        dates = replayed['date'].to_numpy()
+        years = len(replayed) / TRADING_DAYS
+
+        return {
+            'bars': len(replayed),
+            'alerts': len(alerts),
+            'hindsight_anomalies': len(hindsight),
+            'confirmed_alerts': len(confirmed),
+            'precision': round(len(confirmed) / len(alerts), 4) if len(alerts) else None,
+            'recall': round(len(detected) / len(hindsight), 4) if len(hindsight) else None,
+            'missed': len(hindsight) - len(detected),
+            'mean_lag_bars': round(float(detected.mean()), 2) if len(detected) else None,
+            'max_lag_bars': int(detected.max()) if len(detected) else None,
+            'episodes': episodes,
+            'mean_episode_bars': round(len(alerts) / episodes, 2) if episodes else None,
+            'alerts_per_year': round(len(alerts) / years, 2) if years else None,
+            'first_alert': str(dates[alerts[0]]) if len(alerts) else None,
+            'last_alert': str(dates[alerts[-1]]) if len(alerts) else None
+        }
@@ -1,5 +1,6 @@
 import pandas as pd
 import numpy as np
+from .labels import risk_level, combined_anomaly_type
 
 class RiskScorer:
     """Calculate risk scores based on anomaly detections"""
@@ -52,27 +53,10 @@ class RiskScorer:
         ).clip(0, 100)
         
         # Risk level classification
-        conditions = [
-            df['risk_score'] < 30,
-            df['risk_score'].between(30, 70),
-            df['risk_score'] > 70
-        ]
-        choices = ['Low', 'Medium', 'High']
-        df['risk_level'] = np.select(conditions, choices, default='Low')
+        df['risk_level'] = risk_level(df['risk_score'])
         
         # Anomaly type classification
-        anomaly_types = []
-        for idx, row in df.iterrows():
-            types = []
-            if row.get('price_anomaly_z', False) or row.get('price_anomaly_iqr', False):
-                types.append('Price')
-            if row.get('volume_anomaly_z', False) or row.get('volume_anomaly_iqr', False):
-                types.append('Volume')
-            if row.get('ml_anomaly_if', False):
-                types.append('ML Pattern')
-            anomaly_types.append(', '.join(types) if types else 'Normal')
-        
-        df['anomaly_type'] = anomaly_types
+        df['anomaly_type'] = combined_anomaly_type(df)
         
         return df
     
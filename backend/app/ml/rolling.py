@@ -0,0 +1,145 @@
+# backend/app/ml/rolling.py
+from typing import Optional
+
+import numpy as np
+from scipy.signal import lfilter
+
+# A window whose std is within this fraction of its mean (plus a tiny absolute
+# floor for near-zero series) counts as flat: pandas' online variance leaves
+# a window of identical values with a std of ~1e-7 of its mean after long
+# histories, where the prefix sums give exactly 0
+FLAT_STD_RTOL = 1e-6
+FLAT_STD_ATOL = 1e-12
+
+
+class RollingWindows:
+    """
+    Trailing-window means and sample stds of one series from shared prefix sums.
+
+    The series is scanned once to build prefix sums of x and x^2; every
+    window length is then a few array differences, written into caller-owned
+    buffers. Semantics match pandas .rolling(w).mean()/.std(): a window with
+    a NaN, or fewer than w bars, yields NaN, and a window of identical values
+    has a std of exactly 0.
+
+    To keep sum(x^2) - sum(x)^2/n accurate on million-bar histories, the
+    prefix sums restart every `block` bars and are taken around the block's
+    mean; a window spanning two blocks is re-centred before combining them.
+    """
+
+    def __init__(self, values: np.ndarray, block: int = 4096):
+        x = np.asarray(values, dtype=np.float64)
+        n = len(x)
+        self.n = n
+        self.block = block = min(block, max(n, 1))
+        nblocks = -(-n // block) if n else 1
+
+        padded = np.zeros(nblocks * block)
+        padded[:n] = x
+        blocks = padded.reshape(nblocks, block)
+        missing = np.isnan(blocks)
+        self.has_nan = bool(missing.any())
+        if self.has_nan:
+            blocks[missing] = 0.0
+        counts = np.full(nblocks, float(block))
+        counts[-1] -= nblocks * block - n
+        if self.has_nan:
+            counts -= missing.sum(axis=1)
+        self.centre = np.divide(blocks.sum(axis=1), counts, out=np.zeros(nblocks), where=counts > 0)
+        blocks -= self.centre[:, None]
+        if self.has_nan:
+            blocks[missing] = 0.0
+
+        # Per-block exclusive prefix sums: column k holds the sum of the first k bars
+        self.sum1 = np.zeros((nblocks, block + 1))
+        self.sum2 = np.zeros((nblocks, block + 1))
+        np.cumsum(blocks, axis=1, out=self.sum1[:, 1:])
+        np.square(blocks, out=blocks)
+        np.cumsum(blocks, axis=1, out=self.sum2[:, 1:])
+
+        if self.has_nan:
+            self.nans = np.zeros(n + 1, dtype=np.int64)
+            np.cumsum(np.isnan(x), out=self.nans[1:])
+
+        # Length of the run of equal values ending at each bar
+        index = np.arange(n)
+        starts = np.zeros(n, dtype=np.int64)
+        if n > 1:
+            np.multiply(x[1:] != x[:-1], index[1:], out=starts[1:])
+        self.run_length = index - np.maximum.accumulate(starts) + 1
+
+    def _window_sums(self, prefix: np.ndarray, window: int) -> np.ndarray:
+        """Windowed sums around each block's centre, laid out as (blocks, block)"""
+        sums = np.empty((prefix.shape[0], self.block))
+        np.subtract(prefix[:, window:], prefix[:, :self.block + 1 - window], out=sums[:, window - 1:])
+        sums[0, :window - 1] = np.nan
+        # Ends near a block start: head of this block plus tail of the previous one
+        tail = prefix[:-1, self.block:] - prefix[:-1, self.block + 1 - window:self.block]
+        np.add(prefix[1:, 1:window], tail, out=sums[1:, :window - 1])
+        return sums
+
+    def _recentre(self, window: int, s1: np.ndarray, s2: Optional[np.ndarray] = None):
+        """Shift the previous block's share of boundary-spanning windows onto this block's centre"""
+        block = self.block
+        count = np.arange(window - 1, 0, -1, dtype=np.float64)
+        delta = (self.centre[:-1] - self.centre[1:])[:, None]
+        if s2 is not None:
+            rest1 = self.sum1[:-1, block:] - self.sum1[:-1, block + 1 - window:block]
+            s2[1:, :window - 1] += 2 * delta * rest1 + count * delta * delta
+        s1[1:, :window - 1] += count * delta
+
+    def _finish(self, window: int, body: np.ndarray, out: np.ndarray) -> np.ndarray:
+        out[:] = body.ravel()[:self.n]
+        if self.has_nan:
+            out[window - 1:][(self.nans[window:] - self.nans[:-window]) > 0] = np.nan
+        return out
+
+    def _check(self, window: int, out: np.ndarray) -> bool:
+        if window > self.n:
+            out[:] = np.nan
+            return False
+        if window > self.block:
+            raise ValueError(f"Window {window} exceeds the prefix-sum block of {self.block} bars")
+        return True
+
+    def mean(self, window: int, out: np.ndarray) -> np.ndarray:
+        if not self._check(window, out):
+            return out
+        s1 = self._window_sums(self.sum1, window)
+        self._recentre(window, s1)
+        s1 /= window
+        s1 += self.centre[:, None]
+        return self._finish(window, s1, out)
+
+    def std(self, window: int, out: np.ndarray) -> np.ndarray:
+        if not self._check(window, out):
+            return out
+        s1 = self._window_sums(self.sum1, window)
+        s2 = self._window_sums(self.sum2, window)
+        self._recentre(window, s1, s2)
+        np.square(s1, out=s1)
+        s1 /= window
+        s2 -= s1
+        s2 /= window - 1
+        np.maximum(s2, 0.0, out=s2)
+        np.sqrt(s2, out=s2)
+        # Runs of equal values can't include a NaN, so this never unmasks one
+        s2.ravel()[:self.n][self.run_length >= window] = 0.0
+        return self._finish(window, s2, out)
+
+
+def zscore(values: np.ndarray, mean: np.ndarray, std: np.ndarray, out: np.ndarray) -> np.ndarray:
+    """(values - mean) / std, or 0 in flat windows (see FLAT_STD_RTOL)"""
+    np.subtract(values, mean, out=out)
+    np.divide(out, std, out=out)
+    out[std <= FLAT_STD_RTOL * np.abs(mean) + FLAT_STD_ATOL] = 0.0
+    return out
+
+
+def ewma(values: np.ndarray, span: int, out: np.ndarray) -> np.ndarray:
+    """Equivalent of pandas .ewm(span=span, adjust=False).mean() for NaN-free input"""
+    alpha = 2.0 / (span + 1.0)
+    if len(values) == 0:
+        return out
+    out[:] = lfilter([alpha], [1.0, alpha - 1.0], values, zi=[(1.0 - alpha) * values[0]])[0]
+    return out
@@ -0,0 +1,287 @@
+# backend/app/ml/similarity.py
+import os
+import glob
+import json
+import shutil
+import logging
+import threading
+from datetime import date
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy.fft import rfft, irfft, next_fast_len
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+FEATURES = ('return', 'volume')
+
+
+class EpisodeIndex:
+    """
+    Similarity index over the return / volume shape of every series.
+
+    The universe is held as dates x symbols matrices of log returns and log
+    volumes, centred per symbol. Building the index precomputes what a query
+    does not change: the real FFT of each column and cumulative sums (plus
+    sums of squares and valid-bar counts) for O(1) rolling means and
+    standard deviations of any window length.
+
+    A query is one row of an AB-join matrix profile (the MASS / STOMP
+    kernel): the sliding dot products of the z-normalised query against
+    every window of every symbol come from a single inverse FFT of
+    spectrum x query spectrum, and turn into z-normalised Euclidean
+    distances using the rolling statistics. Return and volume distances are
+    summed. Windows with missing bars or no variance are never matched, and
+    matches overlapping a better match of the same symbol (trivial matches)
+    are dropped.
+    """
+
+    ARRAYS = ('dates', 'symbols', 'offsets', 'count') + tuple(
+        f"{name}_{feature}" for feature in FEATURES for name in ('spectrum', 'sum', 'sumsq')
+    )
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self.arrays = arrays
+        self.dates = arrays['dates']
+        self.symbols = arrays['symbols']
+        self._columns = {symbol: i for i, symbol in enumerate(self.symbols)}
+
+    @classmethod
+    def build(cls, dates: np.ndarray, symbols: np.ndarray, close: np.ndarray,
+              volume: np.ndarray) -> "EpisodeIndex":
+        """Index dates x symbols close / volume matrices (NaN where a symbol has no bar)"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            series = {
+                'return': np.diff(np.log(close), axis=0, prepend=np.nan),
+                'volume': np.log1p(volume)
+            }
+        valid = np.isfinite(series['return']) & np.isfinite(series['volume'])
+        length = next_fast_len(len(dates), real=True)
+
+        arrays = {
+            'dates': np.asarray(dates, dtype='datetime64[D]'),
+            'symbols': np.asarray(symbols, dtype=str),
+            'count': np.concatenate([
+                np.zeros((1, valid.shape[1]), dtype=np.int32), np.cumsum(valid, axis=0, dtype=np.int32)
+            ])
+        }
+        offsets = []
+        for feature, values in series.items():
+            # Centring keeps the running sums of squares well conditioned
+            offset = np.nanmean(np.where(valid, values, np.nan), axis=0) if valid.any() else np.zeros(valid.shape[1])
+            offset = np.nan_to_num(offset)
+            centred = np.where(valid, values - offset, 0.0)
+            zero = np.zeros((1, centred.shape[1]))
+            arrays[f'spectrum_{feature}'] = rfft(centred, n=length, axis=0, workers=-1)
+            arrays[f'sum_{feature}'] = np.concatenate([zero, np.cumsum(centred, axis=0)])
+            arrays[f'sumsq_{feature}'] = np.concatenate([zero, np.cumsum(centred ** 2, axis=0)])
+            offsets.append(offset)
+        arrays['offsets'] = np.stack(offsets)
+        return cls(arrays)
+
+    def save(self, path: str):
+        os.makedirs(path, exist_ok=True)
+        for name in self.ARRAYS:
+            np.save(os.path.join(path, f"{name}.npy"), self.arrays[name])
+
+    @classmethod
+    def load(cls, path: str) -> "EpisodeIndex":
+        """Memory-map a saved index; pages are read as queries touch them"""
+        return cls({name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r') for name in cls.ARRAYS})
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return len(self.dates), len(self.symbols)
+
+    def _window_sigma(self, feature: str, m: int) -> np.ndarray:
+        """Standard deviation of every length-m window (windows x symbols)"""
+        s1 = self.arrays[f'sum_{feature}']
+        s2 = self.arrays[f'sumsq_{feature}']
+        mean = np.subtract(s1[m:], s1[:-m])
+        mean /= m
+        var = np.subtract(s2[m:], s2[:-m])
+        var /= m
+        var -= np.square(mean, out=mean)
+        return np.sqrt(np.maximum(var, 0.0, out=var), out=var)
+
+    def distance_profile(self, column: int, first: int, m: int) -> Dict[str, np.ndarray]:
+        """
+        Z-normalised distances of the window [first, first + m) of a column to
+        every window of every symbol, per feature and combined.
+        """
+        length = next_fast_len(len(self.dates), real=True)
+        count = self.arrays['count']
+        unusable = (count[m:] - count[:-m]) != m
+
+        profile = {}
+        total = np.zeros(unusable.shape)
+        for feature in FEATURES:
+            s1 = self.arrays[f'sum_{feature}']
+            # The query, rebuilt from the running sums, then z-normalised
+            query = np.diff(s1[first:first + m + 1, column])
+            sigma = query.std()
+            if not sigma > 0:
+                raise ValueError(f"The query window has constant {feature}; nothing to match on")
+            query = (query - query.mean()) / sigma
+
+            # Sliding dot products of the query with every window: row i is window [i, i + m)
+            product = self.arrays[f'spectrum_{feature}'] * rfft(query[::-1], n=length)[:, None]
+            corr = irfft(product, n=length, axis=0, workers=-1)[m - 1:len(self.dates)]
+            window_sigma = self._window_sigma(feature, m)
+            flat = window_sigma <= 1e-12
+            window_sigma *= m
+            with np.errstate(divide='ignore', invalid='ignore'):
+                corr /= window_sigma
+            np.clip(corr, -1.0, 1.0, out=corr)
+            corr[unusable | flat] = np.nan
+            profile[f'{feature}_corr'] = corr
+            # Squared z-normalised distance: 2m(1 - correlation)
+            total += 1 - corr
+        total *= 2 * m
+        np.nan_to_num(total, copy=False, nan=np.inf)
+        profile['distance'] = np.sqrt(total, out=total)
+        return profile
+
+    def query(self, symbol: str, start: date, end: date, k: int = 10,
+              past_only: bool = False) -> Tuple[Dict, pd.DataFrame]:
+        """
+        The k nearest episodes to symbol's bars in [start, end].
+
+        Windows of the query symbol overlapping the query are excluded;
+        past_only also excludes every window that ends on or after the
+        query's first date. Returns the query description
+        and one row per match, nearest first.
+        """
+        column = self._columns.get(symbol)
+        if column is None:
+            raise LookupError(f"No data indexed for {symbol}")
+        first, last = np.searchsorted(self.dates, [np.datetime64(start, 'D'), np.datetime64(end, 'D')])
+        last = last if last < len(self.dates) and self.dates[last] == np.datetime64(end, 'D') else last - 1
+        m = int(last - first + 1)
+        count = self.arrays['count'][:, column]
+        if m < 3:
+            raise ValueError("The query window needs at least 3 bars")
+        if count[last + 1] - count[first] != m:
+            raise ValueError(f"{symbol} has missing bars between {start} and {end}")
+
+        profile = self.distance_profile(column, first, m)
+        distance = profile['distance']
+        distance[max(0, first - m + 1):last + 1, column] = np.inf
+        if past_only:
+            distance[max(0, first - m + 1):] = np.inf
+
+        matches = self._top_k(distance, k, exclusion=max(1, m // 2))
+        rows, cols = matches[:, 0], matches[:, 1]
+        episode = self._returns(cols, rows, m)
+        forward = self._returns(cols, rows + m, m)
+
+        results = pd.DataFrame({
+            'symbol': self.symbols[cols],
+            'start_date': self.dates[rows],
+            'end_date': self.dates[rows + m - 1],
+            'distance': distance[rows, cols],
+            'return_corr': profile['return_corr'][rows, cols],
+            'volume_corr': profile['volume_corr'][rows, cols],
+            'episode_return': episode,
+            'next_return': forward
+        })
+        described = {
+            'symbol': symbol,
+            'start_date': str(self.dates[first]),
+            'end_date': str(self.dates[last]),
+            'bars': m,
+            'episode_return': float(self._returns(np.array([column]), np.array([first]), m)[0]),
+            'searched_windows': int(np.isfinite(distance).sum())
+        }
+        return described, results
+
+    def _top_k(self, distance: np.ndarray, k: int, exclusion: int) -> np.ndarray:
+        """(row, column) of the k smallest distances, skipping trivial matches"""
+        finite = int(np.isfinite(distance).sum())
+        # Each kept match suppresses at most 2 * exclusion + 1 of the candidates
+        n_candidates = min(finite, k * (2 * exclusion + 1))
+        if n_candidates == 0:
+            return np.zeros((0, 2), dtype=np.int64)
+        flat = distance.ravel()
+        candidates = np.argpartition(flat, n_candidates - 1)[:n_candidates]
+        candidates = candidates[np.argsort(flat[candidates], kind='stable')]
+
+        kept = []
+        for row, col in zip(*np.unravel_index(candidates, distance.shape)):
+            if all(c != col or abs(r - row) > exclusion for r, c in kept):
+                kept.append((row, col))
+                if len(kept) == k:
+                    break
+        return np.array(kept, dtype=np.int64).reshape(-1, 2)
+
+    def _returns(self, cols: np.ndarray, rows: np.ndarray, m: int) -> np.ndarray:
+        """Compound return over bars [row, row + m) of each column (NaN past the end or on gaps)"""
+        s1 = self.arrays['sum_return']
+        count = self.arrays['count']
+        out = np.full(len(rows), np.nan)
+        inside = rows + m <= len(self.dates)
+        r, c = rows[inside], cols[inside]
+        log_return = s1[r + m, c] - s1[r, c] + m * self.arrays['offsets'][0, c]
+        complete = (count[r + m, c] - count[r, c]) == m
+        out[inside] = np.where(complete, np.expm1(log_return), np.nan)
+        return out
+
+
+class EpisodeIndexStore:
+    """
+    Persisted EpisodeIndex of the whole universe.
+
+    The index is saved under <root>/<universe version>/ and the current one
+    is kept memory-mapped. A query with a newer universe version (any symbol
+    written since) rebuilds it once through the given loader and prunes the
+    stale copies.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._current: Optional[Tuple[str, EpisodeIndex]] = None
+        self._lock = threading.Lock()
+
+    def _path(self, version: str) -> str:
+        return os.path.join(self.root, version)
+
+    def get(self, version: str,
+            loader: Callable[[], Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]]) -> EpisodeIndex:
+        """Index for a universe version; loader returns (dates, symbols, close, volume)"""
+        with self._lock:
+            if self._current is not None and self._current[0] == version:
+                return self._current[1]
+
+            path = self._path(version)
+            index = None
+            if os.path.isdir(path):
+                try:
+                    index = EpisodeIndex.load(path)
+                except Exception as e:
+                    logger.warning(f"Discarding unreadable similarity index {path}: {e}")
+                    shutil.rmtree(path, ignore_errors=True)
+            if index is None:
+                index = EpisodeIndex.build(*loader())
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                index.save(tmp_path)
+                with open(os.path.join(tmp_path, "metadata.json"), 'w') as fh:
+                    json.dump({'version': version, 'dates': index.shape[0], 'symbols': index.shape[1]}, fh)
+                try:
+                    os.replace(tmp_path, path)
+                except OSError:
+                    # Another process saved the same version first
+                    shutil.rmtree(tmp_path, ignore_errors=True)
+                index = EpisodeIndex.load(path)
+                logger.info(f"Built similarity index {version}: {index.shape[0]} dates x {index.shape[1]} symbols")
+
+            for stale in glob.glob(os.path.join(self.root, "*")):
+                if os.path.basename(stale) != version and not stale.endswith(".tmp"):
+                    shutil.rmtree(stale, ignore_errors=True)
+            self._current = (version, index)
+            return index
+
+
+episode_index_store = EpisodeIndexStore(settings.SIMILARITY_INDEX_DIR)
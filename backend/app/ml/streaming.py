@@ -0,0 +1,254 @@
+# backend/app/ml/streaming.py
+import math
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from ..config import settings
+from . import MarketSurveillanceEngine
+from .labels import RISK_LEVELS, PRIORITY_TYPES
+
+
+class RollingWindow:
+    """
+    Fixed-size ring buffer with O(1) mean / sample variance updates.
+
+    The sliding Welford update is exact in real arithmetic; the stats are
+    recomputed from the buffer every RESYNC_EVERY evictions so rounding
+    error cannot accumulate on long-running feeds.
+    """
+
+    __slots__ = ('size', 'values', 'pos', 'mean', 'm2', 'evictions')
+
+    RESYNC_EVERY = 1024
+
+    def __init__(self, size: int, values: Iterable[float] = ()):
+        self.size = size
+        self.values = []
+        self.pos = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.evictions = 0
+        for value in list(values)[-size:]:
+            self.push(value)
+
+    @property
+    def full(self) -> bool:
+        return len(self.values) == self.size
+
+    def push(self, x: float):
+        if len(self.values) < self.size:
+            self.values.append(x)
+            delta = x - self.mean
+            self.mean += delta / len(self.values)
+            self.m2 += delta * (x - self.mean)
+            return
+
+        old = self.values[self.pos]
+        self.values[self.pos] = x
+        self.pos = (self.pos + 1) % self.size
+        mean = self.mean + (x - old) / self.size
+        self.m2 += (x - old) * (x - mean + old - self.mean)
+        self.mean = mean
+
+        self.evictions += 1
+        if self.evictions % self.RESYNC_EVERY == 0:
+            self.mean = math.fsum(self.values) / self.size
+            self.m2 = math.fsum((v - self.mean) ** 2 for v in self.values)
+
+    def std(self) -> float:
+        if len(self.values) < 2:
+            return math.nan
+        return math.sqrt(max(self.m2, 0.0) / (len(self.values) - 1))
+
+    def ordered(self) -> list:
+        """Buffered values, oldest first"""
+        return self.values[self.pos:] + self.values[:self.pos]
+
+
+class StreamingDetector:
+    """
+    Online per-symbol anomaly scoring, one bar at a time.
+
+    Keeps O(1) state: all-time Welford mean/M2 of close and volume (the same
+    running z-scores as MarketSurveillanceEngine.analyze_incremental), ring
+    buffers for the 5-bar volume average and 20-bar price/volume windows,
+    and an EWMA volume baseline. update() emits the batch engine's fields
+    plus the windowed extras, without touching pandas or the history.
+    """
+
+    VOLUME_WINDOW = MarketSurveillanceEngine.VOLUME_WINDOW
+    FLAG_POINTS = MarketSurveillanceEngine.FLAG_POINTS
+    RATIO_POINTS = MarketSurveillanceEngine.RATIO_POINTS
+    RATIO_CAP = MarketSurveillanceEngine.RATIO_CAP
+    ZSCORE_WINDOW = 20
+    VOLUME_EWMA_SPAN = 20
+    ZSCORE_THRESHOLD = settings.ZSCORE_THRESHOLD
+
+    def __init__(self, state: Optional[Dict] = None):
+        state = state or {}
+        self.count = state.get('count', 0)
+        self.close_mean = state.get('close_mean', 0.0)
+        self.close_m2 = state.get('close_m2', 0.0)
+        self.volume_mean = state.get('volume_mean', 0.0)
+        self.volume_m2 = state.get('volume_m2', 0.0)
+
+        tail_close = state.get('tail_close') or []
+        self.last_close = tail_close[-1] if tail_close else None
+        self.volume_window = RollingWindow(self.VOLUME_WINDOW, state.get('tail_volume', []))
+        self.close_window = RollingWindow(self.ZSCORE_WINDOW, state.get('window_close', []))
+        self.volume_z_window = RollingWindow(self.ZSCORE_WINDOW, state.get('window_volume', []))
+        self.volume_ewma = state.get('volume_ewma')
+        self.alpha = 2.0 / (self.VOLUME_EWMA_SPAN + 1)
+
+    @classmethod
+    def from_history(cls, df, engine: MarketSurveillanceEngine) -> "StreamingDetector":
+        """Detector primed with a date-ordered OHLCV frame, as if it had streamed it"""
+        state = engine.build_state(df) if len(df) else {}
+        state['window_close'] = df['close'].to_numpy(dtype=float)[-cls.ZSCORE_WINDOW:].tolist()
+        state['window_volume'] = df['volume'].to_numpy(dtype=float)[-cls.ZSCORE_WINDOW:].tolist()
+        if len(df):
+            state['volume_ewma'] = float(
+                df['volume'].astype(float).ewm(span=cls.VOLUME_EWMA_SPAN, adjust=False).mean().iloc[-1]
+            )
+        return cls(state)
+
+    def copy(self) -> "StreamingDetector":
+        """Independent detector with the same state"""
+        return type(self)(self.to_state())
+
+    def to_state(self) -> Dict:
+        """JSON-serializable state; a superset of MarketSurveillanceEngine.build_state"""
+        return {
+            'count': self.count,
+            'close_mean': self.close_mean,
+            'close_m2': self.close_m2,
+            'volume_mean': self.volume_mean,
+            'volume_m2': self.volume_m2,
+            'tail_close': [] if self.last_close is None else [self.last_close],
+            'tail_volume': self.volume_window.ordered()[-(self.VOLUME_WINDOW - 1):],
+            'window_close': self.close_window.ordered(),
+            'window_volume': self.volume_z_window.ordered(),
+            'volume_ewma': self.volume_ewma
+        }
+
+    @staticmethod
+    def _ratio(x: float, base: float) -> float:
+        """x / base with pandas semantics: NaN base or 0/0 -> NaN, x/0 -> +-inf"""
+        if base != 0:
+            return x / base
+        return math.copysign(math.inf, x) if x != 0 else math.nan
+
+    @classmethod
+    def _zscore(cls, x: float, mean: float, std: float) -> float:
+        return cls._ratio(x - mean, std)
+
+    def update(self, bar: Dict) -> Dict:
+        """Fold one bar (needs close and volume) into the state and return its scores"""
+        close = float(bar['close'])
+        volume = float(bar['volume'])
+
+        returns = close / self.last_close - 1 if self.last_close else math.nan
+        self.last_close = close
+
+        # All-time running stats, including this bar
+        self.count += 1
+        delta = close - self.close_mean
+        self.close_mean += delta / self.count
+        self.close_m2 += delta * (close - self.close_mean)
+        delta = volume - self.volume_mean
+        self.volume_mean += delta / self.count
+        self.volume_m2 += delta * (volume - self.volume_mean)
+        if self.count > 1:
+            price_z = self._zscore(close, self.close_mean, math.sqrt(max(self.close_m2, 0.0) / (self.count - 1)))
+            volume_z = self._zscore(volume, self.volume_mean, math.sqrt(max(self.volume_m2, 0.0) / (self.count - 1)))
+        else:
+            price_z = volume_z = math.nan
+
+        # Windowed baselines
+        self.volume_window.push(volume)
+        volume_ma = self.volume_window.mean if self.volume_window.full else math.nan
+        volume_ratio = self._ratio(volume, volume_ma)
+
+        self.close_window.push(close)
+        self.volume_z_window.push(volume)
+        price_z_20 = (self._zscore(close, self.close_window.mean, self.close_window.std())
+                      if self.close_window.full else math.nan)
+        volume_z_20 = (self._zscore(volume, self.volume_z_window.mean, self.volume_z_window.std())
+                       if self.volume_z_window.full else math.nan)
+
+        if self.volume_ewma is None:
+            self.volume_ewma = volume
+        else:
+            self.volume_ewma += self.alpha * (volume - self.volume_ewma)
+
+        # Same scoring rules as MarketSurveillanceEngine._score
+        price_flag = abs(price_z) > self.ZSCORE_THRESHOLD
+        volume_flag = abs(volume_z) > self.ZSCORE_THRESHOLD
+        risk_score = float(min(max(
+            (price_flag + volume_flag) * self.FLAG_POINTS
+            + min(max(volume_ratio, 0), self.RATIO_CAP) * self.RATIO_POINTS, 0), 100))
+
+        if risk_score > 70:
+            level = RISK_LEVELS[2]
+        elif risk_score >= 30:
+            level = RISK_LEVELS[1]
+        else:
+            level = RISK_LEVELS[0]
+
+        return {
+            'date': bar.get('date'),
+            'close': close,
+            'volume': volume,
+            'returns': returns,
+            'volume_ma': volume_ma,
+            'volume_ratio': volume_ratio,
+            'price_zscore': price_z,
+            'volume_zscore': volume_z,
+            'price_anomaly_z': price_flag,
+            'volume_anomaly_z': volume_flag,
+            'risk_score': risk_score,
+            'risk_level': level,
+            'is_anomaly': price_flag or volume_flag,
+            'anomaly_type': PRIORITY_TYPES[1] if price_flag else (PRIORITY_TYPES[2] if volume_flag else PRIORITY_TYPES[0]),
+            'ml_score_if': -abs(price_z) / 10,
+            'price_zscore_20': price_z_20,
+            'volume_zscore_20': volume_z_20,
+            'volume_ewma': self.volume_ewma,
+            'volume_ewma_ratio': self._ratio(volume, self.volume_ewma)
+        }
+
+
+class StreamDetectorCache:
+    """
+    LRU cache of shared per-symbol detectors primed from the stored history.
+
+    Entries are tagged with the symbol's data version like TimeSeriesCache:
+    a lookup with a newer version (an upload since) re-primes the detector.
+    Shared detectors only ever reflect server-side data; connections score
+    their own bars on a copy().
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[int, StreamingDetector]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, symbol: str, version: int, loader: Callable[[], StreamingDetector]) -> StreamingDetector:
+        with self._lock:
+            entry = self._entries.get(symbol)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(symbol)
+                return entry[1]
+
+        # Prime outside the lock; a concurrent primer of the same version just wins the race
+        detector = loader()
+        with self._lock:
+            self._entries[symbol] = (version, detector)
+            self._entries.move_to_end(symbol)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return detector
+
+    def __len__(self) -> int:
+        return len(self._entries)
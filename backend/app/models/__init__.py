@@ -2,14 +2,21 @@
 # DIRECT EXPORTS - NO CIRCULAR IMPORTS
 
 from .user import User, UserRole
-from .stock import StockData, Anomaly
+from .stock import StockData, IntradayBar, OHLCVRollup, Anomaly, SymbolVersion
 from .audit import AuditLog
+from .job import Job
+from .analysis import AnalysisState
 
 # Explicitly define __all__
 __all__ = [
     'User',
     'UserRole', 
     'StockData',
+    'IntradayBar',
+    'OHLCVRollup',
     'Anomaly',
-    'AuditLog'
+    'SymbolVersion',
+    'AuditLog',
+    'Job',
+    'AnalysisState'
 ]
\ No newline at end of file
@@ -0,0 +1,13 @@
+# backend/app/models/analysis.py
+from sqlalchemy import Column, Integer, String, DateTime, Date, Text
+from sqlalchemy.sql import func
+from ..database import Base
+
+class AnalysisState(Base):
+    __tablename__ = "analysis_states"
+    
+    symbol = Column(String, primary_key=True)
+    last_date = Column(Date, nullable=False)  # Last bar included in the state
+    bars_analyzed = Column(Integer, nullable=False)
+    state = Column(Text, nullable=False)  # JSON: running mean/M2 and trailing window bars
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
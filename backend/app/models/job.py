@@ -0,0 +1,23 @@
+# backend/app/models/job.py
+from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy.sql import func
+from ..database import Base
+
+class Job(Base):
+    __tablename__ = "jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False)  # UPLOAD, ANALYSIS, REPORT, PATTERN_SCAN
+    status = Column(String, nullable=False, default="queued", index=True)  # queued, running, completed, failed, cancelled
+    stock_symbol = Column(String, nullable=True)
+    params = Column(Text)  # JSON encoded task arguments
+    result = Column(Text, nullable=True)  # JSON encoded task result
+    progress = Column(Text, nullable=True)  # JSON encoded running totals, while it runs
+    error = Column(Text, nullable=True)
+    user_id = Column(Integer, index=True)
+    username = Column(String)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    owner = Column(String, nullable=True)  # host:pid:token of the server process running it
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
@@ -1,11 +1,14 @@
 # backend/app/models/stock.py
-from sqlalchemy import Column, Integer, String, Float, DateTime, Date, ForeignKey
+from sqlalchemy import Column, Integer, BigInteger, String, Float, DateTime, Date, ForeignKey, UniqueConstraint, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from ..database import Base
 
 class StockData(Base):
     __tablename__ = "stock_data"
+    __table_args__ = (
+        UniqueConstraint("symbol", "date", name="uq_stock_data_symbol_date"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     symbol = Column(String, index=True, nullable=False)
@@ -20,13 +23,45 @@ class StockData(Base):
     # Relationships
     anomalies = relationship("Anomaly", back_populates="stock", cascade="all, delete-orphan")
 
+class IntradayBar(Base):
+    __tablename__ = "intraday_bars"
+    
+    # The (symbol, timestamp) primary key is the only index; no surrogate id
+    # or audit columns, to keep millions of 1-minute rows per symbol compact
+    symbol = Column(String(20), primary_key=True)
+    timestamp = Column(DateTime, primary_key=True)
+    open = Column(Float, nullable=False)
+    high = Column(Float, nullable=False)
+    low = Column(Float, nullable=False)
+    close = Column(Float, nullable=False)
+    volume = Column(BigInteger, nullable=False)
+
+class OHLCVRollup(Base):
+    __tablename__ = "ohlcv_rollups"
+    
+    # Weekly / monthly / quarterly bars (utils.resampling.ROLLUP_RESOLUTIONS)
+    # aggregated from stock_data; uploads rewrite the periods they touch
+    symbol = Column(String, primary_key=True)
+    resolution = Column(String(3), primary_key=True)
+    date = Column(Date, primary_key=True)  # First day of the period
+    open = Column(Float, nullable=False)
+    high = Column(Float, nullable=False)
+    low = Column(Float, nullable=False)
+    close = Column(Float, nullable=False)
+    volume = Column(BigInteger, nullable=False)
+    bars = Column(Integer, nullable=False)  # Daily bars in the period so far
+
 class Anomaly(Base):
     __tablename__ = "anomalies"
+    __table_args__ = (
+        # Per-bar lookups for the keyset-paginated anomaly listing (and FK cascades)
+        Index("ix_anomalies_stock_id_id", "stock_id", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     stock_id = Column(Integer, ForeignKey("stock_data.id", ondelete="CASCADE"))
     date = Column(Date, nullable=False)
-    anomaly_type = Column(String)  # price, volume, both
+    anomaly_type = Column(String)  # price, volume, both; or a multi-bar pattern (ml.labels.PATTERN_TYPES)
     risk_score = Column(Float)
     risk_level = Column(String)  # Low, Medium, High
     ml_score = Column(Float)  # Isolation Forest score
@@ -35,4 +70,11 @@ class Anomaly(Base):
     detected_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
-    stock = relationship("StockData", back_populates="anomalies")
\ No newline at end of file
+    stock = relationship("StockData", back_populates="anomalies")
+
+class SymbolVersion(Base):
+    __tablename__ = "symbol_versions"
+    
+    symbol = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=1)  # Bumped on every stock_data / intraday_bars write
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -1,8 +1,9 @@
 # backend/app/schemas/__init__.py
 from .user import User, UserCreate, UserBase, Token, TokenData
-from .stock import StockData, StockDataCreate, Anomaly, AnomalyResponse
+from .stock import StockData, StockDataCreate, Anomaly, AnomalyResponse, BatchAnalysisRequest, CrossSectionRequest, LabelledEvent, CalibrationRequest, PatternScanRequest
 
 __all__ = [
     'User', 'UserCreate', 'UserBase', 'Token', 'TokenData',
-    'StockData', 'StockDataCreate', 'Anomaly', 'AnomalyResponse'
+    'StockData', 'StockDataCreate', 'Anomaly', 'AnomalyResponse', 'BatchAnalysisRequest',
+    'CrossSectionRequest', 'LabelledEvent', 'CalibrationRequest', 'PatternScanRequest'
 ]
\ No newline at end of file
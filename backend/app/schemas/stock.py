@@ -1,7 +1,9 @@
 # backend/app/schemas/stock.py
 from pydantic import BaseModel
 from datetime import date, datetime
-from typing import Optional, List
+from typing import Optional, List, Dict, Union, Literal
+
+from ..config import settings
 
 class StockDataBase(BaseModel):
     symbol: str
@@ -50,4 +52,44 @@ class AnalysisSummary(BaseModel):
     medium_risk: int
     low_risk: int
     max_risk_score: float
-    avg_risk_score: float
\ No newline at end of file
+    avg_risk_score: float
+
+class BatchAnalysisRequest(BaseModel):
+    symbols: Union[List[str], Literal["all"]] = "all"
+    incremental: bool = False
+    workers: Optional[int] = None
+
+class CrossSectionRequest(BaseModel):
+    symbols: Union[List[str], Literal["all"]] = "all"
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    peer_groups: Optional[Dict[str, List[str]]] = None
+    # Both are z-score cut-offs, like the engines' defaults
+    price_threshold: float = settings.ZSCORE_THRESHOLD
+    volume_threshold: float = settings.ZSCORE_THRESHOLD
+    limit: int = 100
+
+class LabelledEvent(BaseModel):
+    symbol: str
+    date: date
+
+class CalibrationRequest(BaseModel):
+    symbols: Union[List[str], Literal["all"]] = "all"
+    model: Literal["engine", "pipeline"] = "pipeline"
+    price_thresholds: List[float] = [2.0, 2.5, 3.0, 3.5]
+    volume_thresholds: List[float] = [2.0, 2.5, 3.0, 3.5]
+    # Pipeline model only; unset dimensions keep the current setting
+    volume_spike_thresholds: Optional[List[float]] = None
+    weights: Optional[List[Dict[str, float]]] = None
+    alert_scores: Optional[List[float]] = None
+    events: List[LabelledEvent] = []
+    tolerance: int = 0
+    limit: int = 50
+
+class PatternScanRequest(BaseModel):
+    symbols: Union[List[str], Literal["all"]] = "all"
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    persist: bool = True
+    background: bool = False
+    limit: int = 100
\ No newline at end of file
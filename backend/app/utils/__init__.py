@@ -1,5 +1,7 @@
 # backend/app/utils/__init__.py
 from .csv_parser import CSVParser
 from .pdf_generator import PDFReportGenerator
+from .bulk_ingest import BulkIngestor
+from .ohlcv_repository import OHLCVRepository
 
-__all__ = ['CSVParser', 'PDFReportGenerator']
\ No newline at end of file
+__all__ = ['CSVParser', 'PDFReportGenerator', 'BulkIngestor', 'OHLCVRepository']
\ No newline at end of file
@@ -0,0 +1,86 @@
+# backend/app/utils/batch_analysis.py
+import os
+import time
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterator, List, Optional
+
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..models.stock import StockData
+from .job_tasks import analyze_symbol
+
+logger = logging.getLogger(__name__)
+
+
+def resolve_symbols(db: Session, symbols) -> List[str]:
+    """Expand "all" to every stored symbol; otherwise upper-case and de-duplicate"""
+    if symbols == "all" or symbols == ["all"]:
+        rows = db.query(StockData.symbol).distinct().order_by(StockData.symbol).all()
+        return [row[0] for row in rows if row[0]]
+    return list(dict.fromkeys(symbol.upper() for symbol in symbols))
+
+
+def _failed(symbol: str, error: Exception) -> dict:
+    return {'symbol': symbol, 'status': 'failed', 'error': str(error) or type(error).__name__}
+
+
+def iter_batch_analysis(symbols: List[str], user_id: Optional[int], username: str,
+                        incremental: bool = False,
+                        workers: Optional[int] = None) -> Iterator[dict]:
+    """
+    Analyze symbols on a process pool, yielding each result as it completes.
+
+    Every worker opens its own session and loads its symbol's data itself, so
+    the parent only ships symbol names out and small summaries back. A symbol
+    whose worker died or raised is reported as a failed result, so the last
+    item is always a {'type': 'done'} record with totals.
+    """
+    workers = workers or settings.BATCH_WORKERS or os.cpu_count() or 1
+    workers = max(1, min(workers, len(symbols) or 1))
+    start = time.perf_counter()
+    completed = failed = 0
+
+    executor = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn")
+    )
+    try:
+        futures = {}
+        unsubmitted = []
+        for symbol in symbols:
+            try:
+                futures[executor.submit(analyze_symbol, symbol, user_id, username, incremental)] = symbol
+            except BrokenProcessPool as e:
+                unsubmitted.append(_failed(symbol, e))
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                logger.error(f"Batch worker for {futures[future]} failed: {str(e)}")
+                result = _failed(futures[future], e)
+            if result['status'] == 'completed':
+                completed += 1
+            else:
+                failed += 1
+            yield {'type': 'result', **result}
+        for result in unsubmitted:
+            failed += 1
+            yield {'type': 'result', **result}
+    finally:
+        # Also reached when a streaming client disconnects mid-batch
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    elapsed = time.perf_counter() - start
+    logger.info(f"Batch analysis of {len(symbols)} symbols on {workers} workers took {elapsed:.1f}s")
+    yield {
+        'type': 'done',
+        'symbols': len(symbols),
+        'completed': completed,
+        'failed': failed,
+        'workers': workers,
+        'elapsed_s': round(elapsed, 3)
+    }
@@ -0,0 +1,246 @@
+# backend/app/utils/bulk_ingest.py
+import pandas as pd
+import numpy as np
+from sqlalchemy import select, func
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from typing import Callable, Dict, BinaryIO, Optional, Iterable
+import logging
+
+from ..models.stock import StockData, OHLCVRollup, SymbolVersion
+from ..models.analysis import AnalysisState
+from .csv_parser import CSVParser
+from .resampling import ROLLUP_RESOLUTIONS, period_starts, next_period_starts, rollup_bars
+
+logger = logging.getLogger(__name__)
+
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+
+def dialect_insert(db: Session):
+    """Return the dialect-specific insert() that supports ON CONFLICT"""
+    dialect = db.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise ValueError(f"Bulk upsert is not supported for dialect '{dialect}'")
+    return insert
+
+
+def bump_symbol_versions(db: Session, symbols: Iterable[str]):
+    """Advance the data version of each symbol in the caller's transaction"""
+    symbols = sorted(set(symbols))
+    if not symbols:
+        return
+    insert = dialect_insert(db)
+    stmt = insert(SymbolVersion).values([{'symbol': symbol, 'version': 1} for symbol in symbols])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['symbol'],
+        set_={'version': SymbolVersion.version + 1, 'updated_at': func.now()}
+    )
+    db.execute(stmt)
+
+
+def invalidate_analysis_states(db: Session, written: pd.DataFrame):
+    """
+    Drop saved incremental-analysis states that cover a written (symbol, date)
+    row, in the caller's transaction: a bar inserted or corrected on or
+    before a state's last_date makes its running statistics stale.
+    """
+    for symbol, first in written.groupby('symbol')['date'].min().items():
+        db.query(AnalysisState).filter(
+            AnalysisState.symbol == symbol,
+            AnalysisState.last_date >= pd.Timestamp(first).date()
+        ).delete(synchronize_session=False)
+
+
+def refresh_rollups(db: Session, written: pd.DataFrame, batch_size: int = 5000) -> int:
+    """
+    Recompute the weekly / monthly / quarterly rollups of every period that
+    contains a written (symbol, date) row, in the caller's transaction.
+
+    Each symbol's daily bars are read once, from the Monday on or before the
+    first touched quarter to the end of the week holding the last touched
+    quarter's final day, which covers every touched period of every
+    resolution. Returns the number of rollup rows written.
+    """
+    insert = dialect_insert(db)
+    stmt = insert(OHLCVRollup)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['symbol', 'resolution', 'date'],
+        set_={col: stmt.excluded[col] for col in OHLCV_COLUMNS + ['bars']}
+    )
+
+    written_rows = 0
+    for symbol, dates in written.groupby('symbol')['date']:
+        days = dates.to_numpy(dtype='datetime64[D]')
+        first, last = days.min(), days.max()
+        quarters = period_starts(np.array([first, last]), '1q')
+        quarter_end = next_period_starts(quarters[1:], '1q')[0]
+        lo = period_starts(quarters[:1], '1w')[0]
+        hi = max(quarter_end, next_period_starts(period_starts([quarter_end - 1], '1w'), '1w')[0])
+
+        rows = db.execute(
+            select(StockData.date, *[getattr(StockData, col) for col in OHLCV_COLUMNS])
+            .where(StockData.symbol == symbol, StockData.date >= lo.astype(object), StockData.date < hi.astype(object))
+            .order_by(StockData.date)
+        ).all()
+        daily = pd.DataFrame.from_records(rows, columns=['date'] + OHLCV_COLUMNS)
+
+        records = []
+        for resolution in ROLLUP_RESOLUTIONS:
+            rolled = rollup_bars(daily, resolution)
+            starts = rolled['date'].to_numpy(dtype='datetime64[D]')
+            touched = (starts <= last) & (next_period_starts(starts, resolution) > first)
+            rolled = rolled[touched].astype({'volume': 'int64', 'bars': 'int64'})
+            records += [{'symbol': symbol, 'resolution': resolution, **row} for row in rolled.to_dict('records')]
+        for start in range(0, len(records), batch_size):
+            db.execute(stmt, records[start:start + batch_size])
+        written_rows += len(records)
+    return written_rows
+
+
+class BulkIngestor:
+    """
+    Set-based upsert of parsed OHLCV rows into stock_data (daily bars, keyed
+    by date) or, with model=IntradayBar and key='timestamp', intraday_bars
+    """
+
+    def __init__(self, batch_size: int = 5000, model=StockData, key: str = 'date'):
+        self.batch_size = batch_size
+        self.model = model
+        self.key = key
+
+    def _load_existing(self, db: Session, df: pd.DataFrame) -> pd.DataFrame:
+        """Fetch the stored rows overlapping the incoming frame in one query"""
+        key_column = getattr(self.model, self.key)
+        query = select(
+            self.model.symbol, key_column,
+            *[getattr(self.model, col) for col in OHLCV_COLUMNS]
+        ).where(
+            self.model.symbol.in_(df['symbol'].unique().tolist()),
+            key_column.between(df[self.key].min(), df[self.key].max())
+        )
+        rows = db.execute(query).all()
+        existing = pd.DataFrame(rows, columns=['symbol', self.key] + OHLCV_COLUMNS)
+        if self.key == 'timestamp':
+            existing['timestamp'] = pd.to_datetime(existing['timestamp'])
+        return existing
+
+    def upsert(self, db: Session, df: pd.DataFrame) -> Dict[str, int]:
+        """
+        Insert new (symbol, date/timestamp) rows and update changed ones.
+
+        Rows identical to what is already stored are skipped. The caller owns
+        the transaction and is expected to commit.
+        """
+        if len(df) == 0:
+            return {'inserted': 0, 'updated': 0, 'skipped': 0}
+
+        keys = ['symbol', self.key]
+        df = df[keys + OHLCV_COLUMNS].drop_duplicates(subset=keys, keep='last')
+        existing = self._load_existing(db, df)
+
+        merged = df.merge(
+            existing, on=keys, how='left',
+            suffixes=('', '_db'), indicator=True
+        )
+        is_new = (merged['_merge'] == 'left_only').to_numpy()
+
+        unchanged = ~is_new
+        for col in OHLCV_COLUMNS:
+            unchanged &= np.isclose(
+                merged[col].to_numpy(dtype=float),
+                merged[f'{col}_db'].to_numpy(dtype=float),
+                rtol=0, atol=1e-9
+            )
+        is_changed = ~is_new & ~unchanged
+
+        to_write = merged.loc[is_new | is_changed, keys + OHLCV_COLUMNS]
+        to_write = to_write.astype({
+            'open': float, 'high': float, 'low': float, 'close': float, 'volume': 'int64'
+        })
+        records = to_write.to_dict('records')
+        if self.key == 'timestamp':
+            for record in records:
+                record['timestamp'] = record['timestamp'].to_pydatetime()
+
+        if records:
+            insert = dialect_insert(db)
+            stmt = insert(self.model)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=keys,
+                set_={col: stmt.excluded[col] for col in OHLCV_COLUMNS}
+            )
+            for start in range(0, len(records), self.batch_size):
+                db.execute(stmt, records[start:start + self.batch_size])
+            bump_symbol_versions(db, to_write['symbol'].unique())
+            if self.model is StockData:
+                invalidate_analysis_states(db, to_write[keys])
+                refresh_rollups(db, to_write[keys], self.batch_size)
+
+        counts = {
+            'inserted': int(is_new.sum()),
+            'updated': int(is_changed.sum()),
+            'skipped': int(unchanged.sum())
+        }
+        logger.info(
+            f"Upserted {len(df)} rows: {counts['inserted']} inserted, "
+            f"{counts['updated']} updated, {counts['skipped']} skipped"
+        )
+        return counts
+
+    def ingest_csv(self, db: Session, file: BinaryIO, symbol: Optional[str] = None,
+                   chunk_size: int = 50000,
+                   on_chunk: Optional[Callable[[Dict], None]] = None) -> Dict:
+        """
+        Stream a CSV file into the ingestor's table chunk by chunk.
+
+        Each chunk is parsed and upserted before the next one is read, so peak
+        memory is bounded by chunk_size rather than file size. The whole file
+        is one transaction: a bad chunk anywhere rolls back every chunk before
+        it, so a failed upload never leaves part of the file stored.
+        on_chunk, if given, receives the running totals after each chunk.
+        """
+        totals = {'inserted': 0, 'updated': 0, 'skipped': 0}
+        chunks = []
+        symbols = []
+        total_rows = 0
+
+        intraday = self.key == 'timestamp'
+        index = 0  # The chunk being read or written, also while the parser fails on it
+        try:
+            for chunk in CSVParser.iter_chunks(file, symbol, chunk_size, intraday=intraday):
+                counts = self.upsert(db, chunk)
+
+                for chunk_symbol in chunk['symbol'].unique():
+                    if chunk_symbol not in symbols:
+                        symbols.append(chunk_symbol)
+                for key in totals:
+                    totals[key] += counts[key]
+                total_rows += len(chunk)
+                chunks.append({'chunk': index, 'rows': len(chunk), **counts})
+                logger.info(f"Chunk {index}: {len(chunk)} rows ({total_rows} total)")
+                index += 1
+                if on_chunk is not None:
+                    on_chunk({'chunks': index, 'total_rows': total_rows, **totals})
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Chunk {index} failed after {total_rows} valid rows: {str(e)}")
+            # Database errors carry the whole statement and its parameters; keep those in the log
+            reason = "database error" if isinstance(e, SQLAlchemyError) else str(e)
+            raise ValueError(f"Chunk {index} failed after {total_rows} valid rows; nothing was stored: {reason}")
+
+        if total_rows == 0:
+            raise ValueError("No valid data rows after cleaning")
+        db.commit()
+
+        return {
+            'symbol': symbols[0],
+            'symbols': symbols,
+            'total_rows': total_rows,
+            **totals,
+            'chunks': chunks
+        }
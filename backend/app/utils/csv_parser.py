@@ -2,7 +2,7 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime
-from typing import Optional, Tuple
+from typing import Optional, Tuple, Iterator, BinaryIO
 import logging
 
 logger = logging.getLogger(__name__)
@@ -13,13 +13,20 @@ class CSVParser:
     REQUIRED_COLUMNS = ['date', 'open', 'high', 'low', 'close', 'volume']
     
     @staticmethod
-    def validate_and_parse(df: pd.DataFrame, symbol: Optional[str] = None) -> pd.DataFrame:
+    def validate_and_parse(df: pd.DataFrame, symbol: Optional[str] = None,
+                           copy: bool = True, allow_empty: bool = False,
+                           intraday: bool = False) -> pd.DataFrame:
         """
         Validate CSV data and convert to proper format
+        
+        Pass copy=False when the caller owns the frame (e.g. a CSV chunk) to
+        avoid duplicating it. With intraday=True the date column keeps its time
+        of day and is returned as 'timestamp'.
         """
         
         # Make a copy to avoid warnings
-        df = df.copy()
+        if copy:
+            df = df.copy()
         
         # Convert column names to lowercase and strip
         df.columns = [str(col).lower().strip() for col in df.columns]
@@ -52,7 +59,13 @@ class CSVParser:
         
         # Parse date column
         try:
-            df['date'] = pd.to_datetime(df['date']).dt.date
+            if intraday:
+                timestamps = pd.to_datetime(df['date'])
+                if timestamps.dt.tz is not None:
+                    timestamps = timestamps.dt.tz_convert(None)  # stored as naive UTC
+                df['date'] = timestamps
+            else:
+                df['date'] = pd.to_datetime(df['date']).dt.date
         except Exception as e:
             raise ValueError(f"Error parsing date column: {e}")
         
@@ -65,6 +78,9 @@ class CSVParser:
         df = df.dropna(subset=numeric_cols)
         
         if len(df) == 0:
+            if allow_empty:
+                df = df.assign(symbol=pd.Series(dtype=object))
+                return CSVParser._as_timestamp(df) if intraday else df
             raise ValueError("No valid data rows after cleaning")
         
         # Add symbol if provided
@@ -77,6 +93,8 @@ class CSVParser:
         
         # Sort by date
         df = df.sort_values('date')
+        if intraday:
+            df = CSVParser._as_timestamp(df)
         
         # Reset index
         df = df.reset_index(drop=True)
@@ -85,6 +103,24 @@ class CSVParser:
         
         return df
     
+    @staticmethod
+    def _as_timestamp(df: pd.DataFrame) -> pd.DataFrame:
+        """Rename the parsed date column to 'timestamp', replacing a raw source column of that name"""
+        return df.drop(columns=['timestamp'], errors='ignore').rename(columns={'date': 'timestamp'})
+    
+    @staticmethod
+    def iter_chunks(file: BinaryIO, symbol: Optional[str] = None,
+                    chunk_size: int = 50000, intraday: bool = False) -> Iterator[pd.DataFrame]:
+        """
+        Stream a CSV file in fixed-size chunks, validating each one
+        
+        Only one chunk is held in memory at a time. Chunks with no valid rows
+        are yielded empty so callers can still report progress for them.
+        """
+        reader = pd.read_csv(file, chunksize=chunk_size, encoding='utf-8-sig')
+        for chunk in reader:
+            yield CSVParser.validate_and_parse(chunk, symbol, copy=False, allow_empty=True, intraday=intraday)
+    
     @staticmethod
     def validate_stock_data(df: pd.DataFrame) -> Tuple[bool, str]:
         """
@@ -0,0 +1,212 @@
+# backend/app/utils/db_stats.py
+import re
+import time
+import logging
+import threading
+from collections import Counter, deque
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+# Literal lists of any length (IN (?, ?, ?), VALUES (...), (...)) collapse to one shape
+_IN_LIST = re.compile(r"\(\s*(?:\?|%\(\w+\)s|:\w+|\$\d+)(?:\s*,\s*(?:\?|%\(\w+\)s|:\w+|\$\d+))*\s*\)")
+_VALUES_ROWS = re.compile(r"(\(\?\))(?:\s*,\s*\(\?\))+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """SQL text with bind lists and whitespace normalised, so repeats of one query compare equal"""
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    shape = _IN_LIST.sub("(?)", shape)
+    return _VALUES_ROWS.sub(r"\1", shape)
+
+
+class QueryStats:
+    """Statements executed while handling one request"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.shapes: Counter = Counter()
+        self.statements: List[Dict] = []
+
+    def record(self, statement: str, elapsed_ms: float, executemany: bool):
+        shape = statement_shape(statement)
+        self.count += 1
+        self.total_ms += elapsed_ms
+        if not executemany:
+            self.shapes[shape] += 1
+        self.statements.append({'statement': shape, 'ms': elapsed_ms})
+
+    def slowest(self, n: int = 5) -> List[Dict]:
+        return [
+            {'statement': s['statement'], 'ms': round(s['ms'], 3)}
+            for s in sorted(self.statements, key=lambda s: s['ms'], reverse=True)[:n]
+        ]
+
+    def n_plus_one(self, threshold: int) -> List[Dict]:
+        """Statement shapes run at least threshold times one by one (N+1 suspects)"""
+        return [
+            {'statement': shape, 'count': count}
+            for shape, count in self.shapes.most_common() if count >= threshold
+        ]
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("db_query_stats", default=None)
+
+
+class DBStatsCollector:
+    """
+    Query instrumentation built on SQLAlchemy cursor-execute events.
+
+    Every statement is timed on the engine; while a request is being served
+    (see DBStatsMiddleware) it is also attributed to that request's
+    QueryStats through a context variable, which thread-pool endpoints and
+    async sessions inherit. Finished requests roll up per route, and
+    requests that repeat one statement shape n_plus_one_threshold or more
+    times are kept as N+1 suspects.
+    """
+
+    def __init__(self, slow_query_ms: float = 100.0, n_plus_one_threshold: int = 10,
+                 history: int = 50):
+        self.slow_query_ms = slow_query_ms
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self._lock = threading.Lock()
+        self._routes: Dict[str, Dict] = {}
+        self._slow: deque = deque(maxlen=history)
+        self._suspects: deque = deque(maxlen=history)
+        self.total_queries = 0
+        self.total_ms = 0.0
+
+    def instrument(self, engine: Engine):
+        """Attach the timing hooks to a (sync) engine; for an AsyncEngine pass its .sync_engine"""
+        event.listen(engine, "before_cursor_execute", self._before)
+        event.listen(engine, "after_cursor_execute", self._after)
+
+    @staticmethod
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed_ms = (time.perf_counter() - conn.info["query_start"].pop()) * 1000
+        stats = _current.get()
+        if stats is not None:
+            stats.record(statement, elapsed_ms, executemany)
+        with self._lock:
+            self.total_queries += 1
+            self.total_ms += elapsed_ms
+            if elapsed_ms >= self.slow_query_ms:
+                self._slow.append({
+                    'statement': statement_shape(statement),
+                    'ms': round(elapsed_ms, 3),
+                    'at': time.time()
+                })
+
+    def begin(self) -> QueryStats:
+        stats = QueryStats()
+        _current.set(stats)
+        return stats
+
+    def finish(self, route: str, stats: QueryStats):
+        """Fold a finished request into the per-route aggregates"""
+        suspects = stats.n_plus_one(self.n_plus_one_threshold)
+        with self._lock:
+            agg = self._routes.setdefault(route, {
+                'requests': 0, 'queries': 0, 'db_ms': 0.0, 'max_queries': 0, 'max_db_ms': 0.0,
+                'n_plus_one_requests': 0
+            })
+            agg['requests'] += 1
+            agg['queries'] += stats.count
+            agg['db_ms'] += stats.total_ms
+            agg['max_queries'] = max(agg['max_queries'], stats.count)
+            agg['max_db_ms'] = max(agg['max_db_ms'], stats.total_ms)
+            if suspects:
+                agg['n_plus_one_requests'] += 1
+                self._suspects.append({'route': route, 'at': time.time(), 'statements': suspects})
+        if suspects:
+            logger.warning(
+                f"Possible N+1 on {route}: {suspects[0]['count']}x {suspects[0]['statement'][:200]}"
+            )
+
+    def stats(self) -> Dict:
+        with self._lock:
+            routes = {
+                route: {
+                    **agg,
+                    'db_ms': round(agg['db_ms'], 3),
+                    'max_db_ms': round(agg['max_db_ms'], 3),
+                    'avg_queries': round(agg['queries'] / agg['requests'], 2),
+                    'avg_db_ms': round(agg['db_ms'] / agg['requests'], 3)
+                }
+                for route, agg in self._routes.items()
+            }
+            return {
+                'total_queries': self.total_queries,
+                'total_db_ms': round(self.total_ms, 3),
+                'slow_query_ms': self.slow_query_ms,
+                'n_plus_one_threshold': self.n_plus_one_threshold,
+                'routes': dict(sorted(routes.items(), key=lambda item: item[1]['db_ms'], reverse=True)),
+                'slow_queries': sorted(self._slow, key=lambda s: s['ms'], reverse=True),
+                'n_plus_one_suspects': list(reversed(self._suspects))
+            }
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+            self._slow.clear()
+            self._suspects.clear()
+            self.total_queries = 0
+            self.total_ms = 0.0
+
+
+class DBStatsMiddleware:
+    """
+    ASGI middleware that scopes QueryStats to each HTTP request and reports
+    them in X-DB-Query-Count, X-DB-Time-Ms and X-DB-N-Plus-One headers.
+
+    Headers reflect the statements run before the response starts; a
+    streamed body's later statements still count towards the route totals.
+    """
+
+    def __init__(self, app, collector: "DBStatsCollector"):
+        self.app = app
+        self.collector = collector
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = self.collector.begin()
+
+        async def send_with_stats(message):
+            if message["type"] == "http.response.start":
+                suspects = stats.n_plus_one(self.collector.n_plus_one_threshold)
+                headers = list(message.get("headers", []))
+                headers += [
+                    (b"x-db-query-count", str(stats.count).encode()),
+                    (b"x-db-time-ms", f"{stats.total_ms:.2f}".encode()),
+                    (b"x-db-n-plus-one", str(len(suspects)).encode())
+                ]
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            route = scope.get("route")
+            self.collector.finish(
+                f"{scope['method']} {getattr(route, 'path', scope['path'])}", stats
+            )
+
+
+db_stats = DBStatsCollector(
+    slow_query_ms=settings.DB_SLOW_QUERY_MS,
+    n_plus_one_threshold=settings.DB_N_PLUS_ONE_THRESHOLD
+)
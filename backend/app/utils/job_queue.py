@@ -0,0 +1,262 @@
+# backend/app/utils/job_queue.py
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..database import SessionLocal
+from ..models.job import Job
+from .job_tasks import run_task
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ("queued", "running")
+
+
+def _utc(moment: datetime) -> datetime:
+    """Naive UTC, the form timestamps are written in, for a value read back from either backend"""
+    return moment.astimezone(timezone.utc).replace(tzinfo=None) if moment.tzinfo else moment
+
+
+class JobQueue:
+    """
+    In-process asyncio scheduler that runs heavy jobs on a worker process pool.
+
+    Each job records the server process that owns it (host:pid:token) and a
+    heartbeat that process refreshes while the job is active, so with several
+    workers on one database only jobs whose owner has exited, or stopped
+    heartbeating, are failed as interrupted.
+    """
+
+    def __init__(self, concurrency: int = 2):
+        self.concurrency = max(1, concurrency)
+        # The token tells this run apart from an earlier one that had the same pid
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._heartbeat: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Bind the queue to the running event loop (call from app startup)"""
+        self._loop = asyncio.get_running_loop()
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._fail_interrupted_jobs()
+        self._heartbeat = self._loop.create_task(self._beat_forever())
+        logger.info(f"Job queue started (concurrency={self.concurrency}, owner={self.owner})")
+
+    def shutdown(self):
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            self._heartbeat = None
+        for task in list(self._tasks.values()):
+            task.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn keeps workers clear of the parent's DB connections and threads
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.concurrency,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def _new_job(self, kind: str, user, symbol: Optional[str], params: dict) -> Tuple[Job, dict]:
+        if self._loop is None:
+            raise RuntimeError("Job queue is not started")
+
+        run_params = {"symbol": symbol, "user_id": user.id, "username": user.username, **params}
+        job = Job(
+            kind=kind,
+            status="queued",
+            stock_symbol=symbol,
+            params=json.dumps(run_params),
+            user_id=user.id,
+            username=user.username,
+            owner=self.owner,
+            heartbeat_at=datetime.utcnow()
+        )
+        return job, run_params
+
+    def _enqueue(self, job: Job, run_params: dict):
+        self._loop.call_soon_threadsafe(self._schedule, job.id, job.kind, run_params)
+        logger.info(f"Queued {job.kind} job {job.id} for {job.stock_symbol}")
+
+    def submit(self, db: Session, kind: str, user, symbol: Optional[str] = None, **params) -> Job:
+        """Persist a queued job and schedule it; safe to call from sync or async handlers"""
+        job, run_params = self._new_job(kind, user, symbol, params)
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+
+        self._enqueue(job, run_params)
+        return job
+
+    async def submit_async(self, db: AsyncSession, kind: str, user, symbol: Optional[str] = None,
+                           **params) -> Job:
+        """submit() through an async session"""
+        job, run_params = self._new_job(kind, user, symbol, params)
+        db.add(job)
+        await db.commit()
+        await db.refresh(job)
+
+        self._enqueue(job, run_params)
+        return job
+
+    def cancel(self, db: Session, job: Job) -> bool:
+        """
+        Cancel a queued or running job.
+
+        A job that already reached a worker cannot be interrupted; it is marked
+        cancelled and its result is discarded when the worker finishes.
+        """
+        if job.status not in ACTIVE_STATUSES:
+            return False
+
+        task = self._tasks.get(job.id)
+        if task is not None and self._loop is not None:
+            self._loop.call_soon_threadsafe(task.cancel)
+
+        job.status = "cancelled"
+        job.finished_at = datetime.utcnow()
+        db.commit()
+        return True
+
+    def _schedule(self, job_id: int, kind: str, params: dict):
+        self._tasks[job_id] = self._loop.create_task(self._run(job_id, kind, params))
+
+    async def _run(self, job_id: int, kind: str, params: dict):
+        loop = asyncio.get_running_loop()
+        started = False
+        try:
+            async with self._semaphore:
+                started = await asyncio.to_thread(
+                    self._update, job_id, status="running", started_at=datetime.utcnow()
+                )
+                if not started:
+                    # Cancelled before it reached the front of the queue
+                    self._discard(params)
+                    return
+                result = await loop.run_in_executor(self.executor, run_task, kind, job_id, params)
+            await asyncio.to_thread(
+                self._update, job_id, status="completed",
+                result=json.dumps(result, default=str), finished_at=datetime.utcnow()
+            )
+            logger.info(f"{kind} job {job_id} completed")
+        except asyncio.CancelledError:
+            logger.info(f"{kind} job {job_id} cancelled")
+            if not started:
+                self._discard(params)
+        except Exception as e:
+            logger.error(f"{kind} job {job_id} failed: {str(e)}")
+            await asyncio.to_thread(
+                self._update, job_id, status="failed",
+                error=str(e), finished_at=datetime.utcnow()
+            )
+        finally:
+            self._tasks.pop(job_id, None)
+
+    @staticmethod
+    def _update(job_id: int, **fields) -> int:
+        db = SessionLocal()
+        try:
+            # Never overwrite a cancellation that raced with completion
+            count = db.query(Job).filter(
+                Job.id == job_id, Job.status.in_(ACTIVE_STATUSES)
+            ).update(fields, synchronize_session=False)
+            db.commit()
+            return count
+        finally:
+            db.close()
+
+    @staticmethod
+    def _discard(params: dict):
+        """Remove a spooled upload belonging to a job that will never run"""
+        path = params.get("path")
+        if path and os.path.exists(path):
+            os.remove(path)
+
+    async def _beat_forever(self):
+        while True:
+            await asyncio.sleep(settings.JOB_HEARTBEAT_SECONDS)
+            try:
+                await asyncio.to_thread(self._beat)
+                await asyncio.to_thread(self._fail_interrupted_jobs)
+            except Exception as e:
+                logger.error(f"Job heartbeat failed: {str(e)}")
+
+    def _beat(self):
+        db = SessionLocal()
+        try:
+            db.query(Job).filter(
+                Job.owner == self.owner, Job.status.in_(ACTIVE_STATUSES)
+            ).update({"heartbeat_at": datetime.utcnow()}, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    def _owner_gone(self, owner: Optional[str]) -> bool:
+        """Whether a job's owning process has certainly exited (it runs on this host and is dead)"""
+        if not owner:
+            return True
+        host, _, rest = owner.partition(":")
+        pid = rest.partition(":")[0]
+        if host != socket.gethostname() or not pid.isdigit():
+            return False
+        if int(pid) == os.getpid():
+            # Same pid but not this run's owner: an earlier incarnation of this process
+            return owner != self.owner
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            return True
+        except PermissionError:
+            return False
+        return False
+
+    def _fail_interrupted_jobs(self):
+        """Fail other workers' active jobs whose owner has exited or whose heartbeat is stale"""
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            stale = now - timedelta(seconds=settings.JOB_STALE_SECONDS)
+            candidates = db.query(Job.id, Job.owner, Job.heartbeat_at).filter(
+                Job.status.in_(ACTIVE_STATUSES),
+                or_(Job.owner.is_(None), Job.owner != self.owner)
+            ).all()
+            interrupted = [
+                job_id for job_id, owner, heartbeat_at in candidates
+                if heartbeat_at is None or _utc(heartbeat_at) < stale or self._owner_gone(owner)
+            ]
+            if not interrupted:
+                return
+            count = db.query(Job).filter(
+                Job.id.in_(interrupted), Job.status.in_(ACTIVE_STATUSES)
+            ).update({
+                "status": "failed",
+                "error": "Interrupted: the worker running it stopped",
+                "finished_at": now
+            }, synchronize_session=False)
+            db.commit()
+            if count:
+                logger.warning(f"Marked {count} interrupted jobs as failed")
+        finally:
+            db.close()
+
+job_queue = JobQueue(settings.JOB_CONCURRENCY)
@@ -0,0 +1,146 @@
+# backend/app/utils/job_tasks.py
+"""
+Job entry points executed inside worker processes.
+
+Each task opens its own database session; API modules are imported lazily so
+the parent process can import this module without pulling in the routers.
+"""
+import os
+import json
+import time
+import logging
+from typing import Optional
+
+from ..config import settings
+from ..database import SessionLocal, engine
+from ..models.job import Job
+
+logger = logging.getLogger(__name__)
+
+
+def report_progress(job_id: int, progress: dict):
+    """
+    Record a running job's progress on its own short transaction.
+
+    Skipped on SQLite, where the upload's open transaction holds the only
+    write lock and this update would wait for it to commit.
+    """
+    if engine.dialect.name == 'sqlite':
+        return
+    db = SessionLocal()
+    try:
+        db.query(Job).filter(Job.id == job_id, Job.status == "running").update(
+            {"progress": json.dumps(progress)}, synchronize_session=False
+        )
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.warning(f"Could not record progress of job {job_id}: {str(e)}")
+    finally:
+        db.close()
+
+
+def run_upload(job_id: int, params: dict) -> dict:
+    from ..api.stocks import ingestor, intraday_ingestor, record_upload
+
+    target = intraday_ingestor if params.get('intraday') else ingestor
+    db = SessionLocal()
+    try:
+        with open(params['path'], 'rb') as fh:
+            result = target.ingest_csv(
+                db, fh, params.get('symbol'), chunk_size=params['chunk_size'],
+                on_chunk=lambda progress: report_progress(job_id, progress)
+            )
+        record_upload(
+            db, result, params['filename'],
+            params['user_id'], params['username'], params['ip_address']
+        )
+        return result
+    finally:
+        db.close()
+        if os.path.exists(params['path']):
+            os.remove(params['path'])
+
+
+def run_analysis(job_id: int, params: dict) -> dict:
+    from ..api.stocks import run_analysis as analyze
+
+    db = SessionLocal()
+    try:
+        return analyze(
+            db, params['symbol'], params['user_id'], params['username'],
+            params.get('incremental', False), params.get('resolution', '1d')
+        )
+    finally:
+        db.close()
+
+
+def run_pattern_scan(job_id: int, params: dict) -> dict:
+    from datetime import date
+    from ..api.stocks import run_pattern_scan as scan
+
+    db = SessionLocal()
+    try:
+        return scan(
+            db, params['symbols'], params['user_id'], params['username'],
+            date.fromisoformat(params['start_date']) if params.get('start_date') else None,
+            date.fromisoformat(params['end_date']) if params.get('end_date') else None,
+            params.get('persist', True), params.get('limit', 100)
+        )
+    finally:
+        db.close()
+
+
+def run_report(job_id: int, params: dict) -> dict:
+    from ..api.reports import build_report, report_filename
+
+    db = SessionLocal()
+    try:
+        pdf_buffer = build_report(db, params['symbol'], params['user_id'], params['username'])
+    finally:
+        db.close()
+
+    os.makedirs(settings.JOB_STORAGE_DIR, exist_ok=True)
+    path = os.path.join(settings.JOB_STORAGE_DIR, f"report_{job_id}.pdf")
+    with open(path, 'wb') as fh:
+        fh.write(pdf_buffer.getvalue())
+
+    return {
+        'symbol': params['symbol'],
+        'path': path,
+        'filename': report_filename(params['symbol']),
+        'size': os.path.getsize(path)
+    }
+
+
+TASKS = {
+    'UPLOAD': run_upload,
+    'ANALYSIS': run_analysis,
+    'REPORT': run_report,
+    'PATTERN_SCAN': run_pattern_scan
+}
+
+
+def run_task(kind: str, job_id: int, params: dict) -> dict:
+    """Dispatch a job by kind (module-level so it can be pickled to workers)"""
+    logger.info(f"Worker {os.getpid()} running {kind} job {job_id}")
+    return TASKS[kind](job_id, params)
+
+
+def analyze_symbol(symbol: str, user_id: Optional[int], username: str,
+                   incremental: bool = False) -> dict:
+    """Batch worker: load one symbol's data and analyze it in this process"""
+    from ..api.stocks import run_analysis as analyze
+
+    start = time.perf_counter()
+    db = SessionLocal()
+    try:
+        summary = analyze(db, symbol, user_id, username, incremental)
+        return {'symbol': symbol, 'status': 'completed', 'summary': summary,
+                'elapsed_ms': round((time.perf_counter() - start) * 1000, 1)}
+    except Exception as e:
+        db.rollback()
+        return {'symbol': symbol, 'status': 'failed', 'error': str(e),
+                'elapsed_ms': round((time.perf_counter() - start) * 1000, 1)}
+    finally:
+        db.close()
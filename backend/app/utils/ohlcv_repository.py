@@ -0,0 +1,365 @@
+# backend/app/utils/ohlcv_repository.py
+import pandas as pd
+import numpy as np
+from datetime import date, datetime
+from sqlalchemy import select, func, case, and_, cast, Float
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from ..models.stock import StockData, IntradayBar, OHLCVRollup, SymbolVersion
+from .timeseries_cache import TimeSeriesCache, timeseries_cache
+from .resampling import (
+    resample_bars, validate_resolution, period_starts, period_count, DAILY_RESOLUTION, ROLLUP_RESOLUTIONS
+)
+
+OHLCV_FIELDS = ('date', 'open', 'high', 'low', 'close', 'volume')
+HISTORY_FIELDS = ('id',) + OHLCV_FIELDS + ('created_at',)
+INTRADAY_FIELDS = ('timestamp',) + OHLCV_FIELDS[1:]
+
+
+def get_symbol_version(db: Session, symbol: str) -> int:
+    """Current data version of a symbol (0 if it has never been written)"""
+    version = db.execute(
+        select(SymbolVersion.version).where(SymbolVersion.symbol == symbol)
+    ).scalar_one_or_none()
+    return version or 0
+
+
+def get_universe_version(db: Session) -> str:
+    """Changes whenever any symbol is written: '<symbols>-<sum of their versions>'"""
+    symbols, versions = db.execute(
+        select(func.count(SymbolVersion.symbol), func.coalesce(func.sum(SymbolVersion.version), 0))
+    ).one()
+    return f"{symbols}-{versions}"
+
+
+def _as_date(value: Union[date, datetime]) -> date:
+    return value.date() if isinstance(value, datetime) else value
+
+
+class OHLCVRepository:
+    """
+    Columnar read path for stock_data.
+
+    Runs Core-level selects of only the requested columns, so rows come back as
+    plain tuples instead of hydrated StockData objects in the identity map.
+    """
+
+    def __init__(self, db: Session, cache: Optional[TimeSeriesCache] = timeseries_cache):
+        self.db = db
+        self.cache = cache
+
+    def _select(self, symbol: str, columns: Sequence[str],
+                start: Optional[date] = None, end: Optional[date] = None):
+        query = select(*[getattr(StockData, col) for col in columns]).where(
+            StockData.symbol == symbol
+        )
+        if start:
+            query = query.where(StockData.date >= start)
+        if end:
+            query = query.where(StockData.date <= end)
+        return query.order_by(StockData.date)
+
+    def fetch_frame(self, symbol: str, columns: Sequence[str] = OHLCV_FIELDS,
+                    start: Optional[date] = None, end: Optional[date] = None) -> pd.DataFrame:
+        """Date-ordered history as a DataFrame ('date' stays as datetime.date objects)"""
+        rows = self.db.execute(self._select(symbol, columns, start, end)).all()
+        return pd.DataFrame.from_records(rows, columns=list(columns))
+
+    def fetch_page(self, symbol: str, limit: int, before: Optional[date] = None,
+                   start: Optional[date] = None, end: Optional[date] = None) -> List[Dict]:
+        """
+        The latest `limit` daily rows (HISTORY_FIELDS) dated before `before`,
+        newest first. A keyset read: one range scan of the (symbol, date)
+        index however deep the page is, and nothing else is loaded.
+        """
+        query = self._select(symbol, HISTORY_FIELDS, start, end).order_by(None)
+        if before:
+            query = query.where(StockData.date < before)
+        rows = self.db.execute(query.order_by(StockData.date.desc()).limit(limit)).all()
+        return [dict(row._mapping) for row in rows]
+
+    def has_daily(self, symbol: str) -> bool:
+        return self.db.execute(
+            select(StockData.id).where(StockData.symbol == symbol).limit(1)
+        ).first() is not None
+
+    def fetch_rollup_page(self, symbol: str, resolution: str, limit: int, before: Optional[date] = None,
+                          start: Optional[date] = None, end: Optional[date] = None) -> List[Dict]:
+        """
+        fetch_page over the weekly / monthly / quarterly rollups: the latest
+        `limit` periods overlapping [start, end] that begin before `before`,
+        newest first, read from the (symbol, resolution, date) primary key.
+        """
+        query = select(
+            OHLCVRollup.date, *[getattr(OHLCVRollup, col) for col in OHLCV_FIELDS[1:]], OHLCVRollup.bars
+        ).where(OHLCVRollup.symbol == symbol, OHLCVRollup.resolution == resolution)
+        if start:
+            query = query.where(OHLCVRollup.date >= period_starts([start], resolution)[0].astype(object))
+        if end:
+            query = query.where(OHLCVRollup.date <= end)
+        if before:
+            query = query.where(OHLCVRollup.date < before)
+        rows = self.db.execute(query.order_by(OHLCVRollup.date.desc()).limit(limit)).all()
+        return [dict(row._mapping) for row in rows]
+
+    def date_span(self, symbol: str) -> Optional[Tuple[date, date]]:
+        """First and last daily bar dates (two index probes), or None without daily data"""
+        first, last = self.db.execute(
+            select(func.min(StockData.date), func.max(StockData.date)).where(StockData.symbol == symbol)
+        ).one()
+        return (first, last) if first is not None else None
+
+    def pick_resolution(self, symbol: str, start: Optional[date], end: Optional[date], max_bars: int) -> str:
+        """
+        The finest of daily, weekly, monthly and quarterly bars that spans
+        [start, end] (open ends: the symbol's daily history) in at most
+        max_bars bars; quarterly when nothing does.
+        """
+        span = self.date_span(symbol)
+        if span is None and not (start and end):
+            return DAILY_RESOLUTION
+        first = start or span[0]
+        last = end or span[1]
+        for resolution in (DAILY_RESOLUTION,) + ROLLUP_RESOLUTIONS:
+            if period_count(first, last, resolution) <= max_bars:
+                return resolution
+        return ROLLUP_RESOLUTIONS[-1]
+
+    def fetch_stats(self, symbol: str) -> Dict:
+        """
+        Summary statistics of the daily closes and volumes, aggregated in the
+        database so one row comes back however long the history is. Changes
+        are day over day (LAG in date order; a zero previous value gives no
+        change, where pandas' pct_change would give inf).
+        """
+        close = StockData.close
+        volume = cast(StockData.volume, Float)
+        changes = select(
+            close.label('close'),
+            volume.label('volume'),
+            (close / func.nullif(func.lag(close).over(order_by=StockData.date), 0) - 1).label('close_change'),
+            (volume / func.nullif(func.lag(volume).over(order_by=StockData.date), 0) - 1).label('volume_change')
+        ).where(StockData.symbol == symbol).subquery()
+        row = self.db.execute(select(
+            func.count().label('count'),
+            func.avg(changes.c.close).label('avg_price'),
+            func.avg(changes.c.volume).label('avg_volume'),
+            (func.avg(changes.c.close_change) * 100).label('price_change'),
+            (func.avg(changes.c.volume_change) * 100).label('volume_change'),
+            func.max(changes.c.close).label('max_price'),
+            func.min(changes.c.close).label('min_price'),
+            func.sum(changes.c.volume).label('total_volume')
+        )).one()
+        return dict(row._mapping)
+
+    def fetch_risk_summary(self, symbol: str, engine) -> Dict:
+        """
+        The per-day risk summary of MarketSurveillanceEngine.analyze over the
+        full history, computed in the database.
+
+        Window functions rebuild the engine's inputs (full-history mean and
+        sample variance, trailing VOLUME_WINDOW volume mean), each day is
+        flagged and scored the same way as engine._score (|z| > t compared
+        as squared deviation > t^2 x variance), and the days are grouped by
+        risk level, so at most three rows come back.
+        """
+        window = engine.VOLUME_WINDOW
+        volume = cast(StockData.volume, Float)
+        trailing = dict(order_by=StockData.date, rows=(-(window - 1), 0))
+        base = select(
+            StockData.close.label('close'),
+            volume.label('volume'),
+            func.avg(StockData.close).over().label('close_mean'),
+            func.avg(volume).over().label('volume_mean'),
+            func.avg(volume).over(**trailing).label('volume_ma'),
+            func.count().over(**trailing).label('ma_bars')
+        ).where(StockData.symbol == symbol).subquery()
+
+        close_dev2 = (base.c.close - base.c.close_mean) * (base.c.close - base.c.close_mean)
+        volume_dev2 = (base.c.volume - base.c.volume_mean) * (base.c.volume - base.c.volume_mean)
+        spread = select(
+            close_dev2.label('close_dev2'),
+            volume_dev2.label('volume_dev2'),
+            (func.sum(close_dev2).over() / func.nullif(func.count().over() - 1, 0)).label('close_var'),
+            (func.sum(volume_dev2).over() / func.nullif(func.count().over() - 1, 0)).label('volume_var'),
+            # NULL (like the engine's NaN) until the trailing window is full. Over a
+            # zero average the engine divides to +-inf, clipped to RATIO_CAP / 0
+            # below, and 0 / 0 stays NaN
+            case(
+                (base.c.ma_bars < window, None),
+                (base.c.volume_ma == 0, case((base.c.volume > 0, engine.RATIO_CAP), (base.c.volume < 0, 0))),
+                else_=base.c.volume / base.c.volume_ma
+            ).label('volume_ratio')
+        ).subquery()
+
+        price_flag = case((and_(spread.c.close_var > 0,
+                                spread.c.close_dev2 > engine.price_threshold ** 2 * spread.c.close_var), 1), else_=0)
+        volume_flag = case((and_(spread.c.volume_var > 0,
+                                 spread.c.volume_dev2 > engine.volume_threshold ** 2 * spread.c.volume_var), 1), else_=0)
+        ratio = case(
+            (spread.c.volume_ratio > engine.RATIO_CAP, engine.RATIO_CAP),
+            (spread.c.volume_ratio < 0, 0),
+            else_=spread.c.volume_ratio
+        )
+        scored = select(
+            price_flag.label('price_flag'),
+            volume_flag.label('volume_flag'),
+            (engine.FLAG_POINTS * (price_flag + volume_flag) + engine.RATIO_POINTS * ratio).label('risk_score')
+        ).subquery()
+
+        # Bands of ml.labels.risk_level; unscored days are Low
+        level = case((scored.c.risk_score > 70, 'High'), (scored.c.risk_score >= 30, 'Medium'), else_='Low')
+        rows = self.db.execute(select(
+            level.label('risk_level'),
+            func.count().label('days'),
+            func.sum(scored.c.price_flag).label('price_anomalies'),
+            func.sum(scored.c.volume_flag).label('volume_anomalies'),
+            func.count(scored.c.risk_score).label('scored_days'),
+            func.sum(scored.c.risk_score).label('risk_total'),
+            func.max(scored.c.risk_score).label('max_risk_score')
+        ).group_by(level)).all()
+
+        by_level = {row.risk_level: row for row in rows}
+        scored_days = sum(row.scored_days for row in rows)
+        max_scores = [row.max_risk_score for row in rows if row.max_risk_score is not None]
+        return {
+            'total_days': sum(row.days for row in rows),
+            'high_risk_days': by_level['High'].days if 'High' in by_level else 0,
+            'medium_risk_days': by_level['Medium'].days if 'Medium' in by_level else 0,
+            'low_risk_days': by_level['Low'].days if 'Low' in by_level else 0,
+            'avg_risk_score': float(sum(row.risk_total or 0 for row in rows) / scored_days) if scored_days else float('nan'),
+            'max_risk_score': float(max(max_scores)) if max_scores else float('nan'),
+            'price_anomalies': int(sum(row.price_anomalies for row in rows)),
+            'volume_anomalies': int(sum(row.volume_anomalies for row in rows))
+        }
+
+    def fetch_arrays(self, symbol: str, columns: Sequence[str] = OHLCV_FIELDS,
+                     start: Optional[date] = None, end: Optional[date] = None) -> Dict[str, np.ndarray]:
+        """Date-ordered history as contiguous NumPy arrays ('date' as datetime64[D])"""
+        frame = self.fetch_frame(symbol, columns, start, end)
+        arrays = {}
+        for col in columns:
+            if col == 'date':
+                arrays[col] = frame[col].to_numpy(dtype='datetime64[D]')
+            else:
+                arrays[col] = np.ascontiguousarray(frame[col].to_numpy())
+        return arrays
+
+    def fetch_matrix(self, columns: Sequence[str] = ('close', 'volume'),
+                     symbols: Optional[List[str]] = None,
+                     start: Optional[date] = None, end: Optional[date] = None
+                     ) -> Tuple[np.ndarray, np.ndarray, Dict[str, np.ndarray]]:
+        """
+        The universe (or `symbols`) as dates x symbols float matrices, one per column.
+
+        Returns sorted dates (datetime64[D]), sorted symbols and the matrices;
+        cells with no bar for that symbol on that date are NaN.
+        """
+        query = select(StockData.symbol, StockData.date, *[getattr(StockData, col) for col in columns])
+        if symbols is not None:
+            query = query.where(StockData.symbol.in_(symbols))
+        if start:
+            query = query.where(StockData.date >= start)
+        if end:
+            query = query.where(StockData.date <= end)
+
+        frame = pd.DataFrame.from_records(
+            self.db.execute(query).all(), columns=['symbol', 'date', *columns]
+        )
+        date_codes, dates = pd.factorize(frame['date'].to_numpy(dtype='datetime64[D]'), sort=True)
+        symbol_codes, symbol_index = pd.factorize(frame['symbol'], sort=True)
+
+        matrices = {}
+        for col in columns:
+            matrix = np.full((len(dates), len(symbol_index)), np.nan)
+            matrix[date_codes, symbol_codes] = frame[col].to_numpy(dtype=np.float64)
+            matrices[col] = matrix
+        return np.asarray(dates, dtype='datetime64[D]'), np.asarray(symbol_index, dtype=object), matrices
+
+    def fetch_intraday(self, symbol: str, start: Optional[datetime] = None,
+                       end: Optional[datetime] = None) -> pd.DataFrame:
+        """
+        Time-ordered 1-minute bars (INTRADAY_FIELDS) in [start, end].
+
+        The full series is cached per data version like fetch_history, and
+        ranges are cut from it with a binary search on the timestamps; without
+        a cache the range is a primary-key scan.
+        """
+        if self.cache is None:
+            query = select(*[getattr(IntradayBar, col) for col in INTRADAY_FIELDS]).where(
+                IntradayBar.symbol == symbol
+            )
+            if start:
+                query = query.where(IntradayBar.timestamp >= start)
+            if end:
+                query = query.where(IntradayBar.timestamp <= end)
+            rows = self.db.execute(query.order_by(IntradayBar.timestamp)).all()
+            return self._intraday_frame(rows)
+
+        key = f"{symbol}@intraday"
+        version = get_symbol_version(self.db, symbol)
+        frame = self.cache.get(key, version)
+        if frame is None:
+            rows = self.db.execute(
+                select(*[getattr(IntradayBar, col) for col in INTRADAY_FIELDS])
+                .where(IntradayBar.symbol == symbol)
+                .order_by(IntradayBar.timestamp)
+            ).all()
+            frame = self._intraday_frame(rows)
+            if not frame.empty:
+                self.cache.put(key, version, frame)
+
+        timestamps = frame['timestamp'].to_numpy()
+        lo = np.searchsorted(timestamps, np.datetime64(start), 'left') if start else 0
+        hi = np.searchsorted(timestamps, np.datetime64(end), 'right') if end else len(frame)
+        return frame.iloc[lo:hi]
+
+    @staticmethod
+    def _intraday_frame(rows) -> pd.DataFrame:
+        frame = pd.DataFrame.from_records(rows, columns=list(INTRADAY_FIELDS))
+        frame['timestamp'] = pd.to_datetime(frame['timestamp'])
+        return frame
+
+    def fetch_bars(self, symbol: str, resolution: str = DAILY_RESOLUTION,
+                   start: Optional[Union[date, datetime]] = None,
+                   end: Optional[Union[date, datetime]] = None) -> pd.DataFrame:
+        """
+        Date-ordered 'date' + OHLCV bars at any resolution.
+
+        Daily bars come from stock_data (with their 'id'), falling back to
+        daily aggregates of the intraday bars for symbols that only have
+        those; finer resolutions are resampled from intraday_bars.
+        """
+        validate_resolution(resolution)
+        if resolution == DAILY_RESOLUTION:
+            daily = self.fetch_history(symbol)[['id', *OHLCV_FIELDS]]
+            if not daily.empty:
+                mask = np.ones(len(daily), dtype=bool)
+                if start:
+                    mask &= (daily['date'] >= _as_date(start)).to_numpy()
+                if end:
+                    mask &= (daily['date'] <= _as_date(end)).to_numpy()
+                return daily[mask]
+
+        if isinstance(end, date) and not isinstance(end, datetime):
+            end = datetime.combine(end, datetime.max.time())
+        return resample_bars(self.fetch_intraday(symbol, start, end), resolution)
+
+    def fetch_history(self, symbol: str) -> pd.DataFrame:
+        """
+        Full date-ordered history (HISTORY_FIELDS) served through the version-keyed
+        cache. The returned frame may be shared; do not mutate it.
+        """
+        if self.cache is None:
+            return self.fetch_frame(symbol, HISTORY_FIELDS)
+
+        # Read the version first so a concurrent upload can only make us cache
+        # newer data under an older version, never the reverse
+        version = get_symbol_version(self.db, symbol)
+        frame = self.cache.get(symbol, version)
+        if frame is None:
+            frame = self.fetch_frame(symbol, HISTORY_FIELDS)
+            if not frame.empty:
+                self.cache.put(symbol, version, frame)
+        return frame
@@ -0,0 +1,70 @@
+# backend/app/utils/pagination.py
+import json
+import base64
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Sequence
+
+from sqlalchemy import and_, or_
+
+# Cursor values are stored tagged so they decode back to the key's own types
+_ENCODERS = {
+    datetime: ('t', datetime.isoformat),
+    date: ('d', date.isoformat),
+    int: ('i', int)
+}
+_DECODERS = {
+    't': datetime.fromisoformat,
+    'd': date.fromisoformat,
+    'i': int
+}
+
+
+def encode_cursor(*values: Any) -> str:
+    """Opaque, URL-safe cursor for the sort key of the last row on a page"""
+    tagged = []
+    for value in values:
+        # datetime is checked before its base class date
+        kind = next(k for k in (datetime, date, int) if isinstance(value, k))
+        tag, encode = _ENCODERS[kind]
+        tagged.append([tag, encode(value)])
+    return base64.urlsafe_b64encode(json.dumps(tagged, separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """Sort key values of a cursor from encode_cursor; ValueError if it is malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        tagged = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = [_DECODERS[tag](value) for tag, value in tagged]
+    except (ValueError, TypeError, KeyError) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+    if len(values) != size:
+        raise ValueError("Invalid cursor: wrong number of key values")
+    return values
+
+
+def keyset_before(columns: Sequence, values: Sequence):
+    """
+    Rows sorting strictly before `values` on a descending (c1, c2, ...) key.
+
+    Spelt out as c1 <= v1 AND (c1 < v1 OR (c2 ...)) rather than a row-value
+    comparison, so the leading bound is a plain range condition on the
+    index even when the key columns come from joined tables.
+    """
+    column, value = columns[0], values[0]
+    if len(columns) == 1:
+        return column < value
+    return and_(column <= value, or_(column < value, keyset_before(columns[1:], values[1:])))
+
+
+def page(rows: List, limit: int, key: Callable[[Any], Sequence]) -> Dict:
+    """
+    Page envelope for rows fetched with limit + 1: the extra row only tells
+    whether another page exists, and next_cursor resumes after the last kept row.
+    """
+    more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        'items': rows,
+        'next_cursor': encode_cursor(*key(rows[-1])) if more and rows else None
+    }
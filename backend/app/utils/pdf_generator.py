@@ -6,13 +6,14 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 import pandas as pd
 import io
+from typing import Optional
 from datetime import datetime
 
 class PDFReportGenerator:
     """Generate PDF reports for market surveillance"""
     
-    def generate_report(self, stock_symbol: str, df: pd.DataFrame, 
-                        analysis_summary: dict, anomalies: list):
+    def generate_report(self, stock_symbol: str, analysis_summary: dict, anomalies: list,
+                        df: Optional[pd.DataFrame] = None):
         """Generate comprehensive PDF report"""
         
         buffer = io.BytesIO()
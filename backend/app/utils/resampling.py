@@ -0,0 +1,112 @@
+# backend/app/utils/resampling.py
+import numpy as np
+import pandas as pd
+
+# Bar sizes in seconds; 1m is the stored intraday resolution
+RESOLUTIONS = {
+    '1m': 60,
+    '5m': 300,
+    '15m': 900,
+    '1h': 3600,
+    '1d': 86400
+}
+INTRADAY_RESOLUTION = '1m'
+DAILY_RESOLUTION = '1d'
+
+# Calendar periods rolled up from daily bars (weeks start on Monday), kept in ohlcv_rollups
+ROLLUP_RESOLUTIONS = ('1w', '1mo', '1q')
+
+
+def validate_resolution(resolution: str) -> str:
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f"Unknown resolution '{resolution}'; expected one of {', '.join(RESOLUTIONS)}")
+    return resolution
+
+
+def resample_bars(bars: pd.DataFrame, resolution: str) -> pd.DataFrame:
+    """
+    Aggregate time-ordered 1-minute bars (timestamp + OHLCV) into coarser bars.
+
+    Bars are bucketed by flooring the timestamp to the resolution, then each
+    run of equal buckets is reduced in one vectorized pass: first open, max
+    high, min low, last close, summed volume. Returns 'date' (bucket start)
+    + OHLCV; daily buckets are returned as datetime.date like stock_data.
+    """
+    step = RESOLUTIONS[validate_resolution(resolution)]
+    columns = ['date', 'open', 'high', 'low', 'close', 'volume']
+    if bars.empty:
+        return pd.DataFrame(columns=columns)
+
+    seconds = bars['timestamp'].to_numpy(dtype='datetime64[s]').astype(np.int64)
+    buckets = seconds - seconds % step
+    resampled = _reduce_runs(bars, buckets).drop(columns='bars')
+    resampled['date'] = resampled['date'].astype('datetime64[s]').astype('datetime64[ns]')
+    if resolution == DAILY_RESOLUTION:
+        resampled['date'] = resampled['date'].dt.date
+    return resampled
+
+
+def _reduce_runs(bars: pd.DataFrame, buckets: np.ndarray) -> pd.DataFrame:
+    """One bar per run of equal (sorted) buckets: first open, max high, min low, last close, summed volume"""
+    starts = np.concatenate(([0], np.flatnonzero(buckets[1:] != buckets[:-1]) + 1))
+    ends = np.concatenate((starts[1:], [len(buckets)])) - 1
+
+    return pd.DataFrame({
+        'date': buckets[starts],
+        'open': bars['open'].to_numpy(dtype=np.float64)[starts],
+        'high': np.maximum.reduceat(bars['high'].to_numpy(dtype=np.float64), starts),
+        'low': np.minimum.reduceat(bars['low'].to_numpy(dtype=np.float64), starts),
+        'close': bars['close'].to_numpy(dtype=np.float64)[ends],
+        'volume': np.add.reduceat(bars['volume'].to_numpy(dtype=np.int64), starts),
+        'bars': ends - starts + 1
+    })
+
+
+def period_starts(dates: np.ndarray, resolution: str) -> np.ndarray:
+    """First day of the week / month / quarter containing each date (datetime64[D])"""
+    days = np.asarray(dates, dtype='datetime64[D]')
+    if resolution == '1w':
+        # 1970-01-01 was a Thursday, three days after the week's Monday
+        return days - (days.astype(np.int64) + 3) % 7
+    if resolution not in ('1mo', '1q'):
+        raise ValueError(f"Unknown rollup resolution '{resolution}'; expected one of {', '.join(ROLLUP_RESOLUTIONS)}")
+    months = days.astype('datetime64[M]')
+    if resolution == '1q':
+        months = months - months.astype(np.int64) % 3
+    return months.astype('datetime64[D]')
+
+
+def next_period_starts(starts: np.ndarray, resolution: str) -> np.ndarray:
+    """First day of the period after each period start"""
+    starts = np.asarray(starts, dtype='datetime64[D]')
+    if resolution == '1w':
+        return starts + 7
+    return (starts.astype('datetime64[M]') + (3 if resolution == '1q' else 1)).astype('datetime64[D]')
+
+
+def period_count(start, end, resolution: str) -> int:
+    """Bars a resolution needs to span [start, end] (daily: business days), computed without data"""
+    first, last = np.datetime64(start, 'D'), np.datetime64(end, 'D')
+    if last < first:
+        return 0
+    if resolution == DAILY_RESOLUTION:
+        return int(np.busday_count(first, last + 1))
+    first, last = period_starts(np.array([first, last]), resolution)
+    if resolution == '1w':
+        return int((last - first).astype(np.int64) // 7 + 1)
+    months = int((last.astype('datetime64[M]') - first.astype('datetime64[M]')).astype(np.int64))
+    return months // (3 if resolution == '1q' else 1) + 1
+
+
+def rollup_bars(daily: pd.DataFrame, resolution: str) -> pd.DataFrame:
+    """
+    Aggregate date-ordered daily bars (date + OHLCV) into weekly, monthly or
+    quarterly bars. Returns 'date' (period start, as datetime.date) + OHLCV
+    and the number of daily bars in each period.
+    """
+    if daily.empty:
+        return pd.DataFrame(columns=['date', 'open', 'high', 'low', 'close', 'volume', 'bars'])
+    buckets = period_starts(daily['date'].to_numpy(dtype='datetime64[D]'), resolution)
+    rolled = _reduce_runs(daily, buckets)
+    rolled['date'] = rolled['date'].dt.date
+    return rolled
@@ -0,0 +1,83 @@
+# backend/app/utils/timeseries_cache.py
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import pandas as pd
+
+from ..config import settings
+
+
+class TimeSeriesCache:
+    """
+    Memory-bounded LRU cache of per-symbol OHLCV frames.
+
+    Entries are tagged with the symbol's data version; a lookup with a newer
+    version drops the stale entry, so reads never serve data older than the
+    last committed upload. Cached frames are shared - treat them as read-only.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[int, pd.DataFrame, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, symbol: str, version: int) -> Optional[pd.DataFrame]:
+        with self._lock:
+            entry = self._entries.get(symbol)
+            if entry is None or entry[0] != version:
+                if entry is not None:
+                    self._drop(symbol)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(symbol)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, symbol: str, version: int, frame: pd.DataFrame):
+        nbytes = int(frame.memory_usage(index=True, deep=True).sum())
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            if symbol in self._entries:
+                self._drop(symbol)
+            while self._entries and self.current_bytes + nbytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+            self._entries[symbol] = (version, frame, nbytes)
+            self.current_bytes += nbytes
+
+    def invalidate(self, symbol: str):
+        with self._lock:
+            if symbol in self._entries:
+                self._drop(symbol)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def _drop(self, symbol: str):
+        _, _, nbytes = self._entries.pop(symbol)
+        self.current_bytes -= nbytes
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+
+timeseries_cache = TimeSeriesCache(settings.TIMESERIES_CACHE_MAX_MB * 1024 * 1024)
@@ -0,0 +1,51 @@
+# backend/scripts/analyze_batch.py
+"""
+Run surveillance analysis across many symbols on all CPU cores.
+
+Usage:
+    python scripts/analyze_batch.py all
+    python scripts/analyze_batch.py RELIANCE TCS INFY --incremental --workers 4
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.database import SessionLocal
+from app.utils.batch_analysis import resolve_symbols, iter_batch_analysis
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Market-wide batch anomaly analysis")
+    parser.add_argument('symbols', nargs='+', help='Symbols to analyze, or "all"')
+    parser.add_argument('--incremental', action='store_true', help='Only score bars added since the last run')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: one per core)')
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        symbols = resolve_symbols(db, 'all' if args.symbols == ['all'] else args.symbols)
+    finally:
+        db.close()
+
+    if not symbols:
+        print("❌ No symbols to analyze")
+        sys.exit(1)
+
+    print(f"🚀 Analyzing {len(symbols)} symbols...")
+    for result in iter_batch_analysis(symbols, None, 'cli', args.incremental, args.workers):
+        if result['type'] == 'done':
+            print(f"\n{'='*50}")
+            print(f"✅ {result['completed']}/{result['symbols']} symbols analyzed "
+                  f"on {result['workers']} workers in {result['elapsed_s']}s ({result['failed']} failed)")
+        elif result['status'] == 'completed':
+            summary = result['summary']
+            print(f"  {result['symbol']:<12} {summary['anomalies_found']:>5} anomalies  "
+                  f"max risk {summary['max_risk_score']:6.1f}  ({result['elapsed_ms']} ms)")
+        else:
+            print(f"  {result['symbol']:<12} ❌ {result['error']}")
+
+
+if __name__ == "__main__":
+    main()
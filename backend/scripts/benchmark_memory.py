@@ -0,0 +1,68 @@
+# backend/scripts/benchmark_memory.py
+"""
+Compare peak memory and result size of the analysis engines in full
+(float64) and compact (float32 / int32 / categorical) mode, and check that
+compact results match the full-precision ones.
+
+Usage: python scripts/benchmark_memory.py [rows ...]
+"""
+import os
+import sys
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.ml import MarketSurveillanceEngine
+from app.ml.features import FeatureEngine
+from benchmark_features import make_history
+
+# float32 keeps ~7 significant digits
+RTOL = 1e-5
+ATOL = 1e-6
+
+
+def measured(fn, df):
+    """Result of fn(df), its tracemalloc peak and its retained size in bytes"""
+    tracemalloc.start()
+    result = fn(df)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, peak, int(result.memory_usage(deep=True).sum())
+
+
+def check(expected, actual):
+    for column in expected.columns:
+        a, b = expected[column], actual[column]
+        if a.dtype.kind == 'f' or b.dtype.kind == 'f':
+            a = a.to_numpy(dtype=np.float64)
+            b = b.to_numpy(dtype=np.float64)
+            assert (np.isfinite(a) == np.isfinite(b)).all(), f"{column}: NaN/inf positions differ"
+            finite = np.isfinite(a)
+            assert np.allclose(a[finite], b[finite], rtol=RTOL, atol=ATOL), f"{column}: values differ"
+        else:
+            assert (a.astype(object) == b.astype(object)).all(), f"{column}: values differ"
+
+
+def run(rows):
+    df = make_history(rows)
+    engines = {
+        'engine.analyze': (MarketSurveillanceEngine(compact=False).analyze,
+                           MarketSurveillanceEngine(compact=True).analyze),
+        'features': (FeatureEngine(compact=False).extract_all_features,
+                     FeatureEngine(compact=True).extract_all_features)
+    }
+    for name, (full, compact) in engines.items():
+        expected, full_peak, full_size = measured(full, df)
+        actual, compact_peak, compact_size = measured(compact, df)
+        check(expected, actual)
+        print(f"{rows:>10,} rows | {name:<15} peak {full_peak / 2**20:8.1f} -> {compact_peak / 2**20:8.1f} MiB"
+              f" | result {full_size / 2**20:8.1f} -> {compact_size / 2**20:8.1f} MiB")
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100_000, 1_000_000]
+    print("📊 Analysis memory benchmark (full -> compact)")
+    for rows in sizes:
+        run(rows)
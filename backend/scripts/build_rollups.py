@@ -0,0 +1,58 @@
+# backend/scripts/build_rollups.py
+"""
+Rebuild the weekly / monthly / quarterly OHLCV rollups (ohlcv_rollups) from
+stock_data. Uploads keep them current; run this once for data loaded before
+the rollups existed, or after editing stock_data by hand.
+
+Usage:
+    python scripts/build_rollups.py all
+    python scripts/build_rollups.py RELIANCE TCS
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.database import SessionLocal
+from app.utils.batch_analysis import resolve_symbols
+from app.utils.bulk_ingest import refresh_rollups
+from app.utils.ohlcv_repository import OHLCVRepository
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild OHLCV rollups from daily bars")
+    parser.add_argument('symbols', nargs='+', help='Symbols to rebuild, or "all"')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    db = SessionLocal()
+    try:
+        symbols = resolve_symbols(db, 'all' if args.symbols == ['all'] else args.symbols)
+        if not symbols:
+            print("❌ No symbols to rebuild")
+            sys.exit(1)
+
+        repo = OHLCVRepository(db, cache=None)
+        total = 0
+        for i, symbol in enumerate(symbols, 1):
+            span = repo.date_span(symbol)
+            if span is None:
+                print(f"   {symbol}: no daily bars, skipped")
+                continue
+            # The first and last bar mark every period in between as touched
+            total += refresh_rollups(db, pd.DataFrame({'symbol': [symbol, symbol], 'date': list(span)}))
+            db.commit()
+            if i % 100 == 0:
+                print(f"   {i}/{len(symbols)} symbols")
+    finally:
+        db.close()
+
+    print(f"✅ {total} rollup bars written for {len(symbols)} symbols in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
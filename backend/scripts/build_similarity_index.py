@@ -0,0 +1,59 @@
+# backend/scripts/build_similarity_index.py
+"""
+Build (or refresh) the persisted episode similarity index behind
+/stocks/similar, so the first query after a data load does not pay for it.
+Optionally run one query against it.
+
+Usage:
+    python scripts/build_similarity_index.py
+    python scripts/build_similarity_index.py --query RELIANCE 2024-03-01 2024-03-28 --k 5
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.database import SessionLocal
+from app.api.stocks import load_episode_index
+from app.config import settings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the episode similarity index")
+    parser.add_argument('--query', nargs=3, metavar=('SYMBOL', 'START', 'END'), help='Episode to search for')
+    parser.add_argument('--k', type=int, default=10, help='Episodes to return')
+    parser.add_argument('--past-only', action='store_true', help='Only episodes that ended before the query')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    db = SessionLocal()
+    try:
+        index = load_episode_index(db)
+    except LookupError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+    dates, symbols = index.shape
+    print(f"✅ Index ready in {time.perf_counter() - start:.1f}s: {dates} dates x {symbols} symbols "
+          f"({settings.SIMILARITY_INDEX_DIR})")
+
+    if args.query:
+        symbol, first, last = args.query
+        searched = time.perf_counter()
+        query, matches = index.query(symbol.upper(), date.fromisoformat(first), date.fromisoformat(last),
+                                     args.k, args.past_only)
+        print(f"🔎 {query['symbol']} {query['start_date']} .. {query['end_date']} ({query['bars']} bars) "
+              f"searched in {time.perf_counter() - searched:.2f}s")
+        with pd.option_context('display.width', 200, 'display.max_columns', None):
+            print(matches.round(dict.fromkeys(matches.select_dtypes('number').columns, 4)).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# backend/scripts/calibrate.py
+"""
+Sweep alert thresholds / risk weights over the stored history in one pass
+and report alert counts, precision / recall against labelled events and
+overlap with the current configuration's alerts.
+
+Usage:
+    python scripts/calibrate.py all --model engine --price 2 2.5 3 --volume 2 2.5 3
+    python scripts/calibrate.py RELIANCE TCS --events events.csv --tolerance 2 \\
+        --alert-scores 20 30 40 --weights '[{"ml_anomaly": 0.1}, {"ml_anomaly": 0.3}]'
+
+The events CSV needs 'symbol' and 'date' columns.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.database import SessionLocal
+from app.ml.calibration import CalibrationSweep
+from app.utils.batch_analysis import resolve_symbols
+from app.utils.ohlcv_repository import OHLCVRepository, OHLCV_FIELDS
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vectorized threshold / weight calibration")
+    parser.add_argument('symbols', nargs='+', help='Symbols to calibrate on, or "all"')
+    parser.add_argument('--model', choices=CalibrationSweep.MODELS, default='pipeline')
+    parser.add_argument('--price', type=float, nargs='+', default=[2.0, 2.5, 3.0, 3.5], help='Price z-score thresholds')
+    parser.add_argument('--volume', type=float, nargs='+', default=[2.0, 2.5, 3.0, 3.5], help='Volume z-score thresholds')
+    parser.add_argument('--spike', type=float, nargs='+', help='Volume spike (ratio to 20-day mean) thresholds')
+    parser.add_argument('--weights', type=json.loads, help='JSON list of RiskScorer weight overrides')
+    parser.add_argument('--alert-scores', type=float, nargs='+', help='Minimum risk score for an alert')
+    parser.add_argument('--events', help='CSV of labelled events (symbol, date)')
+    parser.add_argument('--tolerance', type=int, default=0, help='Bars an alert may trail an event')
+    parser.add_argument('--top', type=int, default=15, help='Settings to print')
+    parser.add_argument('--output', help='Write every setting\'s metrics to this CSV file')
+    args = parser.parse_args()
+
+    events = []
+    if args.events:
+        labelled = pd.read_csv(args.events)
+        events = list(zip(labelled['symbol'].str.upper(), labelled['date']))
+
+    sweep = CalibrationSweep(args.model)
+    grid = sweep.grid(args.price, args.volume, args.spike, args.weights, args.alert_scores)
+
+    db = SessionLocal()
+    try:
+        symbols = resolve_symbols(db, 'all' if args.symbols == ['all'] else args.symbols)
+        if not symbols:
+            print("❌ No symbols to calibrate on")
+            sys.exit(1)
+
+        print(f"🎛️  Preparing {len(symbols)} symbols ({args.model} model)...")
+        start = time.perf_counter()
+        repo = OHLCVRepository(db, cache=None)
+        sweep.prepare((symbol, repo.fetch_frame(symbol, OHLCV_FIELDS)) for symbol in symbols)
+    finally:
+        db.close()
+
+    prepared = time.perf_counter()
+    results, summary = sweep.evaluate(grid, events, args.tolerance)
+    finished = time.perf_counter()
+
+    print(f"✅ {summary['settings']} settings x {summary['rows']} bars evaluated in "
+          f"{finished - prepared:.2f}s (prepare {prepared - start:.1f}s); "
+          f"{summary['events_matched']} labelled events matched")
+    print(f"   Baseline: {summary['baseline']}")
+
+    if 'f1' in results:
+        results = results.sort_values('f1', ascending=False, kind='stable')
+    with pd.option_context('display.width', 200, 'display.max_columns', None):
+        print(results.head(args.top).round(4).replace({np.nan: None}).to_string(index=False))
+
+    if args.output:
+        results.to_csv(args.output, index=False)
+        print(f"💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# backend/scripts/replay_history.py
+"""
+Point-in-time replay of stored history: what the surveillance engine would
+have flagged on each past day using only the data available then, with
+alert timing metrics against the full-history (hindsight) analysis.
+
+Usage:
+    python scripts/replay_history.py all
+    python scripts/replay_history.py RELIANCE TCS --warmup 60 --output replay.csv
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.database import SessionLocal
+from app.ml import MarketSurveillanceEngine
+from app.ml.replay import ReplayEngine
+from app.utils.batch_analysis import resolve_symbols
+from app.utils.ohlcv_repository import OHLCVRepository, OHLCV_FIELDS
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Point-in-time replay of the surveillance engine")
+    parser.add_argument('symbols', nargs='+', help='Symbols to replay, or "all"')
+    parser.add_argument('--warmup', type=int, default=20, help='Bars before alerts are raised')
+    parser.add_argument('--max-lag', type=int, default=5, help='Bars an alert may trail a hindsight anomaly')
+    parser.add_argument('--output', help='Write every replayed alert to this CSV file')
+    args = parser.parse_args()
+
+    replay = ReplayEngine(MarketSurveillanceEngine(), warmup=args.warmup)
+    start = time.perf_counter()
+    totals = {'bars': 0, 'alerts': 0, 'hindsight_anomalies': 0, 'confirmed_alerts': 0, 'missed': 0}
+    alerts = []
+
+    db = SessionLocal()
+    try:
+        symbols = resolve_symbols(db, 'all' if args.symbols == ['all'] else args.symbols)
+        if not symbols:
+            print("❌ No symbols to replay")
+            sys.exit(1)
+
+        print(f"⏪ Replaying {len(symbols)} symbols...")
+        repo = OHLCVRepository(db, cache=None)
+        for symbol in symbols:
+            df = repo.fetch_frame(symbol, OHLCV_FIELDS)
+            if df.empty:
+                print(f"  {symbol:<12} ❌ no data")
+                continue
+            replayed = replay.replay(df)
+            metrics = replay.alert_metrics(replayed, args.max_lag)
+            for key in totals:
+                totals[key] += metrics[key]
+            if args.output:
+                alerts.append(replayed[replayed['alert']].assign(symbol=symbol))
+            print(f"  {symbol:<12} {metrics['bars']:>6} bars {metrics['alerts']:>5} alerts  "
+                  f"precision {metrics['precision'] or 0:5.2f}  recall {metrics['recall'] or 0:5.2f}  "
+                  f"mean lag {metrics['mean_lag_bars'] or 0:4.1f} bars")
+    finally:
+        db.close()
+
+    if args.output and alerts:
+        pd.concat(alerts).to_csv(args.output, index=False)
+        print(f"💾 Alerts written to {args.output}")
+
+    elapsed = time.perf_counter() - start
+    print(f"\n{'='*50}")
+    print(f"✅ {totals['bars']} bars replayed in {elapsed:.1f}s: {totals['alerts']} alerts, "
+          f"{totals['confirmed_alerts']} confirmed by hindsight, "
+          f"{totals['missed']}/{totals['hindsight_anomalies']} hindsight anomalies missed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+# backend/scripts/scan_patterns.py
+"""
+Scan stored history for multi-bar manipulation patterns (pump-and-dump,
+ramping, marking the close, compression breakouts) and store the hits as
+anomalies.
+
+Usage:
+    python scripts/scan_patterns.py all
+    python scripts/scan_patterns.py RELIANCE TCS --start 2024-01-01 --dry-run
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.database import SessionLocal
+from app.api.stocks import run_pattern_scan
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Universe-wide manipulation pattern scan")
+    parser.add_argument('symbols', nargs='+', help='Symbols to scan, or "all"')
+    parser.add_argument('--start', type=date.fromisoformat, help='First trigger date (YYYY-MM-DD)')
+    parser.add_argument('--end', type=date.fromisoformat, help='Last date (YYYY-MM-DD)')
+    parser.add_argument('--dry-run', action='store_true', help='Report hits without storing them')
+    parser.add_argument('--top', type=int, default=20, help='Hits to print')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    db = SessionLocal()
+    try:
+        summary = run_pattern_scan(
+            db, 'all' if args.symbols == ['all'] else args.symbols, None, "pattern_scan_script",
+            args.start, args.end, persist=not args.dry_run, limit=args.top
+        )
+    finally:
+        db.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"🔎 {summary['symbols']} symbols x {summary['dates']} dates scanned in {elapsed:.1f}s")
+    for pattern, count in summary['patterns'].items():
+        print(f"  {pattern:<22} {count:>6}")
+    for hit in summary['hits']:
+        print(f"  {hit['date']}  {hit['symbol']:<12} {hit['anomaly_type']:<22} "
+              f"{hit['risk_score']:5.1f} ({hit['risk_level']})")
+
+    print(f"\n{'='*50}")
+    stored = "stored" if summary['stored'] else "not stored (dry run)"
+    print(f"✅ {summary['hits_found']} hits, {summary['high_risk']} high risk - {stored}")
+
+
+if __name__ == "__main__":
+    main()
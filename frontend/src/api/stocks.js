@@ -1,5 +1,6 @@
 // src/api/stocks.js
 import api from './axios';
+import { CHART_MAX_POINTS } from '@utils/constants';
 
 export const stocksAPI = {
   // Get all symbols
@@ -9,13 +10,19 @@ export const stocksAPI = {
   },
 
   // Get stock data
-  getStockData: async (symbol, startDate, endDate) => {
+  getStockData: async (symbol, startDate, endDate, cursor) => {
     const params = {};
     if (startDate) params.start_date = startDate;
     if (endDate) params.end_date = endDate;
+    if (cursor) params.cursor = cursor;
+    // Long ranges come back as weekly / monthly / quarterly bars
+    if (startDate && endDate) {
+      params.resolution = 'auto';
+      params.limit = CHART_MAX_POINTS;
+    }
     
     const response = await api.get(`/stocks/data/${symbol}`, { params });
-    return response.data;
+    return response.data.items;
   },
 
   // Upload CSV
@@ -41,7 +48,7 @@ export const stocksAPI = {
   // Get anomalies
   getAnomalies: async (symbol) => {
     const response = await api.get(`/stocks/anomalies/${symbol}`);
-    return response.data;
+    return response.data.items;
   },
 
   // Generate report
@@ -55,6 +62,6 @@ export const stocksAPI = {
   // Get audit logs
   getAuditLogs: async () => {
     const response = await api.get('/reports/audit-logs');
-    return response.data;
+    return response.data.items;
   },
 };
\ No newline at end of file
@@ -9,7 +9,8 @@ class WebSocketService {
 
   connect(symbol = 'ALL') {
     const wsUrl = import.meta.env.VITE_WS_URL || 'ws://localhost:8000/api/v1/ws';
-    this.socket = new WebSocket(`${wsUrl}/realtime/${symbol}`);
+    const token = localStorage.getItem('token') || '';
+    this.socket = new WebSocket(`${wsUrl}/realtime/${symbol}?token=${encodeURIComponent(token)}`);
     
     this.socket.onopen = () => {
       console.log('WebSocket connected');
@@ -29,10 +30,13 @@ class WebSocketService {
       }
     };
 
-    this.socket.onclose = () => {
+    this.socket.onclose = (event) => {
       console.log('WebSocket disconnected');
       this.emit('disconnect', { connected: false });
       
+      // Rejected credentials; retrying will not help until the user logs in again
+      if (event.code === 1008) return;
+      
       // Attempt to reconnect after 3 seconds
       setTimeout(() => this.connect(symbol), 3000);
     };
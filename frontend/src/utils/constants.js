@@ -53,6 +53,9 @@ export const API_ENDPOINTS = {
   }
 };
 
+// Most candles a chart requests; longer ranges are served at coarser resolutions
+export const CHART_MAX_POINTS = 500;
+
 export const DATE_FORMATS = {
   DISPLAY: 'dd MMM yyyy',
   API: 'yyyy-MM-dd',